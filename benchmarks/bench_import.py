@@ -0,0 +1,113 @@
+"""
+Import-time benchmark with a regression budget.
+
+Each entry point is imported in fresh interpreters (``python -X importtime``)
+and the median cumulative import time is compared with the budget in
+``benchmarks/import_budget.json``. The budget also lists modules an import
+must not pull in (rich, ctypes, the output writers, ...), which is checked
+exactly, and a wall-clock limit for indexing a tiny directory end to end.
+
+Run from the repository root:
+    python -m benchmarks.bench_import
+    python -m benchmarks.bench_import --runs 15 --json import_times.json
+
+Exits with status 1 when anything is over budget.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+BUDGET_PATH = os.path.join(os.path.dirname(__file__), "import_budget.json")
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _python(*args: str) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, *args], cwd=REPO_ROOT, capture_output=True, text=True, check=True)
+
+
+def import_time_ms(module: str, runs: int) -> float:
+    """Median cumulative import time of ``module`` in a fresh interpreter."""
+    samples = []
+    for _ in range(runs):
+        stderr = _python("-X", "importtime", "-c", f"import {module}").stderr
+        for line in stderr.splitlines():
+            parts = line.split("|")
+            if len(parts) == 3 and parts[2].strip() == module:
+                samples.append(int(parts[1]) / 1000)
+    return statistics.median(samples)
+
+
+def loaded_modules(module: str) -> List[str]:
+    code = f"import sys; import {module}; print('\\n'.join(sys.modules))"
+    return _python("-c", code).stdout.split()
+
+
+def small_run_ms(runs: int) -> float:
+    """Median wall time of ``main.py`` indexing a directory of ten files."""
+    with tempfile.TemporaryDirectory() as tmp:
+        for i in range(10):
+            open(os.path.join(tmp, f"file_{i}.txt"), "w").close()
+        samples = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            _python("main.py", "--path", tmp)
+            samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def run(budget: Dict, runs: int) -> Dict:
+    results: Dict = {"python": sys.version.split()[0], "modules": {}, "violations": []}
+    for module, limits in budget.get("modules", {}).items():
+        elapsed = import_time_ms(module, runs)
+        loaded = set(loaded_modules(module))
+        pulled_in = sorted(f for f in limits.get("forbidden", [])
+                           if f in loaded or any(m.startswith(f + ".") for m in loaded))
+        results["modules"][module] = {"median_ms": round(elapsed, 2), "forbidden_loaded": pulled_in}
+        if elapsed > limits.get("max_ms", float("inf")):
+            results["violations"].append(f"import {module}: {elapsed:.1f} ms > {limits['max_ms']} ms")
+        for name in pulled_in:
+            results["violations"].append(f"import {module} loads {name}")
+
+    if "small_run" in budget:
+        elapsed = small_run_ms(runs)
+        results["small_run_ms"] = round(elapsed, 2)
+        if elapsed > budget["small_run"]["max_ms"]:
+            results["violations"].append(f"small run: {elapsed:.1f} ms > {budget['small_run']['max_ms']} ms")
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure entry point import times against a budget")
+    parser.add_argument("--runs", type=int, default=7, help="Fresh interpreters per measurement (default: 7)")
+    parser.add_argument("--budget", default=BUDGET_PATH, help="Budget file (default: benchmarks/import_budget.json)")
+    parser.add_argument("--json", metavar="FILE", help="Write the results as JSON ('-' for stdout)")
+    args = parser.parse_args()
+
+    with open(args.budget, encoding="utf-8") as f:
+        budget = json.load(f)
+    results = run(budget, args.runs)
+
+    for module, timing in results["modules"].items():
+        print(f"  import {module:<14} {timing['median_ms']:8.1f} ms", file=sys.stderr)
+    if "small_run_ms" in results:
+        print(f"  small run            {results['small_run_ms']:8.1f} ms", file=sys.stderr)
+    for message in results["violations"]:
+        print(f"OVER BUDGET {message}", file=sys.stderr)
+
+    if args.json == "-":
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    elif args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    sys.exit(1 if results["violations"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Per-phase timings of the indexing pipeline on a synthetic tree.
+
+Phases, each timed separately (best of ``--repeat`` runs):
+    scan       walk the tree with os.scandir, no metadata
+    metadata   extract_metadata for every file found by the scan
+    index      index_directory end to end (scan + metadata)
+    sort       sort_files by path on a shuffled record list
+    tree       build_directory_structure
+    serialize  write_json into memory
+
+Run from the repository root:
+    python -m benchmarks.bench_phases --width 6 --depth 3 --files 100
+    python -m benchmarks.bench_phases --save-baseline benchmarks/baseline.json
+    python -m benchmarks.bench_phases --baseline benchmarks/baseline.json --json results.json
+
+With ``--baseline`` the exit status is 1 when any phase is slower than the
+baseline by more than ``--tolerance``.
+"""
+import argparse
+import gc
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+
+from benchmarks.synthetic import TreeSpec, generate_tree
+from src.indexer import index_directory
+from src.metadata import extract_metadata
+from src.output import build_directory_structure, create_index_result, sort_files, write_json
+
+PHASES = ("scan", "metadata", "index", "sort", "tree", "serialize")
+
+
+def _best_of(func: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _scan(root: str) -> List[str]:
+    paths = []
+    stack = [root]
+    while stack:
+        with os.scandir(stack.pop()) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                else:
+                    paths.append(entry.path)
+    return paths
+
+
+def run_phases(root: str, repeat: int = 3) -> Dict[str, Dict[str, float]]:
+    """Time every phase on the tree at ``root``; returns seconds and records/s per phase."""
+    paths = _scan(root)
+    files = [extract_metadata(p) for p in paths]
+    shuffled = list(files)
+    random.Random(0).shuffle(shuffled)
+    result = create_index_result(sort_files(files), [root])
+
+    timings = {
+        "scan": _best_of(lambda: _scan(root), repeat),
+        "metadata": _best_of(lambda: [extract_metadata(p) for p in paths], repeat),
+        "index": _best_of(lambda: list(index_directory(root)), repeat),
+        "sort": _best_of(lambda: sort_files(shuffled, "path"), repeat),
+        "tree": _best_of(lambda: build_directory_structure(result), repeat),
+        "serialize": _best_of(lambda: write_json(result, io.StringIO()), repeat),
+    }
+    count = len(files)
+    return {
+        phase: {"seconds": round(seconds, 6), "records_per_second": round(count / seconds) if seconds else 0}
+        for phase, seconds in timings.items()
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> List[str]:
+    """Return one message per phase that regressed beyond ``tolerance`` (0.1 = 10% slower)."""
+    if results["spec"] != baseline.get("spec"):
+        print("Warning: baseline was recorded with a different tree spec", file=sys.stderr)
+    regressions = []
+    for phase, timing in results["phases"].items():
+        previous = baseline.get("phases", {}).get(phase)
+        if not previous:
+            continue
+        ratio = timing["seconds"] / previous["seconds"] if previous["seconds"] else 1.0
+        timing["baseline_ratio"] = round(ratio, 3)
+        if ratio > 1 + tolerance:
+            regressions.append(f"{phase}: {timing['seconds']:.4f}s vs baseline {previous['seconds']:.4f}s "
+                               f"({(ratio - 1) * 100:+.0f}%)")
+    return regressions
+
+
+def run(spec: TreeSpec, repeat: int, workdir: Optional[str] = None) -> dict:
+    tmp = tempfile.mkdtemp(prefix="file_indexer_bench_", dir=workdir)
+    try:
+        root = os.path.join(tmp, "tree")
+        directories, file_count = generate_tree(root, spec)
+        phases = run_phases(root, repeat)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return {
+        "spec": spec.to_dict(),
+        "directories": directories,
+        "files": file_count,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "phases": phases,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Time the indexing phases on a synthetic tree")
+    parser.add_argument("--width", type=int, default=TreeSpec.width, help="Subdirectories per directory")
+    parser.add_argument("--depth", type=int, default=TreeSpec.depth, help="Directory levels below the root")
+    parser.add_argument("--files", type=int, default=TreeSpec.files_per_dir, help="Files per directory")
+    parser.add_argument("--name-length", type=int, default=TreeSpec.name_length, help="Random characters per name")
+    parser.add_argument("--seed", type=int, default=TreeSpec.seed, help="Generator seed")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per phase; the best is kept (default: 3)")
+    parser.add_argument("--workdir", help="Where to create the tree (default: system temp dir)")
+    parser.add_argument("--json", metavar="FILE", help="Write the results as JSON ('-' for stdout)")
+    parser.add_argument("--baseline", metavar="FILE", help="Compare against a saved baseline")
+    parser.add_argument("--save-baseline", metavar="FILE", help="Save these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed slowdown vs baseline (default: 0.15)")
+    args = parser.parse_args()
+
+    spec = TreeSpec(args.width, args.depth, args.files, args.name_length, seed=args.seed)
+    print(f"Tree: {spec.directory_count:,} directories, {spec.file_count:,} files", file=sys.stderr)
+    results = run(spec, args.repeat, args.workdir)
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+    results["regressions"] = regressions
+
+    for phase in PHASES:
+        timing = results["phases"][phase]
+        ratio = f"  x{timing['baseline_ratio']:.2f}" if "baseline_ratio" in timing else ""
+        print(f"  {phase:<10} {timing['seconds']:9.4f}s  {timing['records_per_second']:>12,} rec/s{ratio}",
+              file=sys.stderr)
+
+    if args.json == "-":
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    elif args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    for message in regressions:
+        print(f"REGRESSION {message}", file=sys.stderr)
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
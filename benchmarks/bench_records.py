@@ -0,0 +1,107 @@
+"""
+Memory and throughput benchmark for the record types in ``src/models.py``.
+
+Run from the repository root:
+    python -m benchmarks.bench_records --count 1000000
+"""
+import argparse
+import gc
+import io
+import json
+import os
+import time
+import tracemalloc
+from dataclasses import MISSING, make_dataclass, fields
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional
+
+from src.models import FileMetadata, IndexResult
+from src.output import create_index_result, write_json
+
+
+# Same shape as FileMetadata but with a per-instance ``__dict__``, as before slotting.
+DictFileMetadata = make_dataclass(
+    "DictFileMetadata",
+    [(f.name, f.type) if f.default is MISSING else (f.name, f.type, f.default) for f in fields(FileMetadata)],
+)
+DictFileMetadata.to_dict = FileMetadata.to_dict
+
+
+def _make_records(cls, count: int) -> List:
+    base = datetime(2024, 1, 1)
+    return [
+        cls(
+            f"file_{i}.txt",
+            f"/data/dir_{i % 1000}/file_{i}.txt",
+            i * 37,
+            base + timedelta(seconds=i),
+            base,
+            False,
+            i % 5 == 0,
+            False,
+            True,
+        )
+        for i in range(count)
+    ]
+
+
+def _measure_memory(cls, count: int) -> float:
+    gc.collect()
+    tracemalloc.start()
+    records = _make_records(cls, count)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del records
+    gc.collect()
+    return current / count
+
+
+def _timed(func: Callable[[], object]) -> float:
+    gc.collect()
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def _dump_via_dicts(result: IndexResult) -> None:
+    json.dump(result.to_dict(), io.StringIO(), indent=2)
+
+
+def _dump_streaming(result: IndexResult, workers: Optional[int] = 1) -> None:
+    write_json(result, io.StringIO(), indent=2, sort_by="path", workers=workers)
+
+
+def run(count: int, workers: Optional[int] = None) -> None:
+    print(f"Records: {count:,}")
+
+    dict_bytes = _measure_memory(DictFileMetadata, count)
+    slot_bytes = _measure_memory(FileMetadata, count)
+    print(f"  memory/record  dataclass: {dict_bytes:8.1f} B   slotted: {slot_bytes:8.1f} B"
+          f"   ({(1 - slot_bytes / dict_bytes) * 100:.0f}% less)")
+
+    build_dict = _timed(lambda: _make_records(DictFileMetadata, count))
+    build_slot = _timed(lambda: _make_records(FileMetadata, count))
+    print(f"  construct      dataclass: {count / build_dict:10,.0f} rec/s   slotted: {count / build_slot:10,.0f} rec/s")
+
+    records = _make_records(FileMetadata, count)
+    result = create_index_result(records, ["/data"])
+    via_dicts = _timed(lambda: _dump_via_dicts(result))
+    streaming = _timed(lambda: _dump_streaming(result))
+    print(f"  serialize      to_dict:   {count / via_dicts:10,.0f} rec/s   write_json: {count / streaming:10,.0f} rec/s")
+
+    workers = workers or os.cpu_count() or 1
+    parallel = _timed(lambda: _dump_streaming(result, workers))
+    print(f"  write_json     1 process: {count / streaming:10,.0f} rec/s   {workers} processes: {count / parallel:10,.0f} rec/s"
+          f"   ({streaming / parallel:.1f}x)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark FileMetadata memory and serialization")
+    parser.add_argument("--count", type=int, default=1_000_000, help="Number of records (default: 1,000,000)")
+    parser.add_argument("--workers", type=int, default=None, help="Encoder processes for write_json (default: CPU count)")
+    args = parser.parse_args()
+    run(args.count, args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Deterministic synthetic directory trees for the benchmarks.
+
+The same ``TreeSpec`` always produces the same names, sizes and timestamps,
+so timings from different machines or commits are measured on identical
+input.
+"""
+import os
+import random
+import string
+from dataclasses import asdict, dataclass
+from typing import Tuple
+
+_NAME_CHARS = string.ascii_lowercase + string.digits
+_EXTENSIONS = (".txt", ".log", ".json", ".py", ".jpg", ".bin", "")
+_EPOCH = 1_600_000_000
+
+
+@dataclass(frozen=True)
+class TreeSpec:
+    """Shape of a generated tree: ``width`` subdirectories per level, ``depth`` levels."""
+    width: int = 4
+    depth: int = 3
+    files_per_dir: int = 50
+    name_length: int = 12
+    max_file_size: int = 4096
+    seed: int = 0
+
+    @property
+    def directory_count(self) -> int:
+        return sum(self.width ** level for level in range(self.depth + 1))
+
+    @property
+    def file_count(self) -> int:
+        return self.directory_count * self.files_per_dir
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def _name(rng: random.Random, length: int) -> str:
+    return "".join(rng.choice(_NAME_CHARS) for _ in range(length))
+
+
+def generate_tree(root: str, spec: TreeSpec) -> Tuple[int, int]:
+    """
+    Create the tree under ``root`` (which must not exist yet) and return
+    ``(directories, files)``. File contents are zero bytes up to a seeded
+    random size, so the tree costs little disk space beyond its inodes.
+    """
+    os.makedirs(root)
+    rng = random.Random(spec.seed)
+    directories = files = 0
+    level = [root]
+    for depth in range(spec.depth + 1):
+        next_level = []
+        for dirpath in level:
+            directories += 1
+            for i in range(spec.files_per_dir):
+                name = f"{_name(rng, spec.name_length)}_{i}{rng.choice(_EXTENSIONS)}"
+                path = os.path.join(dirpath, name)
+                with open(path, "wb") as f:
+                    f.truncate(rng.randrange(spec.max_file_size + 1))
+                mtime = _EPOCH + rng.randrange(365 * 86400)
+                os.utime(path, (mtime, mtime))
+                files += 1
+            if depth < spec.depth:
+                for i in range(spec.width):
+                    subdir = os.path.join(dirpath, f"{_name(rng, spec.name_length)}_{i}")
+                    os.mkdir(subdir)
+                    next_level.append(subdir)
+        level = next_level
+    return directories, files
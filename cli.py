@@ -11,6 +11,19 @@ Examples:
   python main.py --path "*" --output full_index.json
   python main.py --path "C:\\Users" --sort size
   python main.py --path "D:\\Documents" --output index.json --sort name
+  python main.py --path "D:\\Documents" --output index.json --watch
+  python main.py --path "*" --output full_index.json --resume
+  python main.py --path "C:\\Users" --output users.json --profile --stats-json stats.json
+  python main.py --path "D:\\Documents" --output index.json --watch --metrics-port 9105
+  python main.py validate index.json
+  python main.py report index.json --top 10
+  python main.py diff monday.json tuesday.json --only added,removed
+  python main.py jobs nightly.toml
+  python main.py du full_index.json --max-depth 2
+  python main.py contains full_index.json "C:\\Users\\me\\notes.txt"
+  python main.py ls full_index.json "C:\\Users\\me\\Documents"
+  python main.py serve --preload full_index.json
+  python main.py query top --index full_index.json --limit 10
         """,
         formatter_class=argparse.RawDescriptionHelpFormatter,
     )
@@ -29,6 +42,16 @@ Examples:
         help="Output JSON file path (optional, prints to stdout if not specified)",
     )
 
+    parser.add_argument(
+        "--format",
+        type=str,
+        choices=["json", "ndjson", "parquet"],
+        default=None,
+        help="Output format; ndjson writes one record per line plus a .summary.json sidecar, "
+             "parquet writes a columnar file (needs pyarrow) "
+             "(default: from the --output extension, otherwise json)",
+    )
+
     parser.add_argument(
         "--sort",
         type=str,
@@ -37,9 +60,268 @@ Examples:
         help="Sort results by field (default: path)",
     )
 
+    parser.add_argument(
+        "--shard-records",
+        type=int,
+        default=None,
+        metavar="N",
+        help="Split --output into segment files of at most N records, plus a .manifest.json",
+    )
+
+    parser.add_argument(
+        "--shard-mb",
+        type=float,
+        default=None,
+        metavar="MB",
+        help="Split --output into segment files of about MB megabytes, plus a .manifest.json",
+    )
+
+    parser.add_argument(
+        "--encode-workers",
+        type=int,
+        default=None,
+        metavar="N",
+        help="Encode a JSON --output of 100,000+ records in N forked processes (default: this process only)",
+    )
+
+    parser.add_argument(
+        "--directory-stats",
+        action="store_true",
+        help="Also write per-directory size rollups and top-N reports next to --output",
+    )
+
+    parser.add_argument(
+        "--top",
+        type=int,
+        default=20,
+        help="Number of largest files and folders kept in the directory stats (default: 20)",
+    )
+
+    parser.add_argument(
+        "--follow-symlinks",
+        action="store_true",
+        help="Descend into symlinked directories (each directory is listed once, so link loops end)",
+    )
+
+    parser.add_argument(
+        "--one-file-system",
+        action="store_true",
+        help="Do not descend into directories on a different device than the root",
+    )
+
+    parser.add_argument(
+        "--dedupe-links",
+        action="store_true",
+        help="Count hard-linked and symlinked files once; the summary adds deduplicated_size "
+             "(implied by --follow-symlinks and --one-file-system)",
+    )
+
+    parser.add_argument(
+        "--dir-timeout",
+        type=float,
+        default=None,
+        metavar="SECONDS",
+        help="Give up on a root whose directory listing takes longer than this (e.g. a hung network drive)",
+    )
+
+    parser.add_argument(
+        "--checkpoint-interval",
+        type=float,
+        default=None,
+        metavar="SECONDS",
+        help="Checkpoint progress next to --output this often so the scan can be resumed "
+             "(0 disables; default: every 60s for --path '*', otherwise off)",
+    )
+
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue an interrupted scan from its last checkpoint",
+    )
+
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="After the initial scan, keep a JSON --output up to date as files change (Ctrl-C to stop)",
+    )
+
+    parser.add_argument(
+        "--debounce",
+        type=float,
+        default=0.5,
+        help="Seconds of quiet before queued changes are applied in watch mode (default: 0.5)",
+    )
+
+    parser.add_argument(
+        "--poll",
+        type=float,
+        default=None,
+        metavar="SECONDS",
+        help="Use directory polling at this interval instead of inotify in watch mode",
+    )
+
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="cpu",
+        choices=["cpu", "memory", "all"],
+        default=None,
+        help="Print phase timings, per-root counters and syscall counts to stderr, plus a cProfile "
+             "(cpu), tracemalloc (memory) or both (all) report (default when given: cpu)",
+    )
+
+    parser.add_argument(
+        "--stats-json",
+        type=str,
+        default=None,
+        metavar="FILE",
+        help="Write phase timings, per-root counters and syscall counts as JSON "
+             "(with --profile cpu, the cProfile data goes next to it as .prof)",
+    )
+
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=None,
+        metavar="PORT",
+        help="Serve Prometheus metrics on http://127.0.0.1:PORT/metrics while indexing or watching",
+    )
+
+    parser.add_argument(
+        "--metrics-host",
+        type=str,
+        default="127.0.0.1",
+        help="Address the metrics endpoint binds to (default: 127.0.0.1)",
+    )
+
+    parser.add_argument(
+        "--metrics-textfile",
+        type=str,
+        default=None,
+        metavar="FILE",
+        help="Also write the metrics to FILE (e.g. for node_exporter's textfile collector)",
+    )
+
+    parser.add_argument(
+        "--metrics-interval",
+        type=float,
+        default=15.0,
+        metavar="SECONDS",
+        help="How often --metrics-textfile is rewritten (default: 15)",
+    )
+
+    subparsers = parser.add_subparsers(dest="command", metavar="COMMAND")
+
+    validate_parser = subparsers.add_parser("validate", help="Check a saved index against the index schema")
+    validate_parser.add_argument("index", help="Saved index to validate (JSON, NDJSON, Parquet or sharded .manifest.json)")
+    validate_parser.add_argument(
+        "--max-errors",
+        type=int,
+        default=20,
+        help="Number of errors to list before only counting them (default: 20)",
+    )
+
+    report_parser = subparsers.add_parser("report", help="Show extension, size and age breakdowns of a saved index")
+    report_parser.add_argument("index", help="Saved index to analyse (JSON, NDJSON, Parquet or sharded .manifest.json)")
+    report_parser.add_argument(
+        "--top",
+        type=int,
+        default=20,
+        help="Number of extensions to list before grouping the rest (default: 20)",
+    )
+    report_parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+
+    diff_parser = subparsers.add_parser("diff", help="Show what changed between two saved indexes (sorted by path)")
+    diff_parser.add_argument("old", help="Older saved index (JSON, NDJSON, Parquet or sharded .manifest.json)")
+    diff_parser.add_argument("new", help="Newer saved index (JSON, NDJSON, Parquet or sharded .manifest.json)")
+    diff_parser.add_argument(
+        "--only",
+        type=str,
+        default=None,
+        help="Comma-separated change types to list: added, removed, grown, shrunk, touched",
+    )
+    diff_parser.add_argument("--summary", action="store_true", help="Print only the summary totals")
+    diff_parser.add_argument("--json", action="store_true", help="Print one JSON object per change, then the summary")
+
+    jobs_parser = subparsers.add_parser("jobs", help="Index every root listed in a TOML or JSON job file")
+    jobs_parser.add_argument("jobfile", help="Job file describing roots, exclusions, outputs and concurrency")
+    jobs_parser.add_argument("--dry-run", action="store_true", help="Show the jobs in start order without running them")
+    jobs_parser.add_argument("--json", action="store_true", help="Print one JSON object per finished job")
+
+    du_parser = subparsers.add_parser(
+        "du",
+        help="Show per-directory disk usage of a saved index, like du",
+        description="Show per-directory disk usage of a saved index. On-disk sizes count a hard-linked "
+                    "file once only if the index was made with --dedupe-links (or --follow-symlinks / "
+                    "--one-file-system); otherwise, and always with --apparent-size, every name counts.",
+    )
+    du_parser.add_argument("index", help="Saved index (JSON, NDJSON, Parquet or sharded .manifest.json)")
+    du_parser.add_argument("-d", "--max-depth", type=int, default=None, metavar="N",
+                           help="Only list directories at most N levels below the indexed roots")
+    du_parser.add_argument("--apparent-size", action="store_true",
+                           help="Report file sizes instead of space allocated on disk")
+    du_parser.add_argument("--bytes", action="store_true", help="Print sizes in bytes")
+    du_parser.add_argument("--json", action="store_true", help="Print one JSON object per directory")
+
+    contains_parser = subparsers.add_parser("contains", help="Check whether paths are in a saved index")
+    contains_parser.add_argument("index", help="Saved index (JSON, NDJSON, Parquet or sharded .manifest.json)")
+    contains_parser.add_argument("paths", nargs="*", help="Paths to check; read one per line from stdin when omitted")
+    contains_parser.add_argument("--missing", action="store_true", help="Print only the paths that are not in the index")
+
+    ls_parser = subparsers.add_parser("ls", help="List or export one folder of a saved index without loading all of it")
+    ls_parser.add_argument("index", help="Saved index (JSON, NDJSON, Parquet or sharded .manifest.json)")
+    ls_parser.add_argument("directory", help="Folder to list, as stored in the index")
+    ls_parser.add_argument("-r", "--recursive", action="store_true", help="List every file below the folder")
+    ls_parser.add_argument("--export", type=str, default=None, metavar="FILE",
+                           help="Save the folder's records as a new index (format from the extension)")
+    ls_parser.add_argument("--json", action="store_true", help="Print JSON instead of a table")
+
+    serve_parser = subparsers.add_parser("serve", help="Run a resident daemon that answers queries on saved indexes")
+    serve_parser.add_argument("--socket", type=str, default=None, metavar="PATH",
+                              help="Unix socket to listen on (default: ~/.file_indexer.sock)")
+    serve_parser.add_argument("--port", type=int, default=None,
+                              help="Listen on localhost TCP PORT instead of a Unix socket")
+    serve_parser.add_argument("--cache", type=int, default=4, metavar="N",
+                              help="Number of indexes kept loaded in memory (default: 4)")
+    serve_parser.add_argument("--preload", nargs="*", default=[], metavar="INDEX",
+                              help="Indexes to load before accepting connections")
+
+    query_parser = subparsers.add_parser("query", help="Ask a running daemon about a saved index")
+    query_parser.add_argument("op", choices=["stat", "search", "top", "ls", "subtree", "indexes", "ping", "shutdown"],
+                              help="stat PATH, search PATTERN, top [PREFIX], ls DIR, subtree DIR, "
+                                   "indexes, ping or shutdown")
+    query_parser.add_argument("targets", nargs="*", metavar="TARGET",
+                              help="Paths or patterns; several are sent as one pipelined batch")
+    query_parser.add_argument("--index", type=str, default=None, help="Saved index to query")
+    query_parser.add_argument("--limit", type=int, default=20, help="Maximum results per query (default: 20)")
+    query_parser.add_argument("--socket", type=str, default=None, metavar="PATH", help="Daemon's Unix socket")
+    query_parser.add_argument("--port", type=int, default=None, help="Daemon's localhost TCP port")
+    query_parser.add_argument("--json", action="store_true", help="Print one JSON result per line")
+
     return parser
 
 
+# Options of a one-off scan that watch mode does not support.
+_NOT_WITH_WATCH = (
+    ("dir_timeout", "--dir-timeout"),
+    ("follow_symlinks", "--follow-symlinks"),
+    ("one_file_system", "--one-file-system"),
+    ("dedupe_links", "--dedupe-links"),
+    ("shard_records", "--shard-records"),
+    ("shard_mb", "--shard-mb"),
+    ("resume", "--resume"),
+    ("directory_stats", "--directory-stats"),
+)
+
+
 def parse_args(args: Optional[List[str]] = None) -> argparse.Namespace:
     parser = create_parser()
-    return parser.parse_args(args)
+    parsed = parser.parse_args(args)
+    if parsed.watch:
+        unsupported = [flag for dest, flag in _NOT_WITH_WATCH if getattr(parsed, dest, None)]
+        if unsupported:
+            parser.error(f"--watch cannot be combined with {', '.join(unsupported)}")
+        from src.output import format_for_path
+        if (parsed.format or format_for_path(parsed.output)) != "json":
+            parser.error("--watch only writes JSON; use a .json --output and no --format other than json")
+    return parsed
@@ -4,11 +4,28 @@ import time
 import gc
 import threading
 import time as time_module
-from rich.console import Console
-from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TimeRemainingColumn
-from rich.table import Table
 
-console = Console()
+
+_console = None
+
+
+def get_console():
+    """Return the shared rich Console, importing rich on first use."""
+    global _console
+    if _console is None:
+        from rich.console import Console
+        _console = Console()
+    return _console
+
+
+class _LazyConsole:
+    """Forwards to ``get_console()`` so importing this module does not load rich."""
+
+    def __getattr__(self, name):
+        return getattr(get_console(), name)
+
+
+console = _LazyConsole()
 last_result = None
 
 # Global settings for damage prevention
@@ -18,6 +35,11 @@ SETTINGS = {
     "reduce_priority": True,      # Lower process priority
     "exclude_system_folders": True,# Exclude Windows system folders
     "max_memory_mb": 500,        # Max memory before batch cleanup
+    "dir_timeout": 30,           # Seconds before an unresponsive drive is skipped
+    "checkpoint_interval": 60,   # Seconds between resumable checkpoints (0 = off)
+    "shard_records": 0,          # Records per output segment (0 = single file)
+    "output_format": "json",     # "json", "ndjson" or "parquet" (needs pyarrow)
+    "write_structure": False,    # Also save the full _structure JSON dump (slow for big scans)
     "output_folder": "file_indexer/output",  # Default output folder
 }
 
@@ -109,8 +131,9 @@ def print_menu():
     console.print("[cyan]2.[/cyan] Index all drives")
     console.print("[cyan]3.[/cyan] Index a specific drive")
     console.print("[cyan]4.[/cyan] View last result")
-    console.print("[cyan]5.[/cyan] Settings")
-    console.print("[cyan]6.[/cyan] Exit")
+    console.print("[cyan]5.[/cyan] Analytics report")
+    console.print("[cyan]6.[/cyan] Settings")
+    console.print("[cyan]7.[/cyan] Exit")
     console.print()
     console.print("[bold cyan]Enter your choice: [/bold cyan]", end="")
 
@@ -142,7 +165,12 @@ def show_settings():
         console.print(f"[cyan]3.[/cyan] Reduce process priority: {SETTINGS['reduce_priority']}")
         console.print(f"[cyan]4.[/cyan] Exclude system folders: {SETTINGS['exclude_system_folders']}")
         console.print(f"[cyan]5.[/cyan] Output folder: {SETTINGS['output_folder']}")
-        console.print(f"[cyan]6.[/cyan] Back to main menu")
+        console.print(f"[cyan]6.[/cyan] Directory timeout: {SETTINGS['dir_timeout']}s")
+        console.print(f"[cyan]7.[/cyan] Checkpoint interval: {SETTINGS['checkpoint_interval']}s")
+        console.print(f"[cyan]8.[/cyan] Records per output segment: {SETTINGS['shard_records'] or 'off'}")
+        console.print(f"[cyan]9.[/cyan] Output format: {SETTINGS['output_format']}")
+        console.print(f"[cyan]10.[/cyan] Save full structure dump: {SETTINGS['write_structure']}")
+        console.print(f"[cyan]11.[/cyan] Back to main menu")
         console.print()
         console.print("[bold cyan]Enter choice to modify: [/bold cyan]", end="")
         
@@ -180,6 +208,37 @@ def show_settings():
             except EOFError:
                 pass
         elif choice == "6":
+            try:
+                console.print("\nEnter directory timeout in seconds (1-600): ", end="")
+                new_timeout = int(console.input().strip())
+                if 1 <= new_timeout <= 600:
+                    SETTINGS["dir_timeout"] = new_timeout
+            except (ValueError, EOFError):
+                pass
+        elif choice == "7":
+            try:
+                console.print("\nEnter checkpoint interval in seconds (0 to disable): ", end="")
+                new_interval = int(console.input().strip())
+                if new_interval >= 0:
+                    SETTINGS["checkpoint_interval"] = new_interval
+            except (ValueError, EOFError):
+                pass
+        elif choice == "8":
+            try:
+                console.print("\nEnter records per segment (0 for a single file): ", end="")
+                new_shard = int(console.input().strip())
+                if new_shard >= 0:
+                    SETTINGS["shard_records"] = new_shard
+            except (ValueError, EOFError):
+                pass
+        elif choice == "9":
+            from src.output import parquet_available
+            formats = ["json", "ndjson"] + (["parquet"] if parquet_available() else [])
+            current = SETTINGS["output_format"]
+            SETTINGS["output_format"] = formats[(formats.index(current) + 1) % len(formats)] if current in formats else "json"
+        elif choice == "10":
+            SETTINGS["write_structure"] = not SETTINGS["write_structure"]
+        elif choice == "11":
             return
         else:
             console.print("\n[yellow]Invalid choice.[/yellow]")
@@ -190,6 +249,31 @@ def show_settings():
         time.sleep(0.5)
 
 
+def open_scan_journal(paths, output_path, health):
+    """Offer to resume an interrupted scan and return (journal, resume_state)."""
+    if SETTINGS["checkpoint_interval"] <= 0:
+        return None, None
+    
+    from src.checkpoint import ScanJournal, journal_path_for, load_journal
+    journal_path = journal_path_for(os.path.join(SETTINGS["output_folder"], output_path))
+    resume_state = None
+    
+    if os.path.exists(journal_path):
+        state = load_journal(journal_path)
+        if state is not None and state.roots == list(paths):
+            console.print(f"[yellow]An interrupted scan of these paths was found ({len(state.files):,} files done).[/yellow]")
+            try:
+                answer = console.input("Resume it? (y/n): ").strip().lower()
+            except EOFError:
+                answer = "n"
+            if answer == "y":
+                resume_state = state
+    
+    journal = ScanJournal(journal_path, health, interval=SETTINGS["checkpoint_interval"])
+    journal.open(list(paths), resume_state)
+    return journal, resume_state
+
+
 def index_path(paths, output_path, sort_by="path"):
     global last_result
     
@@ -220,30 +304,86 @@ def index_path(paths, output_path, sort_by="path"):
     console.print("[bold]Scanning files...[/bold]")
     
     from src.indexer import index_directory
+    from src.models import WalkHealth
     
     # Collect ALL files first for consistent results (no filtering during scan)
     all_files = []
-    last_update_time = time_module.time()
-    update_interval = 1.0  # Update every 1 second
-    
-    for path in paths:
+    health = WalkHealth()
+    journal, resume_state = open_scan_journal(paths, output_path, health)
+    if resume_state is not None:
+        all_files = resume_state.files
+        health = resume_state.to_health()
+        journal.health = health
+    
+    # Size the scan from the last scan of these paths, or by sampling them
+    from src.progress import ProgressReporter, ScanHistory, estimate_scan
+    from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn
+    history = ScanHistory(os.path.join(SETTINGS["output_folder"], "scan_history.json"))
+    estimate = estimate_scan(paths, history, dir_timeout=SETTINGS["dir_timeout"])
+    source = "from the last scan" if estimate.source == "history" else "sampled"
+    console.print(f"  [dim]Estimated {estimate.files:,} files ({source})[/dim]")
+    
+    scan_ok = resume_state is None
+    try:
+        with Progress(
+            SpinnerColumn("dots"),
+            TextColumn("[progress.percentage]{task.percentage:>3.0f}%"),
+            BarColumn(bar_width=40),
+            TextColumn("[white]{task.fields[status]}"),
+            TextColumn("[cyan]{task.fields[eta]}"),
+            console=get_console(),
+            auto_refresh=True
+        ) as scan_progress:
+            scan_task = scan_progress.add_task("[white]Scanning...", total=1000, status="Starting...", eta="")
+            
+            def show_progress(p):
+                eta = f"ETA {int(p.eta) // 60}:{int(p.eta) % 60:02d}" if p.eta is not None else ""
+                scan_progress.update(scan_task, completed=int((p.fraction or 0) * 1000),
+                                     status=f"Found {p.files:,} files", eta=eta)
+            
+            reporter = ProgressReporter(show_progress, estimate.files, interval=0.25, files=len(all_files))
+            for path in paths:
+                try:
+                    scan_progress.console.print(f"  Scanning: {path}")
+                    file_count = 0
+                    dirs_before = reporter.dirs
+                    started = time_module.monotonic()
+                    for metadata in index_directory(
+                        path,
+                        dir_timeout=SETTINGS["dir_timeout"],
+                        health=health,
+                        resume=resume_state.frontier if resume_state else None,
+                        on_directory=journal.on_directory if journal else None,
+                        progress=reporter,
+                    ):
+                        all_files.append(metadata)
+                        if journal:
+                            journal.record(metadata)
+                        file_count += 1
+                    if scan_ok and path not in health.quarantined_roots:
+                        history.record(path, file_count, reporter.dirs - dirs_before, time_module.monotonic() - started)
+                except Exception as e:
+                    scan_ok = False
+                    scan_progress.console.print(f"[red]  Error scanning {path}: {e}[/red]")
+            reporter.finish()
+            scan_progress.update(scan_task, completed=1000, status=f"Found {len(all_files):,} files", eta="")
+    except KeyboardInterrupt:
+        if journal:
+            journal.interrupted()
+        console.print("\n[yellow]Scan interrupted. Index the same paths again to resume from the last checkpoint.[/yellow]")
+        return
+    if journal:
+        journal.checkpoint()
+    if scan_ok:
         try:
-            console.print(f"  Scanning: {path}")
-            file_count = 0
-            for metadata in index_directory(path):
-                all_files.append(metadata)
-                file_count += 1
-                
-                # Time-based update to console (every 1 second)
-                current_time = time_module.time()
-                if current_time - last_update_time >= update_interval:
-                    console.print(f"    [cyan]Found {len(all_files):,} files...[/cyan]", end="\r")
-                    last_update_time = current_time
-        except Exception as e:
-            console.print(f"[red]  Error scanning {path}: {e}[/red]")
+            history.save()
+        except OSError as e:
+            console.print(f"[dim]Could not save scan history: {e}[/dim]")
     
-    # Clear the "Found X files" line
-    console.print(" " * 50, end="\r")
+    for root in health.quarantined_roots:
+        console.print(f"[yellow]Warning: {root} stopped responding and was only partially indexed.[/yellow]")
+    if health.error_count:
+        console.print(f"[dim]{health.error_count:,} paths could not be read[/dim]")
     
     # Now filter out system folders AFTER scanning is complete for consistent results
     if SETTINGS["exclude_system_folders"]:
@@ -276,13 +416,17 @@ def index_path(paths, output_path, sort_by="path"):
     batch_size = SETTINGS["batch_size"]
     batch_delay = SETTINGS["batch_delay"]
     
+    from src.aggregate import DirectoryAggregator
+    from rich.progress import TimeRemainingColumn
+    aggregator = DirectoryAggregator(paths)
+    
     with Progress(
         SpinnerColumn("dots"),
         TextColumn("[progress.percentage]{task.percentage:>3.0f}%"),
         BarColumn(bar_width=40),
         TextColumn("[white]{task.fields[status]}"),
         TimeRemainingColumn(),
-        console=console,
+        console=get_console(),
         auto_refresh=True
     ) as progress:
         
@@ -295,6 +439,7 @@ def index_path(paths, output_path, sort_by="path"):
         # Process files with progress updates and batch throttling
         for i, metadata in enumerate(all_files, 1):
             files.append(metadata)
+            aggregator.add(metadata)
             
             # Batch throttling to prevent disk saturation
             if i % batch_size == 0:
@@ -322,21 +467,35 @@ def index_path(paths, output_path, sort_by="path"):
             from src.output import sort_files, create_index_result, save_with_duplicate_check
             console.print("[dim]Sorting results...[/dim]")
             sorted_files = sort_files(files, sort_by)
-            result = create_index_result(sorted_files, paths)
+            result = create_index_result(sorted_files, paths, health)
             
             # Get base name from output path
             base_name = os.path.splitext(os.path.basename(output_path))[0]
             
             # Save files with duplicate check
             console.print("[dim]Saving files...[/dim]")
-            saved_files = save_with_duplicate_check(result, base_name, indent=2, output_dir=SETTINGS["output_folder"])
+            saved_files = save_with_duplicate_check(
+                result,
+                base_name,
+                indent=2,
+                output_dir=SETTINGS["output_folder"],
+                directory_stats=aggregator.finish(),
+                shard_records=SETTINGS["shard_records"] or None,
+                output_format=SETTINGS["output_format"],
+                write_structure=SETTINGS["write_structure"],
+            )
             
             last_result = result
+            if journal:
+                journal.discard()
             
             console.print(f"[green]Main index saved to:[/green]")
             console.print(f"    {saved_files['index_file']}")
-            console.print(f"[green]Directory structure saved to:[/green]")
-            console.print(f"    {saved_files['structure_file']}")
+            if "structure_file" in saved_files:
+                console.print(f"[green]Directory structure saved to:[/green]")
+                console.print(f"    {saved_files['structure_file']}")
+            console.print(f"[green]Directory stats saved to:[/green]")
+            console.print(f"    {saved_files['directory_stats_file']}")
             break
             
         except FileExistsError as e:
@@ -473,6 +632,85 @@ def index_specific_drive():
     index_path([selected_drive], output_path)
 
 
+def find_saved_indexes():
+    """Return (filename, filepath) for each saved index, newest first."""
+    output_folder = SETTINGS["output_folder"]
+    if not os.path.exists(output_folder):
+        return []
+    
+    # Find all JSON, NDJSON and Parquet indexes (exclude structure, directory stats, segment, summary and path index files)
+    json_files = []
+    for f in os.listdir(output_folder):
+        if f.endswith('.json') and '_structure' not in f and '_directory_stats' not in f and '.part-' not in f and not f.endswith(('.summary.json', '.pathidx.json')) and f != 'scan_history.json':
+            json_files.append((f, os.path.join(output_folder, f)))
+        elif f.endswith(('.ndjson', '.jsonl', '.parquet')):
+            json_files.append((f, os.path.join(output_folder, f)))
+    
+    # Sort by modification time (newest first)
+    json_files.sort(key=lambda x: os.path.getmtime(x[1]), reverse=True)
+    return json_files
+
+
+def browse_tree(filepath, files_shown=10):
+    """
+    Interactive folder tree of a saved index with rollup sizes. Folders are
+    read only when opened, from the directory stats saved with the index when
+    available, otherwise through the index's path-prefix offset table.
+    """
+    from src.tree import LazyTree
+    
+    try:
+        tree = LazyTree.open(filepath)
+    except (OSError, ValueError) as e:
+        console.print(f"[red]Error reading index: {e}[/red]")
+        time.sleep(1)
+        return
+    if len(tree.roots) == 1:
+        tree.expand(tree.roots[0])
+    
+    while True:
+        clear_screen()
+        console.print(f"[bold cyan]TREE: {os.path.basename(filepath)}[/bold cyan]")
+        console.print("-" * 50)
+        folders = list(tree.visible())
+        for i, node in enumerate(folders, 1):
+            indent = "    " * node.depth
+            marker = "-" if node.expanded else "+"
+            size = format_size(node.total_size) if node.total_size is not None else "?"
+            count = f"{node.file_count:,} files" if node.file_count is not None else "not read yet"
+            console.print(f"[cyan]{i:>4}.[/cyan] {indent}{marker} {node.name}{os.sep}  [dim]{size} in {count}[/dim]")
+            if node.expanded and node.files:
+                for f in node.files[:files_shown]:
+                    console.print(f"       {indent}    {f['name']}  [dim]{format_size(f['size'])}[/dim]")
+                if len(node.files) > files_shown:
+                    console.print(f"[dim]       {indent}    ... and {len(node.files) - files_shown:,} more files[/dim]")
+        if not folders:
+            console.print("[yellow]No folders found in this index.[/yellow]")
+        
+        console.print()
+        console.print("[bold cyan]Number to open/close a folder, C to close all, Enter to go back: [/bold cyan]", end="")
+        try:
+            choice = console.input().strip()
+        except EOFError:
+            return
+        if not choice:
+            return
+        if choice.lower() == 'c':
+            tree.collapse_all()
+            continue
+        try:
+            node = folders[int(choice) - 1]
+        except (ValueError, IndexError):
+            console.print("[red]Invalid selection.[/red]")
+            time.sleep(1)
+            continue
+        try:
+            tree.toggle(node)
+        except (OSError, ValueError) as e:
+            console.print(f"[red]Error reading index: {e}[/red]")
+            time.sleep(1)
+
+
 def view_last_result():
     """View saved index results from the output folder."""
     import json
@@ -490,12 +728,7 @@ def view_last_result():
             pass
         return
     
-    # Find all JSON files (exclude structure files)
-    json_files = []
-    for f in os.listdir(output_folder):
-        if f.endswith('.json') and '_structure' not in f:
-            filepath = os.path.join(output_folder, f)
-            json_files.append((f, filepath))
+    json_files = find_saved_indexes()
     
     if not json_files:
         console.print("[yellow]No index files found in output folder.[/yellow]")
@@ -505,9 +738,6 @@ def view_last_result():
             pass
         return
     
-    # Sort by modification time (newest first)
-    json_files.sort(key=lambda x: os.path.getmtime(x[1]), reverse=True)
-    
     while True:
         clear_screen()
         console.print("[bold cyan]VIEW SAVED RESULTS[/bold cyan]")
@@ -550,16 +780,18 @@ def view_last_result():
         filename, filepath = json_files[idx]
         
         try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            # Only the summary and the first records are read; the tree browser reads the rest on demand
+            from itertools import islice
+            from src.reader import iter_record_dicts, read_summary
+            summary = read_summary(filepath)
+            first_files = list(islice(iter_record_dicts(filepath), 15))
             
             clear_screen()
             console.print(f"[bold cyan]VIEWING: {filename}[/bold cyan]")
             console.print("-" * 50)
             
             # Display summary
-            if 'summary' in data:
-                summary = data['summary']
+            if summary:
                 console.print("\n[bold]Summary:[/bold]")
                 console.print(f"  [green]Total files:[/green] {summary.get('total_files', 'N/A'):,}")
                 console.print(f"  [green]Total size:[/green] {format_size(summary.get('total_size', 0))}")
@@ -580,10 +812,9 @@ def view_last_result():
                     console.print(f"  [green]Timestamp:[/green] {timestamp}")
             
             # Display first 15 files
-            if 'files' in data:
-                files = data['files']
+            if first_files:
                 console.print(f"\n[bold]First 15 files:[/bold]")
-                for i, f in enumerate(files[:15], 1):
+                for i, f in enumerate(first_files, 1):
                     name = f.get('name', 'Unknown')
                     path = f.get('path', '')
                     size = f.get('size', 0)
@@ -591,12 +822,14 @@ def view_last_result():
                     console.print(f"      [dim]Path: {path}[/dim]")
                     console.print(f"      [dim]Size: {format_size(size)}[/dim]")
                 
-                if len(files) > 15:
-                    console.print(f"\n[dim]  ... and {len(files) - 15:,} more files[/dim]")
+                total_files = (summary or {}).get('total_files', 0)
+                if total_files > len(first_files):
+                    console.print(f"\n[dim]  ... and {total_files - len(first_files):,} more files[/dim]")
             
-            console.print("\n[bold cyan]Press Enter to continue...[/bold cyan]")
+            console.print("\n[bold cyan]Press T to browse the folder tree, or Enter to continue...[/bold cyan]", end="")
             try:
-                console.input()
+                if console.input().strip().lower() == 't':
+                    browse_tree(filepath)
             except EOFError:
                 pass
                 
@@ -608,6 +841,69 @@ def view_last_result():
             time.sleep(1)
 
 
+def print_buckets(title, buckets, total_size):
+    from rich.table import Table
+    table = Table(title=title, title_justify="left", header_style="bold cyan")
+    table.add_column(title.split()[0])
+    table.add_column("Files", justify="right")
+    table.add_column("Size", justify="right")
+    table.add_column("Share", justify="right")
+    for bucket in buckets:
+        share = bucket.total_size / total_size * 100 if total_size else 0.0
+        table.add_row(bucket.label, f"{bucket.count:,}", format_size(bucket.total_size), f"{share:.1f}%")
+    console.print(table)
+
+
+def show_analytics():
+    """Show extension, size and age breakdowns for a saved index."""
+    json_files = find_saved_indexes()
+    if not json_files:
+        console.print("[yellow]No index files found in output folder.[/yellow]")
+        try:
+            console.input("\nPress Enter to continue...")
+        except EOFError:
+            pass
+        return
+    
+    clear_screen()
+    console.print("[bold cyan]ANALYTICS REPORT[/bold cyan]")
+    console.print("-" * 50)
+    for i, (filename, _) in enumerate(json_files, 1):
+        console.print(f"[cyan]{i}.[/cyan] {filename}")
+    console.print()
+    console.print("[bold cyan]Select file to analyse: [/bold cyan]", end="")
+    
+    try:
+        idx = int(console.input().strip()) - 1
+        if idx < 0 or idx >= len(json_files):
+            raise ValueError
+    except (ValueError, EOFError):
+        return
+    
+    filename, filepath = json_files[idx]
+    try:
+        from src.analytics import Columns, compute_report
+        console.print("[dim]Analysing...[/dim]")
+        report = compute_report(Columns.from_index(filepath))
+    except (OSError, ValueError) as e:
+        console.print(f"[red]Error loading file: {e}[/red]")
+        time.sleep(1)
+        return
+    
+    clear_screen()
+    console.print(f"[bold cyan]ANALYTICS: {filename}[/bold cyan]")
+    console.print(f"{report.total_files:,} files, {format_size(report.total_size)}\n")
+    print_buckets("Extension breakdown", report.by_extension, report.total_size)
+    print_buckets("Size buckets", report.by_size, report.total_size)
+    print_buckets("Age buckets (last modified)", report.by_age, report.total_size)
+    
+    console.print("\n[bold cyan]Press Enter to continue...[/bold cyan]")
+    try:
+        console.input()
+    except EOFError:
+        pass
+
+
 def main():
     while True:
         print_menu()
@@ -626,8 +922,10 @@ def main():
         elif choice == '4':
             view_last_result()
         elif choice == '5':
-            show_settings()
+            show_analytics()
         elif choice == '6':
+            show_settings()
+        elif choice == '7':
             console.print("\n[bold green]Goodbye![/bold green]")
             break
         else:
@@ -1,20 +1,387 @@
+import os
 import sys
+from contextlib import ExitStack, nullcontext
 from typing import List
 
 from cli import parse_args
-from src.indexer import index_directory
-from src.output import create_index_result, save_to_file, to_json
+
+
+def run_validate(args) -> None:
+    from src.schemas import validate_index_file
+    report = validate_index_file(args.index, max_errors=args.max_errors)
+    for error in report.errors:
+        print(error)
+    if report.error_count > len(report.errors):
+        print(f"... and {report.error_count - len(report.errors):,} more errors")
+    status = "valid" if report.valid else f"INVALID ({report.error_count:,} errors)"
+    print(f"{args.index}: {status} - {report.records:,} records in {report.elapsed:.2f}s "
+          f"({report.records_per_second:,.0f} records/s)")
+    sys.exit(0 if report.valid else 1)
+
+
+def _format_size(size_bytes: float) -> str:
+    for unit in ["B", "KB", "MB", "GB", "TB"]:
+        if size_bytes < 1024:
+            return f"{size_bytes:.2f} {unit}"
+        size_bytes /= 1024
+    return f"{size_bytes:.2f} PB"
+
+
+def run_report(args) -> None:
+    import json
+    from src.analytics import Columns, compute_report
+    report = compute_report(Columns.from_index(args.index), top_n=args.top)
+    if args.json:
+        print(json.dumps(report.to_dict(), indent=2))
+        return
+
+    print(f"{args.index}: {report.total_files:,} files, {_format_size(report.total_size)}")
+    for title, buckets in (("Extension", report.by_extension), ("Size", report.by_size), ("Age", report.by_age)):
+        print(f"\n{title:<16} {'Files':>12} {'Size':>12} {'Share':>7}")
+        for bucket in buckets:
+            share = bucket.total_size / report.total_size * 100 if report.total_size else 0.0
+            print(f"{bucket.label:<16} {bucket.count:>12,} {_format_size(bucket.total_size):>12} {share:>6.1f}%")
+
+
+_DIFF_MARKERS = {"added": "+", "removed": "-", "grown": ">", "shrunk": "<", "touched": "~"}
+
+
+def run_diff(args) -> None:
+    import json
+    from src.diff import CHANGE_TYPES, diff_indexes
+    only = set(args.only.split(",")) if args.only else set(CHANGE_TYPES)
+    unknown = only - set(CHANGE_TYPES)
+    if unknown:
+        print(f"Unknown change types: {', '.join(sorted(unknown))}", file=sys.stderr)
+        sys.exit(2)
+
+    diff = diff_indexes(args.old, args.new)
+    try:
+        for entry in diff:
+            if args.summary or entry.change not in only:
+                continue
+            if args.json:
+                print(json.dumps(entry.to_dict()))
+            elif entry.change in ("added", "removed"):
+                size = entry.new_size if entry.change == "added" else entry.old_size
+                print(f"{_DIFF_MARKERS[entry.change]} {entry.path} ({_format_size(size if size is not None else 0)})")
+            else:
+                sign = "+" if entry.size_delta >= 0 else "-"
+                print(f"{_DIFF_MARKERS[entry.change]} {entry.path} ({sign}{_format_size(abs(entry.size_delta))})")
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    summary = diff.summary
+    if args.json:
+        print(json.dumps({"summary": summary.to_dict()}))
+        return
+    counts = ", ".join(f"{summary.counts[c]:,} {c}" for c in CHANGE_TYPES)
+    print(f"\n{counts}, {summary.unchanged:,} unchanged")
+    sign = "+" if summary.net_change >= 0 else "-"
+    print(f"+{_format_size(summary.bytes_added)} / -{_format_size(summary.bytes_removed)} "
+          f"(net {sign}{_format_size(abs(summary.net_change))})")
+
+
+def run_jobs(args) -> None:
+    import json
+    from src.jobs import load_history, load_job_file, plan, run_jobs as run_job_file
+    try:
+        job_file = load_job_file(args.jobfile)
+    except (OSError, ValueError) as e:
+        print(f"Error: {args.jobfile}: {e}", file=sys.stderr)
+        sys.exit(2)
+
+    if args.dry_run:
+        for job, estimate in plan(job_file, load_history(job_file.history_path)):
+            expected = f"~{estimate:.1f}s" if estimate is not None else "no history"
+            print(f"{job.name:<20} {job.path}  ->  {job.output}  ({expected})")
+        return
+
+    def report(result) -> None:
+        if args.json:
+            print(json.dumps(result.to_dict()), flush=True)
+        elif result.ok:
+            note = " (partial)" if result.partial else ""
+            print(f"{result.job.name}: {result.files:,} files, {_format_size(result.total_size)} "
+                  f"in {result.seconds:.1f}s -> {result.output}{note}", flush=True)
+        else:
+            print(f"{result.job.name}: FAILED after {result.attempts} attempts: {result.error}", flush=True)
+
+    results = run_job_file(job_file, on_result=report)
+    sys.exit(0 if all(r.ok for r in results) else 1)
+
+
+def run_serve(args) -> None:
+    import logging
+    from src.daemon import serve
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    try:
+        serve(
+            socket_path=args.socket,
+            port=args.port,
+            capacity=args.cache,
+            preload=args.preload,
+        )
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+_QUERY_TARGET = {"stat": "path", "search": "pattern", "top": "prefix", "ls": "path", "subtree": "path"}
+
+
+def _print_query_result(op: str, result) -> None:
+    if result is None:
+        print("(not in index)")
+    elif op in ("search", "top"):
+        for record in result:
+            print(f"{_format_size(record['size']):>12}  {record['path']}")
+    elif op == "subtree":
+        for record in result["files"]:
+            print(f"{_format_size(record['size']):>12}  {record['path']}")
+        if result["total"] > len(result["files"]):
+            print(f"... {result['total'] - len(result['files']):,} more")
+    elif op == "ls":
+        for entry in sorted(result["dirs"], key=lambda d: -d["size"]):
+            print(f"{_format_size(entry['size']):>12}  {entry['path']}{os.sep}  ({entry['files']:,} files)")
+        for record in result["files"]:
+            print(f"{_format_size(record['size']):>12}  {record['path']}")
+    elif op == "stat" and result.get("is_dir"):
+        print(f"{result['path']}: directory, {result['files']:,} files, {_format_size(result['size'])}")
+    elif op == "stat":
+        print(f"{result['path']}: {_format_size(result['size'])}, modified {result['modified_time']}")
+    elif op == "indexes":
+        for entry in result:
+            print(f"{entry['files']:>12,}  {entry['index']}")
+    else:
+        print(result)
+
+
+def run_query(args) -> None:
+    import json
+    from src.daemon import DaemonClient, DaemonError
+    base = {"op": args.op}
+    if args.index:
+        base["index"] = os.path.abspath(args.index)
+    elif args.op in _QUERY_TARGET:
+        print(f"Error: query {args.op} needs --index", file=sys.stderr)
+        sys.exit(2)
+    if args.op in ("search", "subtree"):
+        base["limit"] = args.limit
+    if args.op == "top":
+        base["n"] = args.limit
+
+    key = _QUERY_TARGET.get(args.op)
+    if key and args.targets:
+        requests = [{**base, key: target} for target in args.targets]
+    elif key and args.op != "top":
+        print(f"Error: query {args.op} needs a {key}", file=sys.stderr)
+        sys.exit(2)
+    else:
+        requests = [base]
+
+    try:
+        with DaemonClient(socket_path=args.socket, port=args.port) as client:
+            results = client.pipeline(requests)
+    except DaemonError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    for request, result in zip(requests, results):
+        if args.json:
+            print(json.dumps(result))
+            continue
+        if len(requests) > 1:
+            print(f"== {request[key]}")
+        _print_query_result(args.op, result)
+
+
+def run_contains(args) -> None:
+    from src.membership import build_membership, open_membership, Membership
+    try:
+        members = open_membership(args.index)
+        if members is None:
+            print(f"No membership file for {args.index}; building one", file=sys.stderr)
+            members = Membership(build_membership(args.index))
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    paths = args.paths or (line.rstrip("\r\n") for line in sys.stdin)
+    all_found = True
+    with members:
+        for path in paths:
+            found = path in members
+            all_found = all_found and found
+            if args.missing:
+                if not found:
+                    print(path)
+            else:
+                print(f"{'yes' if found else 'no'}\t{path}")
+    if not all_found:
+        sys.exit(1)
+
+
+def run_du(args) -> None:
+    import json
+    from src.aggregate import disk_usage
+    from src.reader import iter_record_dicts, read_summary
+    try:
+        roots = (read_summary(args.index) or {}).get("indexed_paths", [])
+        report = disk_usage(iter_record_dicts(args.index), roots)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    def depth(path: str) -> int:
+        for root in roots:
+            if path == root or path == root.rstrip(os.sep):
+                return 0
+            prefix = root.rstrip(os.sep) + os.sep
+            if path.startswith(prefix):
+                return path[len(prefix):].count(os.sep) + 1
+        return 0
+
+    for path in sorted(report.directories):
+        stats = report.directories[path]
+        if args.max_depth is not None and depth(path) > args.max_depth:
+            continue
+        if args.json:
+            print(json.dumps(stats.to_dict()))
+            continue
+        size = stats.total_size if args.apparent_size else stats.allocated_size
+        print(f"{size if args.bytes else _format_size(size)}\t{path}")
+
+
+def run_ls(args) -> None:
+    import json
+    from src.pathindex import export_subtree, iter_subtree, list_children
+    try:
+        if args.export:
+            saved = export_subtree(args.index, args.directory, args.export)
+            print(f"Exported {args.directory} to: {saved['index_file']}")
+            return
+        if args.recursive:
+            for record in iter_subtree(args.index, args.directory):
+                print(json.dumps(record) if args.json else f"{_format_size(record['size']):>12}  {record['path']}")
+            return
+        listing = list_children(iter_subtree(args.index, args.directory), args.directory)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    if args.json:
+        print(json.dumps(listing, indent=2))
+    else:
+        _print_query_result("ls", listing)
+
+
+def write_output(args, result, output_path: str, output_format: str, sort_by: str) -> str:
+    """Save the sorted index in the requested format; returns the path written."""
+    from src.output import save_index
+    shard_bytes = int(args.shard_mb * 1024 * 1024) if args.shard_mb else None
+    saved = save_index(result, output_path, output_format, sort_by, args.shard_records, shard_bytes,
+                       workers=args.encode_workers)
+    if "summary_file" in saved:
+        print(f"Summary saved to: {saved['summary_file']}")
+    if "path_index_file" in saved:
+        print(f"Path index saved to: {saved['path_index_file']}")
+    print(f"Membership file saved to: {saved['membership_file']}")
+    if "segments" in saved:
+        print(f"Wrote {saved['segments']} segments")
+    return saved["index_file"]
+
+
+def _untimed(name: str):
+    return nullcontext()
+
+
+def _phase_timer(*recorders):
+    """Return a ``timed(name)`` context factory feeding every recorder given (None entries ignored)."""
+    active = [r for r in recorders if r is not None]
+    if not active:
+        return _untimed
+    if len(active) == 1:
+        return active[0].phase
+
+    def timed(name: str):
+        stack = ExitStack()
+        for recorder in active:
+            stack.enter_context(recorder.phase(name))
+        return stack
+
+    return timed
+
+
+def start_metrics(args):
+    """Return ``(metrics, server)`` when a metrics option is set, otherwise ``(None, None)``."""
+    if args.metrics_port is None and not args.metrics_textfile:
+        return None, None
+    from src.metrics import IndexMetrics, MetricsServer
+    metrics = IndexMetrics()
+    server = MetricsServer(
+        metrics,
+        port=args.metrics_port,
+        host=args.metrics_host,
+        textfile=args.metrics_textfile,
+        interval=args.metrics_interval,
+    )
+    if args.metrics_port is not None:
+        print(f"Metrics at http://{args.metrics_host}:{server.port}/metrics", file=sys.stderr)
+    return metrics, server
 
 
 def main() -> None:
     args = parse_args()
 
+    if args.command == "validate":
+        run_validate(args)
+        return
+    if args.command == "report":
+        run_report(args)
+        return
+    if args.command == "diff":
+        run_diff(args)
+        return
+    if args.command == "jobs":
+        run_jobs(args)
+        return
+    if args.command == "contains":
+        run_contains(args)
+        return
+    if args.command == "du":
+        run_du(args)
+        return
+    if args.command == "ls":
+        run_ls(args)
+        return
+    if args.command == "serve":
+        run_serve(args)
+        return
+    if args.command == "query":
+        run_query(args)
+        return
+
+    from src.indexer import index_directory
+    from src.models import WalkHealth
+    from src.output import create_index_result, to_json
+
     root_path = args.path
     output_path = args.output
     sort_by = args.sort
 
     files: List = []
     indexed_paths: List[str] = []
+    output_format = args.format
+    if output_format is None:
+        from src.output import format_for_path
+        output_format = format_for_path(output_path)
+    if output_format == "parquet":
+        from src.output import parquet_available
+        if not output_path:
+            print("Error: --format parquet requires --output", file=sys.stderr)
+            sys.exit(2)
+        if not parquet_available():
+            print("Error: Parquet export needs pyarrow (pip install pyarrow)", file=sys.stderr)
+            sys.exit(2)
 
     if root_path in ("*", "all"):
         from src.indexer import get_windows_drives
@@ -22,22 +389,163 @@ def main() -> None:
     else:
         indexed_paths = [root_path]
 
-    for file_metadata in index_directory(root_path):
-        files.append(file_metadata)
+    if args.watch:
+        if not output_path:
+            print("--watch requires --output", file=sys.stderr)
+            sys.exit(2)
+        from src.watcher import watch
+        metrics, metrics_server = start_metrics(args)
+        print(f"Watching {', '.join(indexed_paths)} -> {output_path} (Ctrl-C to stop)")
+        try:
+            watch(
+                indexed_paths,
+                output_path,
+                debounce=args.debounce,
+                use_polling=args.poll is not None,
+                poll_interval=args.poll or 2.0,
+                on_update=lambda changed, live: print(f"Updated {changed:,} records ({len(live.records):,} total)"),
+                metrics=metrics,
+            )
+        finally:
+            if metrics_server:
+                metrics_server.close()
+        return
+
+    stats = None
+    if args.profile or args.stats_json:
+        from src.profiling import RunStats
+        stats = RunStats(profile=args.profile)
+        stats.start()
+    metrics, metrics_server = start_metrics(args)
+    timed = _phase_timer(stats, metrics)
+
+    health = WalkHealth()
+    resume_state = None
+    journal = None
+    if args.resume and not output_path:
+        print("--resume requires --output", file=sys.stderr)
+        sys.exit(2)
+    checkpoint_interval = args.checkpoint_interval
+    if checkpoint_interval is None:
+        # Only whole-machine scans checkpoint unless asked to; --resume implies it.
+        checkpoint_interval = 60.0 if root_path in ("*", "all") or args.resume else 0
+    if output_path and checkpoint_interval > 0:
+        from src.checkpoint import ScanJournal, journal_path_for, load_journal
+        journal_path = journal_path_for(output_path)
+        if args.resume:
+            resume_state = load_journal(journal_path)
+            if resume_state is None:
+                print(f"No checkpoint found at {journal_path}; starting a new scan", file=sys.stderr)
+            elif resume_state.roots != indexed_paths:
+                print(f"Checkpoint {journal_path} is for {', '.join(resume_state.roots)}, not {root_path}; "
+                      f"starting a new scan", file=sys.stderr)
+                resume_state = None
+            else:
+                files = resume_state.files
+                health = resume_state.to_health()
+                print(f"Resuming scan with {len(files):,} files already indexed", file=sys.stderr)
+        elif os.path.exists(journal_path):
+            print(f"Warning: replacing the checkpoint an earlier scan left at {journal_path} "
+                  f"(use --resume to continue it instead)", file=sys.stderr)
+        journal = ScanJournal(journal_path, health, interval=checkpoint_interval)
+        journal.open(indexed_paths, resume_state)
+
+    aggregator = None
+    if args.directory_stats and output_path:
+        from src.aggregate import DirectoryAggregator
+        aggregator = DirectoryAggregator(indexed_paths, top_n=args.top)
+        aggregator.add_all(files)
+
+    if metrics:
+        metrics.health = health
+    if journal and metrics:
+        def on_directory(root, pending):
+            journal.on_directory(root, pending)
+            metrics.on_directory(root, pending)
+    else:
+        on_directory = journal.on_directory if journal else metrics.on_directory if metrics else None
+
+    records = index_directory(
+        root_path,
+        dir_timeout=args.dir_timeout,
+        health=health,
+        resume=resume_state.frontier if resume_state else None,
+        on_directory=on_directory,
+        follow_symlinks=args.follow_symlinks,
+        one_filesystem=args.one_file_system,
+        dedupe_links=args.dedupe_links,
+    )
+    if metrics:
+        records = metrics.observe(records)
+    if stats:
+        from src.indexer import resolve_roots
+        records = stats.count_roots(records, resolve_roots(root_path))
+    try:
+        with timed("walk"):
+            for file_metadata in records:
+                files.append(file_metadata)
+                if journal:
+                    journal.record(file_metadata)
+                if aggregator:
+                    aggregator.add(file_metadata)
+    except KeyboardInterrupt:
+        if journal:
+            journal.interrupted()
+            print("\nInterrupted; rerun with --resume to continue from the last checkpoint", file=sys.stderr)
+            sys.exit(130)
+        raise
+    if journal:
+        with timed("checkpoint"):
+            journal.checkpoint()
 
-    result = create_index_result(files, indexed_paths)
+    result = create_index_result(files, indexed_paths, health)
+    for root in health.quarantined_roots:
+        print(f"Warning: {root} stopped responding and was only partially indexed", file=sys.stderr)
+    if result.summary.deduplicated_size is not None:
+        print(f"Apparent size {_format_size(result.summary.total_size)}, "
+              f"{_format_size(result.summary.deduplicated_size)} with links counted once "
+              f"({result.summary.duplicate_files:,} repeated files, {health.directory_loops:,} directories reached twice)",
+              file=sys.stderr)
 
     if output_path:
         from src.output import sort_files
-        sorted_files = sort_files(result.files, sort_by)
+        with timed("sort"):
+            sorted_files = sort_files(result.files, sort_by)
         from src.models import IndexResult
         result = IndexResult(files=sorted_files, summary=result.summary)
-        save_to_file(result, output_path)
+        with timed("write"):
+            output_path = write_output(args, result, output_path, output_format, sort_by)
+        if journal:
+            journal.discard()
         print(f"Index saved to: {output_path}")
+        if aggregator:
+            from src.aggregate import write_directory_stats
+            stats_path = f"{os.path.splitext(output_path)[0]}_directory_stats.json"
+            if os.path.exists(stats_path):
+                raise FileExistsError(f"File already exists: {stats_path}")
+            with timed("directory_stats"), open(stats_path, "w", encoding="utf-8") as f:
+                write_directory_stats(aggregator.finish(), f)
+            print(f"Directory stats saved to: {stats_path}")
     else:
-        json_output = to_json(result, sort_by=sort_by)
-        print(json_output)
+        with timed("write"):
+            if output_format == "ndjson":
+                from src.ndjson import write_ndjson
+                write_ndjson(result, sys.stdout, sort_by=sort_by)
+            else:
+                json_output = to_json(result, sort_by=sort_by)
+                print(json_output)
 
+    if metrics_server:
+        metrics_server.close()
+    if stats:
+        stats.stop()
+        if args.stats_json:
+            with open(args.stats_json, "w", encoding="utf-8") as f:
+                stats.write_json(f, health)
+            if args.profile in ("cpu", "all"):
+                stats.dump_profile(f"{os.path.splitext(args.stats_json)[0]}.prof")
+        if args.profile:
+            stats.print_report(sys.stderr, health)
 
 if __name__ == "__main__":
     main()
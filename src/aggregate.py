@@ -0,0 +1,162 @@
+"""
+Per-directory rollups computed while records stream out of the indexer.
+
+Records arrive grouped by directory, so ``add`` only touches the record's own
+directory (one dict lookup) and a bounded heap for the largest files. The
+recursive totals are folded up the tree once, deepest directories first, when
+``finish`` is called.
+"""
+import heapq
+import json
+import os
+import re
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, TextIO, Tuple
+
+from .models import FileMetadata
+
+
+@dataclass
+class DirectoryStats:
+    path: str
+    total_size: int = 0
+    file_count: int = 0
+    newest_mtime: Optional[datetime] = None
+    # On-disk size; files without an allocated_size count at their apparent size.
+    allocated_size: int = 0
+
+    def to_dict(self) -> dict:
+        return {
+            "path": self.path,
+            "total_size": self.total_size,
+            "allocated_size": self.allocated_size,
+            "file_count": self.file_count,
+            "newest_mtime": self.newest_mtime.isoformat() if self.newest_mtime else None,
+        }
+
+
+@dataclass
+class DirectoryReport:
+    directories: Dict[str, DirectoryStats] = field(default_factory=dict)
+    largest_files: List[Tuple[int, str]] = field(default_factory=list)
+    largest_directories: List[DirectoryStats] = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        return {
+            "largest_files": [{"path": path, "size": size} for size, path in self.largest_files],
+            "largest_directories": [d.to_dict() for d in self.largest_directories],
+            "directories": [self.directories[path].to_dict() for path in sorted(self.directories)],
+        }
+
+
+class DirectoryAggregator:
+    """
+    Accumulate recursive size, on-disk size, file count and newest mtime per directory.
+
+    ``roots`` bounds the rollup: totals are not propagated above an indexed
+    root. Without roots they climb to the top of each path.
+    """
+
+    def __init__(self, roots: Iterable[str] = (), top_n: int = 20):
+        self.top_n = top_n
+        self._roots = {os.path.normpath(r) for r in roots}
+        self._direct: Dict[str, list] = {}
+        self._largest: List[Tuple[int, str]] = []
+
+    def add(self, metadata: FileMetadata) -> None:
+        dirpath = os.path.dirname(metadata.path)
+        allocated = metadata.allocated_size if metadata.allocated_size is not None else metadata.size
+        entry = self._direct.get(dirpath)
+        if entry is None:
+            self._direct[dirpath] = [metadata.size, 1, metadata.modified_time, allocated]
+        else:
+            entry[0] += metadata.size
+            entry[1] += 1
+            if metadata.modified_time > entry[2]:
+                entry[2] = metadata.modified_time
+            entry[3] += allocated
+
+        if len(self._largest) < self.top_n:
+            heapq.heappush(self._largest, (metadata.size, metadata.path))
+        elif metadata.size > self._largest[0][0]:
+            heapq.heapreplace(self._largest, (metadata.size, metadata.path))
+
+    def add_all(self, files: Iterable[FileMetadata]) -> None:
+        for metadata in files:
+            self.add(metadata)
+
+    def _parent(self, dirpath: str) -> Optional[str]:
+        if os.path.normpath(dirpath) in self._roots:
+            return None
+        parent = os.path.dirname(dirpath)
+        return parent if parent and parent != dirpath else None
+
+    def finish(self) -> DirectoryReport:
+        stats: Dict[str, DirectoryStats] = {}
+        for dirpath, (size, count, newest, allocated) in self._direct.items():
+            stats[dirpath] = DirectoryStats(dirpath, size, count, newest, allocated)
+
+        # Fold children into parents, deepest first, so each directory is final
+        # before it is added to its own parent. Parents without files of their
+        # own are created on the way and queued at their depth.
+        by_depth: Dict[int, List[str]] = {}
+        for dirpath in stats:
+            by_depth.setdefault(dirpath.count(os.sep), []).append(dirpath)
+        for depth in range(max(by_depth, default=0), -1, -1):
+            for dirpath in by_depth.get(depth, []):
+                parent = self._parent(dirpath)
+                if parent is None:
+                    continue
+                child = stats[dirpath]
+                target = stats.get(parent)
+                if target is None:
+                    target = stats[parent] = DirectoryStats(parent)
+                    by_depth.setdefault(parent.count(os.sep), []).append(parent)
+                target.total_size += child.total_size
+                target.allocated_size += child.allocated_size
+                target.file_count += child.file_count
+                if child.newest_mtime is not None and (target.newest_mtime is None or child.newest_mtime > target.newest_mtime):
+                    target.newest_mtime = child.newest_mtime
+
+        largest_dirs = heapq.nlargest(self.top_n, stats.values(), key=lambda d: d.total_size)
+        return DirectoryReport(
+            directories=stats,
+            largest_files=sorted(self._largest, reverse=True),
+            largest_directories=largest_dirs,
+        )
+
+
+def disk_usage(records: Iterable[dict], roots: Iterable[str] = ()) -> DirectoryReport:
+    """
+    ``du`` for a saved index: one pass over its records (as dicts) gives every
+    directory's recursive apparent and on-disk size.
+    """
+    aggregator = DirectoryAggregator(roots)
+    from_dict = FileMetadata.from_dict
+    for record in records:
+        aggregator.add(from_dict(record))
+    return aggregator.finish()
+
+
+def write_directory_stats(report: DirectoryReport, fp: TextIO, indent: int = 2) -> None:
+    json.dump(report.to_dict(), fp, indent=indent)
+
+
+def find_directory_stats(index_path: str) -> Optional[str]:
+    """
+    Return the directory stats file saved alongside an index, if any:
+    ``<stem>_directory_stats.json`` from ``main.py --directory-stats`` or
+    ``<name>_directory_stats_<timestamp>.json`` from the menu.
+    """
+    stem = os.path.splitext(index_path)[0]
+    if stem.lower().endswith(".manifest"):
+        stem = stem[:-len(".manifest")]
+    candidates = [f"{os.path.splitext(index_path)[0]}_directory_stats.json", f"{stem}_directory_stats.json"]
+    stamped = re.match(r"(.*)_(\d{8}_\d{6})$", stem)
+    if stamped:
+        candidates.append(f"{stamped.group(1)}_directory_stats_{stamped.group(2)}.json")
+    for candidate in candidates:
+        if os.path.exists(candidate):
+            return candidate
+    return None
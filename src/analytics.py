@@ -0,0 +1,168 @@
+"""
+Extension, size-bucket and age-bucket breakdowns over an index.
+
+Records are reduced to three columns (extension, size, mtime). With NumPy the
+histograms are computed with vectorised ``digitize``/``bincount``; without it
+a pure-Python pass with ``bisect`` gives the same result.
+"""
+import os
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from .models import FileMetadata
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+_KB = 1024
+_MB = 1024 * _KB
+_GB = 1024 * _MB
+_DAY = 86400.0
+
+# Lower bounds of each bucket after the first; labels line up one-to-one.
+SIZE_BOUNDARIES = [1, _KB, _MB, 10 * _MB, 100 * _MB, _GB]
+SIZE_LABELS = ["empty", "< 1 KB", "1 KB - 1 MB", "1 - 10 MB", "10 - 100 MB", "100 MB - 1 GB", ">= 1 GB"]
+
+AGE_BOUNDARIES = [_DAY, 7 * _DAY, 30 * _DAY, 365 * _DAY, 5 * 365 * _DAY]
+AGE_LABELS = ["< 1 day", "1 - 7 days", "7 - 30 days", "1 - 12 months", "1 - 5 years", "> 5 years"]
+
+NO_EXTENSION = "(none)"
+
+
+@dataclass
+class Columns:
+    """The columns the analytics need, one entry per file."""
+    extensions: List[str] = field(default_factory=list)
+    sizes: List[int] = field(default_factory=list)
+    mtimes: List[float] = field(default_factory=list)
+
+    def append(self, name: str, size: int, mtime: float) -> None:
+        self.extensions.append(os.path.splitext(name)[1].lower() or NO_EXTENSION)
+        self.sizes.append(size)
+        self.mtimes.append(mtime)
+
+    @classmethod
+    def from_files(cls, files: Iterable[FileMetadata]) -> "Columns":
+        columns = cls()
+        for f in files:
+            columns.append(f.name, f.size, f.modified_time.timestamp())
+        return columns
+
+    @classmethod
+    def from_index(cls, path: str) -> "Columns":
+        """
+        Stream a saved index (JSON, NDJSON or sharded) into columns without
+        materialising FileMetadata objects.
+        """
+        from .reader import iter_record_dicts
+
+        columns = cls()
+        for record in iter_record_dicts(path):
+            mtime = datetime.fromisoformat(record["modified_time"]).timestamp()
+            columns.append(record["name"], record["size"], mtime)
+        return columns
+
+
+@dataclass
+class Bucket:
+    label: str
+    count: int = 0
+    total_size: int = 0
+
+    def to_dict(self) -> dict:
+        return {"label": self.label, "count": self.count, "total_size": self.total_size}
+
+
+@dataclass
+class AnalyticsReport:
+    total_files: int
+    total_size: int
+    by_extension: List[Bucket]
+    by_size: List[Bucket]
+    by_age: List[Bucket]
+
+    def to_dict(self) -> dict:
+        return {
+            "total_files": self.total_files,
+            "total_size": self.total_size,
+            "by_extension": [b.to_dict() for b in self.by_extension],
+            "by_size": [b.to_dict() for b in self.by_size],
+            "by_age": [b.to_dict() for b in self.by_age],
+        }
+
+
+def _top_extensions(counts: Dict[str, List[int]], top_n: int) -> List[Bucket]:
+    ranked = sorted(counts.items(), key=lambda item: (-item[1][1], item[0]))
+    buckets = [Bucket(ext, count, size) for ext, (count, size) in ranked[:top_n]]
+    rest = ranked[top_n:]
+    if rest:
+        buckets.append(Bucket("(other)", sum(c for _, (c, _) in rest), sum(s for _, (_, s) in rest)))
+    return buckets
+
+
+def _histogram_python(keys: Sequence[int], sizes: Sequence[int], labels: List[str]) -> List[Bucket]:
+    buckets = [Bucket(label) for label in labels]
+    for key, size in zip(keys, sizes):
+        bucket = buckets[key]
+        bucket.count += 1
+        bucket.total_size += size
+    return buckets
+
+
+def _compute_python(columns: Columns, now: float, top_n: int) -> AnalyticsReport:
+    ext_counts: Dict[str, List[int]] = {}
+    for ext, size in zip(columns.extensions, columns.sizes):
+        entry = ext_counts.get(ext)
+        if entry is None:
+            ext_counts[ext] = [1, size]
+        else:
+            entry[0] += 1
+            entry[1] += size
+
+    size_keys = [bisect_right(SIZE_BOUNDARIES, size) for size in columns.sizes]
+    age_keys = [bisect_right(AGE_BOUNDARIES, now - mtime) for mtime in columns.mtimes]
+    return AnalyticsReport(
+        total_files=len(columns.sizes),
+        total_size=sum(columns.sizes),
+        by_extension=_top_extensions(ext_counts, top_n),
+        by_size=_histogram_python(size_keys, columns.sizes, SIZE_LABELS),
+        by_age=_histogram_python(age_keys, columns.sizes, AGE_LABELS),
+    )
+
+
+def _histogram_numpy(keys, sizes, labels: List[str]) -> List[Bucket]:
+    counts = np.bincount(keys, minlength=len(labels))
+    totals = np.bincount(keys, weights=sizes, minlength=len(labels))
+    return [Bucket(label, int(c), int(t)) for label, c, t in zip(labels, counts, totals)]
+
+
+def _compute_numpy(columns: Columns, now: float, top_n: int) -> AnalyticsReport:
+    sizes = np.asarray(columns.sizes, dtype=np.int64)
+    mtimes = np.asarray(columns.mtimes, dtype=np.float64)
+
+    extensions, inverse = np.unique(np.asarray(columns.extensions, dtype=object), return_inverse=True)
+    ext_counts = np.bincount(inverse, minlength=len(extensions))
+    ext_sizes = np.bincount(inverse, weights=sizes, minlength=len(extensions))
+    counts = {str(e): [int(c), int(s)] for e, c, s in zip(extensions, ext_counts, ext_sizes)}
+
+    size_keys = np.digitize(sizes, SIZE_BOUNDARIES, right=False)
+    age_keys = np.digitize(now - mtimes, AGE_BOUNDARIES, right=False)
+    return AnalyticsReport(
+        total_files=int(sizes.size),
+        total_size=int(sizes.sum()),
+        by_extension=_top_extensions(counts, top_n),
+        by_size=_histogram_numpy(size_keys, sizes, SIZE_LABELS),
+        by_age=_histogram_numpy(age_keys, sizes, AGE_LABELS),
+    )
+
+
+def compute_report(columns: Columns, now: Optional[datetime] = None, top_n: int = 20, use_numpy: bool = True) -> AnalyticsReport:
+    """Build the histograms, using NumPy when it is installed."""
+    now_ts = (now or datetime.now()).timestamp()
+    if use_numpy and np is not None and columns.sizes:
+        return _compute_numpy(columns, now_ts, top_n)
+    return _compute_python(columns, now_ts, top_n)
@@ -0,0 +1,153 @@
+"""
+Asyncio front end for the indexer.
+
+Directory listings and stat calls run in a bounded thread pool so the event
+loop never blocks on the file system. Results are yielded in batches; no new
+directory is scheduled while the consumer holds a batch, which gives natural
+backpressure. Each root gets its own pool, so a hung network mount that blows
+its ``root_timeout`` is abandoned without starving the roots after it.
+"""
+import asyncio
+import logging
+import os
+import queue
+import threading
+from concurrent.futures import Executor, Future
+from typing import Any, AsyncIterator, Callable, List, Optional, Set
+
+from .indexer import _scan_dir, resolve_roots
+from .models import FileMetadata
+
+logger = logging.getLogger(__name__)
+
+
+class _DaemonExecutor(Executor):
+    """
+    Thread pool on daemon threads, like ``indexer._TimedLister``: a worker
+    stuck on a hung mount holds up neither ``shutdown`` nor interpreter exit,
+    which ``ThreadPoolExecutor`` joins.
+    """
+
+    def __init__(self, max_workers: int, thread_name_prefix: str = "aindex"):
+        self._work: queue.SimpleQueue = queue.SimpleQueue()
+        self._threads = [
+            threading.Thread(target=self._run, name=f"{thread_name_prefix}_{i}", daemon=True)
+            for i in range(max_workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def _run(self) -> None:
+        while True:
+            item = self._work.get()
+            if item is None:
+                return
+            future, fn, args, kwargs = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException as e:
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+
+    def submit(self, fn: Callable[..., Any], /, *args: Any, **kwargs: Any) -> Future:
+        future: Future = Future()
+        self._work.put((future, fn, args, kwargs))
+        return future
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        for _ in self._threads:
+            self._work.put(None)
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+
+async def _aindex_root(
+    root: str,
+    executor: Executor,
+    batch_size: int,
+    max_in_flight: int,
+    budget: Optional[float],
+) -> AsyncIterator[List[FileMetadata]]:
+    """
+    ``budget`` is how many seconds the root may spend waiting on the file
+    system; time the consumer spends holding a batch is not counted.
+    """
+    loop = asyncio.get_running_loop()
+    in_flight: Set[asyncio.Future] = set()
+
+    async def wait_any() -> Set[asyncio.Future]:
+        nonlocal budget, in_flight
+        if budget is not None and budget <= 0:
+            raise asyncio.TimeoutError
+        started = loop.time()
+        done, in_flight = await asyncio.wait(in_flight, timeout=budget, return_when=asyncio.FIRST_COMPLETED)
+        if budget is not None:
+            budget -= loop.time() - started
+        if not done:
+            raise asyncio.TimeoutError
+        return done
+
+    batch: List[FileMetadata] = []
+    try:
+        # The existence check runs in the root's pool too, so a hung mount hits the budget here.
+        in_flight.add(loop.run_in_executor(executor, os.path.exists, root))
+        if not (await wait_any()).pop().result():
+            logger.warning(f"Path does not exist: {root}")
+            return
+
+        pending_dirs = [root]
+        while pending_dirs or in_flight:
+            while pending_dirs and len(in_flight) < max_in_flight:
+                in_flight.add(loop.run_in_executor(executor, _scan_dir, pending_dirs.pop()))
+
+            for future in await wait_any():
+                files, subdirs, _ = future.result()
+                pending_dirs.extend(subdirs)
+                batch.extend(files)
+
+            while len(batch) >= batch_size:
+                yield batch[:batch_size]
+                batch = batch[batch_size:]
+        if batch:
+            yield batch
+    finally:
+        for future in in_flight:
+            future.cancel()
+
+
+async def aindex_directory(
+    root_path: str,
+    batch_size: int = 1000,
+    max_workers: int = 4,
+    root_timeout: Optional[float] = None,
+) -> AsyncIterator[List[FileMetadata]]:
+    """
+    Asynchronously index ``root_path`` ('*' for all drives), yielding lists of
+    up to ``batch_size`` records. A root that keeps the walk waiting on the
+    file system for longer than ``root_timeout`` seconds in total is logged and
+    skipped; the records already yielded for it stand.
+    Cancelling the consuming task stops scheduling immediately.
+    """
+    loop = asyncio.get_running_loop()
+    roots = await loop.run_in_executor(None, resolve_roots, root_path)
+
+    for root in roots:
+        executor = _DaemonExecutor(max_workers, thread_name_prefix="aindex")
+        try:
+            async for batch in _aindex_root(root, executor, batch_size, max_workers, root_timeout):
+                yield batch
+        except asyncio.TimeoutError:
+            logger.warning(f"Timed out after {root_timeout}s indexing {root}; skipping the rest of it")
+        finally:
+            # Threads stuck on a hung mount cannot be interrupted; don't wait for them.
+            executor.shutdown(wait=False)
+
+
+async def aindex_directories(paths: List[str], **kwargs) -> AsyncIterator[List[FileMetadata]]:
+    for path in paths:
+        async for batch in aindex_directory(path, **kwargs):
+            yield batch
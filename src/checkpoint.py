@@ -0,0 +1,160 @@
+"""
+Checkpoint journal for long scans.
+
+The journal is a JSON Lines file next to the output. Record rows are buffered
+in memory and appended only together with a checkpoint line describing the
+traversal frontier, so everything up to the last checkpoint is consistent:
+the records it holds are exactly those of the directories already listed.
+A resumed scan reloads those records and continues from the saved frontier.
+"""
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from .models import FileMetadata, RootHealth, WalkHealth
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_VERSION = 1
+
+
+def journal_path_for(output_path: str) -> str:
+    """Return where the checkpoint journal for ``output_path`` lives."""
+    return f"{os.path.splitext(output_path)[0]}.journal"
+
+
+@dataclass
+class ResumeState:
+    """What an interrupted scan had completed at its last checkpoint."""
+    roots: List[str]
+    files: List[FileMetadata] = field(default_factory=list)
+    frontier: Dict[str, List[str]] = field(default_factory=dict)
+    errors: Dict[str, int] = field(default_factory=dict)
+    skipped_paths: List[str] = field(default_factory=list)
+    # Byte offset just past the last checkpoint; anything after it is discarded.
+    journal_offset: int = 0
+
+    def to_health(self) -> WalkHealth:
+        health = WalkHealth(skipped_paths=list(self.skipped_paths))
+        for root, errors in self.errors.items():
+            health.roots[root] = RootHealth(root, errors=errors)
+        return health
+
+
+def load_journal(path: str) -> Optional[ResumeState]:
+    """Read a journal back, ignoring anything written after its last checkpoint."""
+    if not os.path.exists(path):
+        return None
+
+    state: Optional[ResumeState] = None
+    uncommitted: List[list] = []
+    offset = 0
+    with open(path, "rb") as f:
+        for line in f:
+            offset += len(line)
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # A torn final line from a crash mid-write.
+                break
+            if isinstance(entry, list):
+                uncommitted.append(entry)
+            elif "roots" in entry:
+                state = ResumeState(roots=entry["roots"], journal_offset=offset)
+            elif state is not None and "frontier" in entry:
+                state.journal_offset = offset
+                state.files.extend(FileMetadata.from_row(row) for row in uncommitted)
+                uncommitted = []
+                state.frontier = entry["frontier"]
+                state.errors = entry["errors"]
+                state.skipped_paths = entry["skipped_paths"]
+    return state
+
+
+class ScanJournal:
+    """
+    Append-only journal written while a scan runs.
+
+    Feed every emitted record to ``record`` and pass ``on_directory`` to
+    ``index_directory``; a checkpoint is written at most every ``interval``
+    seconds, always on a directory boundary.
+    """
+
+    def __init__(self, path: str, health: WalkHealth, interval: float = 60.0):
+        self.path = path
+        self.health = health
+        self.interval = interval
+        self._rows: List[tuple] = []
+        self._frontier: Dict[str, List[str]] = {}
+        # Rows and frontier as of the last directory boundary (see ``interrupted``).
+        self._boundary_rows = 0
+        self._boundary: Optional[tuple] = None
+        self._last_checkpoint = time.monotonic()
+        self._fp = None
+
+    def open(self, roots: List[str], resume: Optional[ResumeState] = None) -> None:
+        if resume is not None:
+            self._frontier = {root: list(pending) for root, pending in resume.frontier.items()}
+            os.truncate(self.path, resume.journal_offset)
+            self._fp = open(self.path, "a", encoding="utf-8")
+        else:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._fp = open(self.path, "w", encoding="utf-8")
+            self._fp.write(json.dumps({"roots": roots, "version": JOURNAL_VERSION}) + "\n")
+            self._fp.flush()
+
+    def record(self, metadata: FileMetadata) -> None:
+        self._rows.append(metadata.to_row())
+
+    def on_directory(self, root: str, pending: List[str]) -> None:
+        # Keep a reference only; the list is copied when a checkpoint is written.
+        self._frontier[root] = pending
+        # The walk next pops pending[-1] and appends its subdirectories, so the
+        # length and last entry are enough to rebuild this frontier later.
+        self._boundary = (root, len(pending), pending[-1] if pending else None)
+        self._boundary_rows = len(self._rows)
+        if time.monotonic() - self._last_checkpoint >= self.interval:
+            self.checkpoint()
+
+    def checkpoint(self) -> None:
+        lines = [json.dumps(row) for row in self._rows]
+        lines.append(json.dumps({
+            "frontier": self._frontier,
+            "errors": {root: h.errors for root, h in self.health.roots.items()},
+            "skipped_paths": self.health.skipped_paths,
+        }))
+        self._fp.write("\n".join(lines) + "\n")
+        self._fp.flush()
+        os.fsync(self._fp.fileno())
+        self._rows = []
+        self._boundary_rows = 0
+        self._last_checkpoint = time.monotonic()
+        logger.debug(f"Checkpoint written to {self.path}")
+
+    def interrupted(self) -> None:
+        """
+        Write a final checkpoint after the walk stopped partway through a
+        directory: that directory's records are dropped and it goes back on
+        the frontier, so a resumed scan lists it again.
+        """
+        del self._rows[self._boundary_rows:]
+        if self._boundary is not None:
+            root, length, next_dir = self._boundary
+            pending = self._frontier[root]
+            self._frontier[root] = pending[:length - 1] + [next_dir] if length else []
+        self.checkpoint()
+        self.close()
+
+    def close(self) -> None:
+        if self._fp is not None:
+            self._fp.close()
+            self._fp = None
+
+    def discard(self) -> None:
+        """Remove the journal once the final index has been saved."""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,367 @@
+"""
+Resident index daemon and its client.
+
+The daemon keeps recently used indexes in memory as ``CompactIndex``
+objects: path-sorted columns of paths, sizes and modification times. It
+answers queries over a Unix domain socket, or localhost TCP where Unix
+sockets are unavailable. The protocol is one JSON object per line each way::
+
+    -> {"id": 1, "op": "stat", "index": "/data/full.json", "path": "/data/a.txt"}
+    <- {"id": 1, "ok": true, "result": {"path": "/data/a.txt", "size": 12, ...}}
+
+Requests on a connection are answered in order, so a client can write a
+batch of requests before reading any reply (pipelining). Indexes are cached
+in an LRU keyed by file path and reloaded when the file changes on disk.
+"""
+import heapq
+import json
+import logging
+import os
+import socket
+import socketserver
+import threading
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from concurrent.futures import Future
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .reader import iter_record_dicts
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SOCKET = os.path.join(os.path.expanduser("~"), ".file_indexer.sock")
+DEFAULT_PORT = 8765
+# Requests a pipelining client keeps unanswered; small enough that they always fit in the socket buffer.
+PIPELINE_WINDOW = 64
+_MAX_CODEPOINT = "\U0010ffff"
+
+
+class DaemonError(RuntimeError):
+    """The daemon could not be reached or rejected a request."""
+
+
+class CompactIndex:
+    """Columnar, path-sorted copy of one index: paths, sizes and mtimes."""
+
+    def __init__(self, source: str, paths: List[str], sizes: array, mtimes: array):
+        self.source = source
+        self.paths = paths
+        self.sizes = sizes
+        self.mtimes = mtimes
+        self._by_size: Optional[List[int]] = None
+
+    @classmethod
+    def load(cls, path: str) -> "CompactIndex":
+        rows = []
+        fromisoformat = datetime.fromisoformat
+        for record in iter_record_dicts(path):
+            rows.append((record["path"], record["size"], fromisoformat(record["modified_time"]).timestamp()))
+        if any(rows[i][0] > rows[i + 1][0] for i in range(len(rows) - 1)):
+            rows.sort()
+        return cls(
+            path,
+            [row[0] for row in rows],
+            array("q", (row[1] for row in rows)),
+            array("d", (row[2] for row in rows)),
+        )
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def record(self, i: int) -> Dict[str, Any]:
+        return {
+            "path": self.paths[i],
+            "size": self.sizes[i],
+            "modified_time": datetime.fromtimestamp(self.mtimes[i]).isoformat(),
+        }
+
+    def prefix_range(self, prefix: str) -> Tuple[int, int]:
+        """Index range of the paths under directory ``prefix``."""
+        prefix = prefix.rstrip("/\\") + os.sep
+        return bisect_left(self.paths, prefix), bisect_left(self.paths, prefix + _MAX_CODEPOINT)
+
+    def stat(self, path: str) -> Optional[Dict[str, Any]]:
+        i = bisect_left(self.paths, path)
+        if i < len(self.paths) and self.paths[i] == path:
+            return self.record(i)
+        lo, hi = self.prefix_range(path)
+        if lo < hi:
+            return {"path": path, "is_dir": True, "files": hi - lo, "size": sum(self.sizes[lo:hi])}
+        return None
+
+    def search(self, pattern: str, limit: int = 100) -> List[Dict[str, Any]]:
+        """Match file names against a glob (if it has wildcards) or a case-insensitive substring."""
+        if any(c in pattern for c in "*?["):
+            import fnmatch
+            import re
+            match = re.compile(fnmatch.translate(pattern), re.IGNORECASE).match
+        else:
+            needle = pattern.lower()
+            match = lambda name: needle in name.lower()
+        results = []
+        for i, path in enumerate(self.paths):
+            if match(os.path.basename(path)):
+                results.append(self.record(i))
+                if len(results) >= limit:
+                    break
+        return results
+
+    def top(self, n: int = 20, prefix: Optional[str] = None) -> List[Dict[str, Any]]:
+        if prefix:
+            lo, hi = self.prefix_range(prefix)
+            return [self.record(i) for i in heapq.nlargest(n, range(lo, hi), key=self.sizes.__getitem__)]
+        if self._by_size is None:
+            self._by_size = sorted(range(len(self.paths)), key=self.sizes.__getitem__, reverse=True)
+        return [self.record(i) for i in self._by_size[:n]]
+
+    def subtree(self, prefix: str, offset: int = 0, limit: int = 1000) -> Dict[str, Any]:
+        """Every file under ``prefix`` in path order, one page at a time."""
+        lo, hi = self.prefix_range(prefix)
+        start = lo + offset
+        return {"total": hi - lo, "offset": offset, "files": [self.record(i) for i in range(start, min(hi, start + limit))]}
+
+    def ls(self, prefix: str) -> Dict[str, Any]:
+        """Immediate children of ``prefix``: its files, and its subdirectories with recursive totals."""
+        lo, hi = self.prefix_range(prefix)
+        base = len(prefix.rstrip("/\\")) + 1
+        files = []
+        dirs: Dict[str, List[int]] = {}
+        for i in range(lo, hi):
+            path = self.paths[i]
+            cut = path.find(os.sep, base)
+            if cut < 0:
+                files.append(self.record(i))
+            else:
+                entry = dirs.setdefault(path[:cut], [0, 0])
+                entry[0] += 1
+                entry[1] += self.sizes[i]
+        return {
+            "dirs": [{"path": path, "files": count, "size": size} for path, (count, size) in dirs.items()],
+            "files": files,
+        }
+
+
+class IndexCache:
+    """
+    LRU of loaded indexes, reloading an entry when its file changes. Loads
+    run outside the cache lock, so a slow load only holds up requests for
+    that same index, which wait for it instead of loading it again.
+    """
+
+    def __init__(self, capacity: int = 4):
+        self.capacity = capacity
+        self._entries: "OrderedDict[str, Tuple[int, CompactIndex]]" = OrderedDict()
+        self._loading: Dict[Tuple[str, int], Future] = {}
+        self._lock = threading.Lock()
+
+    def get(self, path: str) -> CompactIndex:
+        path = os.path.abspath(path)
+        version = os.stat(path).st_mtime_ns
+        key = (path, version)
+        with self._lock:
+            cached = self._entries.get(path)
+            if cached is not None and cached[0] == version:
+                self._entries.move_to_end(path)
+                return cached[1]
+            loading = self._loading.get(key)
+            owner = loading is None
+            if owner:
+                loading = self._loading[key] = Future()
+        if not owner:
+            return loading.result()
+
+        try:
+            index = CompactIndex.load(path)
+        except BaseException as e:
+            with self._lock:
+                del self._loading[key]
+            loading.set_exception(e)
+            raise
+        with self._lock:
+            del self._loading[key]
+            self._entries[path] = (version, index)
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.capacity:
+                evicted, _ = self._entries.popitem(last=False)
+                logger.info(f"Evicted {evicted} from the index cache")
+        loading.set_result(index)
+        return index
+
+    def loaded(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [{"index": path, "files": len(index)} for path, (_, index) in self._entries.items()]
+
+
+def _dispatch(cache: IndexCache, request: Dict[str, Any]) -> Any:
+    op = request.get("op")
+    if op == "ping":
+        return "pong"
+    if op == "indexes":
+        return cache.loaded()
+    if "index" not in request:
+        raise ValueError(f"'{op}' needs an 'index'")
+    index = cache.get(request["index"])
+    if op == "load":
+        return {"index": index.source, "files": len(index)}
+    if op == "stat":
+        return index.stat(request["path"])
+    if op == "search":
+        return index.search(request["pattern"], request.get("limit", 100))
+    if op == "top":
+        return index.top(request.get("n", 20), request.get("prefix"))
+    if op == "subtree":
+        return index.subtree(request["path"], request.get("offset", 0), request.get("limit", 1000))
+    if op == "ls":
+        return index.ls(request["path"])
+    raise ValueError(f"Unknown op: {op}")
+
+
+def _make_handler(cache: IndexCache, on_shutdown: Callable[[], None]):
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for line in self.rfile:
+                if not line.strip():
+                    continue
+                request: Dict[str, Any] = {}
+                try:
+                    request = json.loads(line)
+                    if request.get("op") == "shutdown":
+                        reply = {"id": request.get("id"), "ok": True, "result": "bye"}
+                        threading.Thread(target=on_shutdown, daemon=True).start()
+                    else:
+                        reply = {"id": request.get("id"), "ok": True, "result": _dispatch(cache, request)}
+                except Exception as e:
+                    # A malformed request gets an error reply; the connection stays open.
+                    request_id = request.get("id") if isinstance(request, dict) else None
+                    reply = {"id": request_id, "ok": False, "error": f"{type(e).__name__}: {e}"}
+                self.wfile.write(json.dumps(reply).encode("utf-8") + b"\n")
+
+    return Handler
+
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+
+
+def _unix_sockets() -> bool:
+    return hasattr(socket, "AF_UNIX") and hasattr(socketserver, "ThreadingUnixStreamServer")
+
+
+def serve(
+    socket_path: Optional[str] = None,
+    port: Optional[int] = None,
+    host: str = "127.0.0.1",
+    capacity: int = 4,
+    preload: Iterable[str] = (),
+    on_ready: Optional[Callable[[str], None]] = None,
+) -> None:
+    """
+    Run the daemon until a ``shutdown`` request or Ctrl-C. Listens on
+    ``port`` over TCP when given, otherwise on ``socket_path`` (default
+    ``~/.file_indexer.sock``), falling back to TCP ``DEFAULT_PORT`` on
+    platforms without Unix sockets.
+    """
+    cache = IndexCache(capacity)
+    for path in preload:
+        index = cache.get(path)
+        logger.info(f"Loaded {path} ({len(index):,} files)")
+
+    server: socketserver.BaseServer
+    if port is None and _unix_sockets():
+        socket_path = socket_path or DEFAULT_SOCKET
+        if os.path.exists(socket_path):
+            if _socket_alive(socket_path):
+                raise FileExistsError(f"A daemon is already listening on {socket_path}")
+            os.unlink(socket_path)
+        server = socketserver.ThreadingUnixStreamServer(socket_path, _make_handler(cache, lambda: server.shutdown()))
+        address = socket_path
+    else:
+        server = _TCPServer((host, DEFAULT_PORT if port is None else port), _make_handler(cache, lambda: server.shutdown()))
+        address = f"{host}:{server.server_address[1]}"
+        socket_path = None
+    server.daemon_threads = True
+
+    logger.info(f"Index daemon listening on {address}")
+    if on_ready is not None:
+        on_ready(address)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if socket_path and os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+def _socket_alive(socket_path: str) -> bool:
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_path)
+        return True
+    except OSError:
+        return False
+    finally:
+        sock.close()
+
+
+class DaemonClient:
+    """Thin client; ``request`` sends one query, ``pipeline`` keeps several in flight."""
+
+    def __init__(self, socket_path: Optional[str] = None, port: Optional[int] = None,
+                 host: str = "127.0.0.1", timeout: float = 60.0):
+        try:
+            if port is None and _unix_sockets():
+                self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                self._sock.settimeout(timeout)
+                self._sock.connect(socket_path or DEFAULT_SOCKET)
+            else:
+                self._sock = socket.create_connection((host, DEFAULT_PORT if port is None else port), timeout=timeout)
+        except OSError as e:
+            raise DaemonError(f"Cannot reach the index daemon: {e}") from e
+        self._reader = self._sock.makefile("rb")
+        self._next_id = 0
+
+    def close(self) -> None:
+        self._reader.close()
+        self._sock.close()
+
+    def __enter__(self) -> "DaemonClient":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def pipeline(self, requests: List[Dict[str, Any]], window: int = PIPELINE_WINDOW) -> List[Any]:
+        """
+        Send the requests, keeping at most ``window`` unanswered, and return
+        the replies in order; raises DaemonError on the first failure. Sending
+        everything first would deadlock once the daemon blocks writing replies
+        this side is not reading yet.
+        """
+        results = []
+
+        def send(batch: List[Dict[str, Any]]) -> None:
+            payload = []
+            for request in batch:
+                self._next_id += 1
+                payload.append(json.dumps({**request, "id": self._next_id}))
+            if payload:
+                self._sock.sendall(("\n".join(payload) + "\n").encode("utf-8"))
+
+        send(requests[:window])
+        for sent in range(len(requests)):
+            line = self._reader.readline()
+            if not line:
+                raise DaemonError("The index daemon closed the connection")
+            reply = json.loads(line)
+            if not reply["ok"]:
+                raise DaemonError(reply["error"])
+            results.append(reply["result"])
+            send(requests[sent + window:sent + window + 1])
+        return results
+
+    def request(self, op: str, **params) -> Any:
+        return self.pipeline([{"op": op, **params}])[0]
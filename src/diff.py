@@ -0,0 +1,123 @@
+"""
+Streaming comparison of two saved indexes.
+
+Both indexes are read record by record and merge-joined on path, so memory
+stays constant however large they are. This relies on the files being
+sorted by path, which is the default ``--sort``; an out-of-order index is
+reported instead of producing a wrong diff.
+"""
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, Optional
+
+from .reader import iter_record_dicts
+
+CHANGE_TYPES = ("added", "removed", "grown", "shrunk", "touched")
+
+
+@dataclass
+class DiffEntry:
+    change: str
+    path: str
+    old_size: Optional[int] = None
+    new_size: Optional[int] = None
+
+    @property
+    def size_delta(self) -> int:
+        return (self.new_size or 0) - (self.old_size or 0)
+
+    def to_dict(self) -> dict:
+        return {
+            "change": self.change,
+            "path": self.path,
+            "old_size": self.old_size,
+            "new_size": self.new_size,
+        }
+
+
+@dataclass
+class DiffSummary:
+    counts: Dict[str, int] = field(default_factory=lambda: dict.fromkeys(CHANGE_TYPES, 0))
+    unchanged: int = 0
+    bytes_added: int = 0
+    bytes_removed: int = 0
+
+    @property
+    def net_change(self) -> int:
+        return self.bytes_added - self.bytes_removed
+
+    def add(self, entry: DiffEntry) -> None:
+        self.counts[entry.change] += 1
+        delta = entry.size_delta
+        if delta > 0:
+            self.bytes_added += delta
+        else:
+            self.bytes_removed -= delta
+
+    def to_dict(self) -> dict:
+        return {
+            **self.counts,
+            "unchanged": self.unchanged,
+            "bytes_added": self.bytes_added,
+            "bytes_removed": self.bytes_removed,
+            "net_change": self.net_change,
+        }
+
+
+def _sorted_records(path: str) -> Iterator[Dict[str, Any]]:
+    previous = None
+    for record in iter_record_dicts(path):
+        current = record["path"]
+        if previous is not None and current < previous:
+            raise ValueError(f"{path} is not sorted by path (saw {current!r} after {previous!r})")
+        previous = current
+        yield record
+
+
+def _compare(old: Dict[str, Any], new: Dict[str, Any]) -> Optional[str]:
+    if new["size"] > old["size"]:
+        return "grown"
+    if new["size"] < old["size"]:
+        return "shrunk"
+    if new["modified_time"] != old["modified_time"]:
+        return "touched"
+    return None
+
+
+class IndexDiff:
+    """
+    Iterate the differences between two indexes; ``summary`` holds the
+    running totals and is complete once iteration finishes.
+    """
+
+    def __init__(self, old_path: str, new_path: str):
+        self.old_path = old_path
+        self.new_path = new_path
+        self.summary = DiffSummary()
+
+    def __iter__(self) -> Iterator[DiffEntry]:
+        old_records = _sorted_records(self.old_path)
+        new_records = _sorted_records(self.new_path)
+        old = next(old_records, None)
+        new = next(new_records, None)
+
+        while old is not None or new is not None:
+            if new is None or (old is not None and old["path"] < new["path"]):
+                entry = DiffEntry("removed", old["path"], old_size=old["size"])
+                old = next(old_records, None)
+            elif old is None or new["path"] < old["path"]:
+                entry = DiffEntry("added", new["path"], new_size=new["size"])
+                new = next(new_records, None)
+            else:
+                change = _compare(old, new)
+                entry = DiffEntry(change, new["path"], old["size"], new["size"]) if change else None
+                old = next(old_records, None)
+                new = next(new_records, None)
+                if entry is None:
+                    self.summary.unchanged += 1
+                    continue
+            self.summary.add(entry)
+            yield entry
+
+
+def diff_indexes(old_path: str, new_path: str) -> IndexDiff:
+    return IndexDiff(old_path, new_path)
@@ -1,16 +1,26 @@
 import os
-import ctypes
 import logging
-from typing import Iterator, List, Optional
+import queue
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional, Sequence, Set, Tuple
 
-from .metadata import extract_metadata_safe
-from .models import FileMetadata
+from .metadata import extract_metadata_safe, metadata_from_stat
+from .models import FileMetadata, RootHealth, WalkHealth
+
+if TYPE_CHECKING:
+    from .progress import ProgressReporter
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Module-level so ``src.profiling`` can count the walk's own calls.
+_scandir = os.scandir
+_stat = os.stat
+
 
 def get_windows_drives() -> List[str]:
+    import ctypes
     drives = []
     bitmask = ctypes.windll.kernel32.GetLogicalDrives()
     for i in range(26):
@@ -20,33 +30,319 @@ def get_windows_drives() -> List[str]:
     return drives
 
 
-def _walk_error_handler(error: OSError) -> None:
-    logger.debug(f"Skipping inaccessible path: {error.filename}")
+# Returns True for entry names that should be skipped (and, for directories, not descended into).
+NameFilter = Callable[[str], bool]
+
+
+def compile_excludes(patterns: Optional[Sequence[str]]) -> Optional[NameFilter]:
+    """Combine glob patterns matched against file and directory names into one filter."""
+    if not patterns:
+        return None
+    import fnmatch
+    import re
+    flags = re.IGNORECASE if os.name == "nt" else 0
+    regex = re.compile("|".join(fnmatch.translate(p) for p in patterns), flags)
+    return lambda name: regex.match(name) is not None
+
+
+class LinkTracker:
+    """
+    Device and inode bookkeeping for a link-aware walk.
+
+    Directories are remembered by ``(st_dev, st_ino)`` so that a followed
+    symlink can never lead back into a directory already listed, which ends
+    loops. Files are remembered only when they can have another name (a link
+    count above one, or reached through a symlink), so the set stays a small
+    fraction of the tree; a file seen again is still indexed under its own
+    path, but its size goes to ``WalkHealth.duplicate_size`` so the summary
+    can report a deduplicated total, and its ``allocated_size`` is 0 so that,
+    as with ``du``, its blocks are counted under the first name only.
+    """
+
+    def __init__(self, health: WalkHealth, follow_symlinks: bool = False, one_filesystem: bool = False):
+        self.health = health
+        self.follow_symlinks = follow_symlinks
+        self.one_filesystem = one_filesystem
+        self.device: Optional[int] = None
+        self._directories: Set[int] = set()
+        self._files: Set[int] = set()
+        health.links_tracked = True
+
+    @staticmethod
+    def _key(stat_result: os.stat_result) -> int:
+        return (stat_result.st_dev << 64) | stat_result.st_ino
+
+    def start_root(self, root: str, stat_result: Optional[os.stat_result] = None) -> None:
+        """
+        Note the root's device (for ``one_filesystem``) and mark it listed.
+        ``stat_result`` is the root's, when already taken (see ``_stat_root``).
+        """
+        if stat_result is None:
+            stat_result = _stat_root(root)
+            if stat_result is None:
+                return
+        self.device = stat_result.st_dev
+        self._directories.add(self._key(stat_result))
+
+    def enter_directory(self, path: str, is_symlink: bool) -> bool:
+        """Whether to descend into ``path``: not a symlink we do not follow, another device, or a repeat."""
+        if is_symlink and not self.follow_symlinks:
+            return False
+        if not is_symlink and not self.one_filesystem and not self.follow_symlinks:
+            return True
+        stat_result = _stat(path)
+        if self.one_filesystem and stat_result.st_dev != self.device:
+            logger.debug(f"Not crossing into another file system: {path}")
+            return False
+        key = self._key(stat_result)
+        if key in self._directories:
+            logger.debug(f"Already listed, not descending again: {path}")
+            self.health.directory_loops += 1
+            return False
+        self._directories.add(key)
+        return True
+
+    def file_metadata(self, path: str, is_symlink: bool) -> Optional[FileMetadata]:
+        try:
+            stat_result = _stat(path)
+            metadata = metadata_from_stat(path, stat_result)
+        except Exception:
+            return None
+        if stat_result.st_nlink > 1 or is_symlink:
+            key = self._key(stat_result)
+            if key in self._files:
+                self.health.duplicate_files += 1
+                self.health.duplicate_size += stat_result.st_size
+                if metadata.allocated_size is not None:
+                    metadata.allocated_size = 0
+            else:
+                self._files.add(key)
+        return metadata
+
+
+def _scan_dir(
+    dirpath: str,
+    excluded: Optional[NameFilter] = None,
+    links: Optional[LinkTracker] = None,
+) -> Tuple[List[FileMetadata], List[str], int]:
+    """List one directory: file metadata, subdirectories to descend into, error count."""
+    files: List[FileMetadata] = []
+    subdirs: List[str] = []
+    errors = 0
+    try:
+        with _scandir(dirpath) as it:
+            for entry in it:
+                if excluded is not None and excluded(entry.name):
+                    continue
+                try:
+                    if entry.is_dir():
+                        if links is not None:
+                            if links.enter_directory(entry.path, entry.is_symlink()):
+                                subdirs.append(entry.path)
+                        # Like os.walk, symlinked directories are not descended into.
+                        elif not entry.is_symlink():
+                            subdirs.append(entry.path)
+                        continue
+                except OSError:
+                    errors += 1
+                    continue
+                if links is not None:
+                    metadata = links.file_metadata(entry.path, entry.is_symlink())
+                else:
+                    metadata = extract_metadata_safe(entry.path)
+                if metadata is not None:
+                    files.append(metadata)
+                else:
+                    logger.debug(f"Cannot access file: {entry.path}")
+                    errors += 1
+    except OSError as e:
+        logger.debug(f"Skipping inaccessible path: {e.filename}")
+        errors += 1
+    return files, subdirs, errors
+
+
+def _stat_root(root: str) -> Optional[os.stat_result]:
+    try:
+        return _stat(root)
+    except OSError:
+        return None
+
+
+class _TimedLister:
+    """Run listings (``_scan_dir``) on a daemon thread so a hung one can be abandoned."""
+
+    def __init__(self):
+        self._requests: queue.Queue = queue.Queue()
+        self._results: queue.Queue = queue.Queue()
+        threading.Thread(target=self._run, name="indexer-lister", daemon=True).start()
+
+    def _run(self) -> None:
+        while True:
+            request = self._requests.get()
+            if request is None:
+                return
+            func, args = request
+            self._results.put(func(*args))
 
+    def call(self, timeout: float, func: Callable[..., Any], *args: Any) -> Any:
+        """Return ``func(*args)``; raise ``queue.Empty`` if it does not finish within ``timeout`` seconds."""
+        self._requests.put((func, args))
+        return self._results.get(timeout=timeout)
 
-def index_directory(root_path: str) -> Iterator[FileMetadata]:
+    def scan(
+        self,
+        dirpath: str,
+        timeout: float,
+        excluded: Optional[NameFilter] = None,
+        links: Optional[LinkTracker] = None,
+    ) -> Tuple[List[FileMetadata], List[str], int]:
+        """Raise ``queue.Empty`` if the listing does not finish within ``timeout`` seconds."""
+        return self.call(timeout, _scan_dir, dirpath, excluded, links)
+
+    def close(self) -> None:
+        self._requests.put(None)
+
+
+def resolve_roots(root_path: str) -> List[str]:
+    """Expand the '*' / 'all' shorthand into the list of drives to index."""
     if root_path in ("*", "all"):
-        root_paths = get_windows_drives()
-    else:
-        root_paths = [root_path]
+        return get_windows_drives()
+    return [root_path]
+
+
+# Called with (root, pending directories) once all files of a directory have been consumed.
+DirectoryCallback = Callable[[str, List[str]], None]
+
+
+def _walk_root(
+    root: str,
+    dir_timeout: Optional[float],
+    health: RootHealth,
+    skipped: List[str],
+    pending: List[str],
+    on_directory: Optional[DirectoryCallback],
+    excluded: Optional[NameFilter] = None,
+    links: Optional[LinkTracker] = None,
+    progress: Optional["ProgressReporter"] = None,
+) -> Iterator[FileMetadata]:
+    lister = _TimedLister() if dir_timeout is not None else None
+
+    def quarantine(what: str) -> None:
+        # The mount is unresponsive: abandon the worker and the rest of this root.
+        logger.warning(f"{what} exceeded {dir_timeout}s; quarantining {root}")
+        health.quarantined = True
+        health.errors += 1
+        skipped.extend(reversed(pending))
+        pending.clear()
+        if on_directory is not None:
+            on_directory(root, pending)
+
+    try:
+        if links is not None:
+            if lister is None:
+                links.start_root(root)
+            else:
+                # Stat'ed on the lister too; the tracker is only updated here, so an
+                # abandoned stat cannot change it later.
+                try:
+                    stat_result = lister.call(dir_timeout, _stat_root, root)
+                except queue.Empty:
+                    quarantine(f"Stat of {root}")
+                    return
+                if stat_result is not None:
+                    links.start_root(root, stat_result)
+        while pending:
+            dirpath = pending.pop()
+            started = time.perf_counter()
+            if lister is None:
+                files, subdirs, errors = _scan_dir(dirpath, excluded, links)
+            else:
+                try:
+                    files, subdirs, errors = lister.scan(dirpath, dir_timeout, excluded, links)
+                except queue.Empty:
+                    skipped.append(dirpath)
+                    quarantine(f"Listing {dirpath}")
+                    return
+            elapsed = time.perf_counter() - started
 
-    for root in root_paths:
-        if not os.path.exists(root):
+            health.dirs_scanned += 1
+            health.errors += errors
+            health.listing_time += elapsed
+            health.slowest_listing = max(health.slowest_listing, elapsed)
+
+            # Reversed so that directories are visited in listing order, like os.walk.
+            pending.extend(reversed(subdirs))
+            yield from files
+            if progress is not None:
+                progress.advance(len(files))
+            if on_directory is not None:
+                on_directory(root, pending)
+    finally:
+        if lister is not None:
+            lister.close()
+
+
+def index_directory(
+    root_path: str,
+    dir_timeout: Optional[float] = None,
+    health: Optional[WalkHealth] = None,
+    resume: Optional[Dict[str, List[str]]] = None,
+    on_directory: Optional[DirectoryCallback] = None,
+    exclude: Optional[Sequence[str]] = None,
+    follow_symlinks: bool = False,
+    one_filesystem: bool = False,
+    dedupe_links: bool = False,
+    progress: Optional["ProgressReporter"] = None,
+) -> Iterator[FileMetadata]:
+    """
+    Yield metadata for every file under ``root_path`` ('*' for all drives).
+    Files and directories whose name matches one of the ``exclude`` glob
+    patterns are skipped without being stat'ed or descended into.
+
+    ``follow_symlinks`` descends into symlinked directories, listing each
+    directory at most once so links cannot loop; ``one_filesystem`` stays on
+    each root's device. Either option, or ``dedupe_links``, makes the walk
+    track device and inode numbers so that hard-linked and symlinked files
+    are counted once in ``health`` (see ``LinkTracker``). A resumed walk
+    only deduplicates the part it walks itself.
+
+    With ``dir_timeout``, each directory listing must finish within that many
+    seconds; otherwise the root is quarantined and the walk moves on to the
+    next root. Pass a ``WalkHealth`` to collect per-root latency, error counts
+    and the subtrees that were skipped.
+
+    ``on_directory`` sees the traversal frontier after each directory, and
+    ``resume`` maps roots to a saved frontier to continue from (an empty list
+    marks a finished root), which is how interrupted scans are resumed.
+
+    ``progress`` (a ``src.progress.ProgressReporter``) is advanced once per
+    directory, after its files have been consumed.
+    """
+    if health is None:
+        health = WalkHealth()
+    excluded = compile_excludes(exclude)
+    links = None
+    if follow_symlinks or one_filesystem or dedupe_links:
+        links = LinkTracker(health, follow_symlinks=follow_symlinks, one_filesystem=one_filesystem)
+
+    for root in resolve_roots(root_path):
+        if resume is not None and root in resume:
+            pending = list(resume[root])
+            if not pending:
+                continue
+        else:
+            pending = [root]
+
+        # With a deadline the first listing doubles as the existence check,
+        # so a hung mount cannot block here.
+        if dir_timeout is None and not os.path.exists(root):
             logger.warning(f"Path does not exist: {root}")
             continue
 
-        for dirpath, dirnames, filenames in os.walk(root, onerror=_walk_error_handler):
-            for filename in filenames:
-                file_path = os.path.join(dirpath, filename)
-                try:
-                    metadata = extract_metadata_safe(file_path)
-                    if metadata is not None:
-                        yield metadata
-                except (OSError, PermissionError) as e:
-                    logger.debug(f"Cannot access file: {file_path} - {e}")
-                    continue
+        root_health = health.roots.setdefault(root, RootHealth(root))
+        yield from _walk_root(root, dir_timeout, root_health, health.skipped_paths, pending, on_directory, excluded, links, progress)
 
 
-def index_directories(paths: List[str]) -> Iterator[FileMetadata]:
+def index_directories(paths: List[str], **kwargs) -> Iterator[FileMetadata]:
     for path in paths:
-        yield from index_directory(path)
+        yield from index_directory(path, **kwargs)
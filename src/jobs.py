@@ -0,0 +1,284 @@
+"""
+Batch mode: index many roots described in one TOML or JSON job file.
+
+Example (TOML)::
+
+    concurrency = 4          # jobs running at once
+    retries = 2              # extra attempts for a failed or quarantined root
+    retry_delay = 30         # seconds before a retry starts
+
+    [defaults]
+    exclude = ["node_modules", "*.tmp"]
+    dir_timeout = 60
+
+    [[jobs]]
+    name = "users"
+    path = "C:\\\\Users"
+    output = "out/{name}_{timestamp}.ndjson"
+    exclude = ["AppData"]
+
+Keys in ``[defaults]`` apply to every job; a job's ``exclude`` list is added
+to the default one. ``output`` may use ``{name}`` and ``{timestamp}``; the
+format follows its extension unless ``format`` is set. Jobs share one
+worker pool and start largest first, using the run time recorded for each
+job in the history file (``<jobfile>.history.json`` by default) on
+previous runs. Jobs with no history start before all others.
+"""
+import json
+import logging
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .indexer import index_directory
+from .models import WalkHealth
+from .output import OUTPUT_FORMATS, create_index_result, format_for_path, save_index
+
+logger = logging.getLogger(__name__)
+
+_JOB_KEYS = {
+    "name", "path", "output", "exclude", "format", "dir_timeout", "retries", "sort",
+    "follow_symlinks", "one_filesystem", "dedupe_links",
+}
+
+
+@dataclass
+class Job:
+    name: str
+    path: str
+    output: str
+    exclude: List[str] = field(default_factory=list)
+    format: Optional[str] = None
+    dir_timeout: Optional[float] = None
+    retries: int = 1
+    sort: str = "path"
+    follow_symlinks: bool = False
+    one_filesystem: bool = False
+    dedupe_links: bool = False
+
+    def output_path(self, timestamp: str) -> str:
+        return self.output.format(name=self.name, timestamp=timestamp)
+
+
+@dataclass
+class JobFile:
+    jobs: List[Job]
+    concurrency: int = 2
+    retry_delay: float = 30.0
+    history_path: Optional[str] = None
+
+
+@dataclass
+class JobResult:
+    job: Job
+    attempts: int
+    files: int = 0
+    total_size: int = 0
+    seconds: float = 0.0
+    output: Optional[str] = None
+    error: Optional[str] = None
+    partial: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.job.name,
+            "path": self.job.path,
+            "attempts": self.attempts,
+            "files": self.files,
+            "total_size": self.total_size,
+            "seconds": round(self.seconds, 3),
+            "output": self.output,
+            "error": self.error,
+            "partial": self.partial,
+        }
+
+
+def _read_config(path: str) -> Dict[str, Any]:
+    if path.lower().endswith(".toml"):
+        try:
+            import tomllib
+        except ImportError:
+            raise ValueError("TOML job files need Python 3.11+; use a JSON job file instead") from None
+        with open(path, "rb") as f:
+            return tomllib.load(f)
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_job_file(path: str) -> JobFile:
+    """Parse and check a job file; raises ValueError describing the first problem found."""
+    config = _read_config(path)
+    defaults = config.get("defaults", {})
+    unknown = set(defaults) - _JOB_KEYS
+    if unknown:
+        raise ValueError(f"Unknown keys in [defaults]: {', '.join(sorted(unknown))}")
+
+    top_level = {"retries": config["retries"]} if "retries" in config else {}
+    jobs: List[Job] = []
+    for index, entry in enumerate(config.get("jobs", []), 1):
+        unknown = set(entry) - _JOB_KEYS
+        if unknown:
+            raise ValueError(f"Job {index}: unknown keys {', '.join(sorted(unknown))}")
+        merged = {**top_level, **defaults, **entry}
+        merged["exclude"] = list(defaults.get("exclude", [])) + list(entry.get("exclude", []))
+        for key in ("path", "output"):
+            if not merged.get(key):
+                raise ValueError(f"Job {index}: '{key}' is required")
+        merged.setdefault("name", os.path.basename(os.path.normpath(merged["path"])) or f"job{index}")
+        if merged.get("format") not in (None, *OUTPUT_FORMATS):
+            raise ValueError(f"Job {index}: format must be one of {', '.join(OUTPUT_FORMATS)}")
+        jobs.append(Job(**merged))
+
+    if not jobs:
+        raise ValueError(f"{path} defines no jobs")
+    names = [job.name for job in jobs]
+    duplicates = sorted({n for n in names if names.count(n) > 1})
+    if duplicates:
+        raise ValueError(f"Duplicate job names: {', '.join(duplicates)}")
+
+    concurrency = int(config.get("concurrency", 2))
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+    history_path = config.get("history") or f"{os.path.splitext(path)[0]}.history.json"
+    return JobFile(jobs, concurrency, float(config.get("retry_delay", 30.0)), history_path)
+
+
+def load_history(path: Optional[str]) -> Dict[str, Dict[str, Any]]:
+    if not path or not os.path.exists(path):
+        return {}
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable job history {path}: {e}")
+        return {}
+
+
+def save_history(path: str, history: Dict[str, Dict[str, Any]]) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(history, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def plan(job_file: JobFile, history: Dict[str, Dict[str, Any]]) -> List[Tuple[Job, Optional[float]]]:
+    """Jobs in start order with their estimated run time (None when never run)."""
+    estimates = [(job, history.get(job.name, {}).get("seconds")) for job in job_file.jobs]
+    return sorted(estimates, key=lambda item: -(item[1] if item[1] is not None else float("inf")))
+
+
+def run_job(job: Job, timestamp: str, keep_partial: bool = True) -> Tuple[JobResult, bool]:
+    """
+    Index and save one job; returns the result and whether the root was
+    quarantined. A quarantined scan is only saved when ``keep_partial``.
+    """
+    started = time.perf_counter()
+    health = WalkHealth()
+    files = list(index_directory(
+        job.path,
+        dir_timeout=job.dir_timeout,
+        health=health,
+        exclude=job.exclude,
+        follow_symlinks=job.follow_symlinks,
+        one_filesystem=job.one_filesystem,
+        dedupe_links=job.dedupe_links,
+    ))
+    result = create_index_result(files, [job.path], health)
+    quarantined = bool(health.quarantined_roots)
+    job_result = JobResult(
+        job,
+        attempts=1,
+        files=result.summary.total_files,
+        total_size=result.summary.total_size,
+        partial=result.summary.is_partial,
+    )
+    if keep_partial or not quarantined:
+        output_format = job.format or format_for_path(job.output)
+        saved = save_index(result, job.output_path(timestamp), output_format, sort_by=job.sort)
+        job_result.output = saved["index_file"]
+    job_result.seconds = time.perf_counter() - started
+    return job_result, quarantined
+
+
+def run_jobs(
+    job_file: JobFile,
+    on_result: Optional[Callable[[JobResult], None]] = None,
+) -> List[JobResult]:
+    """
+    Run every job on a shared pool of ``job_file.concurrency`` workers and
+    return the results in job-file order. A job that raises, or whose root
+    stops responding within its ``dir_timeout``, is retried up to
+    ``job.retries`` more times after ``retry_delay`` seconds; a quarantined
+    root that never recovers keeps its last, partial, index.
+    """
+    history = load_history(job_file.history_path)
+    order = plan(job_file, history)
+    results: Dict[str, JobResult] = {}
+    attempts: Dict[str, int] = {}
+    retry_at: List[Tuple[float, Job]] = []
+
+    def finish(result: JobResult) -> None:
+        results[result.job.name] = result
+        if result.ok and not result.partial:
+            history[result.job.name] = {
+                "seconds": round(result.seconds, 3),
+                "files": result.files,
+                "total_size": result.total_size,
+                "finished": datetime.now().isoformat(),
+            }
+        if on_result is not None:
+            on_result(result)
+
+    with ThreadPoolExecutor(max_workers=job_file.concurrency, thread_name_prefix="indexer-job") as pool:
+        running: Dict[Future, Job] = {}
+
+        def submit(job: Job) -> None:
+            attempts[job.name] = attempts.get(job.name, 0) + 1
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            last_attempt = attempts[job.name] > job.retries
+            running[pool.submit(run_job, job, timestamp, last_attempt)] = job
+
+        for job, _ in order:
+            submit(job)
+
+        while running or retry_at:
+            now = time.monotonic()
+            for due, job in [r for r in retry_at if r[0] <= now]:
+                retry_at.remove((due, job))
+                submit(job)
+            timeout = max(0.0, min(due for due, _ in retry_at) - now) if retry_at else None
+            if not running:
+                # Only retries are left; wait() on no futures would return at once.
+                time.sleep(timeout)
+                continue
+            done, _ = wait(list(running), timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                job = running.pop(future)
+                can_retry = attempts[job.name] <= job.retries
+                try:
+                    result, quarantined = future.result()
+                except Exception as e:
+                    logger.warning(f"Job {job.name} failed (attempt {attempts[job.name]}): {e}")
+                    # An existing output file will still be there on the next attempt.
+                    if can_retry and not isinstance(e, FileExistsError):
+                        retry_at.append((time.monotonic() + job_file.retry_delay, job))
+                        continue
+                    finish(JobResult(job, attempts[job.name], error=str(e)))
+                    continue
+                result.attempts = attempts[job.name]
+                if quarantined and can_retry:
+                    logger.warning(f"Job {job.name}: {job.path} stopped responding; retrying")
+                    retry_at.append((time.monotonic() + job_file.retry_delay, job))
+                    continue
+                finish(result)
+
+    if job_file.history_path:
+        save_history(job_file.history_path, history)
+    return [results[job.name] for job in job_file.jobs]
@@ -0,0 +1,181 @@
+"""
+Membership sidecar: "is this path in the index?" without loading the index.
+
+Every saved index gets a ``<name>.members`` file holding a 64-bit hash of
+each path, twice over:
+
+* a blocked Bloom filter -- one 64-bit word per lookup with five bits set in
+  it, about 10 bits per path -- that turns most absent paths away after one
+  memory read, and
+* the sorted hashes themselves, bucketed by their top bits through an offset
+  table so an exact check reads one or two entries.
+
+The file is opened with ``mmap``, so opening costs the same for ten files or
+ten million and lookups only touch the pages they need. Paths are compared
+after ``os.path.normcase``; two distinct paths sharing a 64-bit hash are the
+only way to get a wrong "yes" from the exact table.
+"""
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"FIMEMB02"
+BLOOM_BITS_PER_PATH = 10
+
+# magic, index file size and mtime_ns, path count, Bloom words, bucket bits
+_HEADER = struct.Struct("<8sQqQQB7x")
+_WORD = struct.Struct("<Q")
+_RANGE = struct.Struct("<QQ")
+_SWAP = sys.byteorder != "little"
+
+
+def membership_path(index_path: str) -> str:
+    """Named after the whole file name, so ``out.json`` and ``out.ndjson`` keep separate sidecars."""
+    return f"{index_path}.members"
+
+
+def path_hash(path: str) -> int:
+    digest = hashlib.blake2b(os.path.normcase(path).encode("utf-8", "surrogatepass"), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+def _bloom_word(h: int, words: int) -> int:
+    return (h >> 32) % words
+
+
+def _bloom_mask(h: int) -> int:
+    return (1 << (h & 63)) | (1 << ((h >> 6) & 63)) | (1 << ((h >> 12) & 63)) \
+        | (1 << ((h >> 18) & 63)) | (1 << ((h >> 24) & 63))
+
+
+def write_membership(paths: Iterable[str], filepath: str, index_path: Optional[str] = None) -> str:
+    """
+    Write the sidecar for ``paths`` to ``filepath``. ``index_path``, when
+    given, records the index's size and modification time so a later
+    rewrite of it is noticed.
+    """
+    if os.path.exists(filepath):
+        raise FileExistsError(f"File already exists: {filepath}")
+    hashes = array("Q", (path_hash(p) for p in paths))
+    hashes = array("Q", sorted(set(hashes)))
+    count = len(hashes)
+
+    words = max(1, -(-count * BLOOM_BITS_PER_PATH // 64))
+    bloom = array("Q", bytes(8 * words))
+    for h in hashes:
+        bloom[_bloom_word(h, words)] |= _bloom_mask(h)
+
+    # One or two hashes per bucket.
+    bucket_bits = max(1, min(32, count.bit_length() - 1))
+    shift = 64 - bucket_bits
+    offsets = array("Q", bytes(8 * ((1 << bucket_bits) + 1)))
+    for h in hashes:
+        offsets[(h >> shift) + 1] += 1
+    for i in range(1, len(offsets)):
+        offsets[i] += offsets[i - 1]
+
+    index_stat = os.stat(index_path) if index_path else None
+    index_bytes = index_stat.st_size if index_stat else 0
+    index_mtime_ns = index_stat.st_mtime_ns if index_stat else 0
+    with open(filepath, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, index_bytes, index_mtime_ns, count, words, bucket_bits))
+        for table in (bloom, offsets, hashes):
+            if _SWAP:
+                table.byteswap()
+            table.tofile(f)
+    return filepath
+
+
+class Membership:
+    """Read-only view of a ``.members`` file; ``path in members`` is an exact check."""
+
+    def __init__(self, filepath: str):
+        self.filepath = filepath
+        with open(filepath, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:len(MAGIC)] != MAGIC:
+            self._map.close()
+            raise ValueError(f"{filepath} is not a membership file in the current format")
+        _, self.index_bytes, self.index_mtime_ns, self.count, self._words, bucket_bits = \
+            _HEADER.unpack_from(self._map, 0)
+        self._shift = 64 - bucket_bits
+        self._bloom_at = _HEADER.size
+        self._offsets_at = self._bloom_at + 8 * self._words
+        self._hashes_at = self._offsets_at + 8 * ((1 << bucket_bits) + 1)
+
+    def close(self) -> None:
+        self._map.close()
+
+    def __enter__(self) -> "Membership":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _in_bloom(self, h: int) -> bool:
+        mask = _bloom_mask(h)
+        word = _WORD.unpack_from(self._map, self._bloom_at + 8 * _bloom_word(h, self._words))[0]
+        return word & mask == mask
+
+    def might_contain(self, path: str) -> bool:
+        """Bloom filter only: False is certain, True is wrong for about 1% of absent paths."""
+        return self._in_bloom(path_hash(path))
+
+    def __contains__(self, path: str) -> bool:
+        h = path_hash(path)
+        if not self._in_bloom(h):
+            return False
+        start, end = _RANGE.unpack_from(self._map, self._offsets_at + 8 * (h >> self._shift))
+        for i in range(start, end):
+            if _WORD.unpack_from(self._map, self._hashes_at + 8 * i)[0] == h:
+                return True
+        return False
+
+
+def open_membership(index_path: str) -> Optional[Membership]:
+    """
+    Return the sidecar saved with ``index_path``, or None if it has none,
+    it is in an older format, or the index changed since it was written.
+    """
+    filepath = membership_path(index_path)
+    if not os.path.exists(filepath):
+        return None
+    try:
+        members = Membership(filepath)
+    except ValueError as e:
+        logger.warning(f"Ignoring {filepath}: {e}")
+        return None
+    if members.index_bytes:
+        index_stat = os.stat(index_path)
+        if (members.index_bytes, members.index_mtime_ns) != (index_stat.st_size, index_stat.st_mtime_ns):
+            logger.warning(f"Ignoring {filepath}: {index_path} has changed since it was written")
+            members.close()
+            return None
+    return members
+
+
+def replace_membership(paths: Iterable[str], index_path: str) -> str:
+    """Atomically replace the sidecar of the finished ``index_path`` with one for ``paths``."""
+    filepath = membership_path(index_path)
+    tmp_path = f"{filepath}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    write_membership(paths, tmp_path, index_path)
+    os.replace(tmp_path, filepath)
+    return filepath
+
+
+def build_membership(index_path: str) -> str:
+    """Write the sidecar for an index saved without a current one, reading its records once."""
+    from .reader import iter_record_dicts
+    return replace_membership((r["path"] for r in iter_record_dicts(index_path)), index_path)
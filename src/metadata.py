@@ -1,5 +1,4 @@
 import os
-import ctypes
 from datetime import datetime
 from typing import Optional
 
@@ -11,48 +10,84 @@ FILE_ATTRIBUTE_READONLY = 0x1
 FILE_ATTRIBUTE_SYSTEM = 0x4
 FILE_ATTRIBUTE_ARCHIVE = 0x20
 
-GetFileAttributesExW = ctypes.windll.kernel32.GetFileAttributesExW
-GetFileAttributesExW.argtypes = [ctypes.c_wchar_p, ctypes.c_int, ctypes.c_void_p]
-GetFileAttributesExW.restype = ctypes.c_bool
+# Attribute flags are Windows-only; other platforms report them as False.
+_WINDOWS = os.name == "nt"
 
+# Module-level so ``src.profiling`` can time them for this module alone.
+_stat = os.stat
+_fromtimestamp = datetime.fromtimestamp
 
-class WIN32_FILE_ATTRIBUTE_DATA(ctypes.Structure):
-    _fields_ = [
-        ("dwFileAttributes", ctypes.c_ulong),
-        ("ftCreationTime", ctypes.c_ulonglong),
-        ("ftLastAccessTime", ctypes.c_ulonglong),
-        ("ftLastWriteTime", ctypes.c_ulonglong),
-        ("nFileSizeHigh", ctypes.c_ulong),
-        ("nFileSizeLow", ctypes.c_ulong),
-    ]
+
+def _bind_file_attributes():
+    """Bind GetFileAttributesExW through ctypes; done on first use so imports stay cheap."""
+    global _file_attributes
+    import ctypes
+
+    class WIN32_FILE_ATTRIBUTE_DATA(ctypes.Structure):
+        _fields_ = [
+            ("dwFileAttributes", ctypes.c_ulong),
+            ("ftCreationTime", ctypes.c_ulonglong),
+            ("ftLastAccessTime", ctypes.c_ulonglong),
+            ("ftLastWriteTime", ctypes.c_ulonglong),
+            ("nFileSizeHigh", ctypes.c_ulong),
+            ("nFileSizeLow", ctypes.c_ulong),
+        ]
+
+    GetFileAttributesExW = ctypes.windll.kernel32.GetFileAttributesExW
+    GetFileAttributesExW.argtypes = [ctypes.c_wchar_p, ctypes.c_int, ctypes.c_void_p]
+    GetFileAttributesExW.restype = ctypes.c_bool
+
+    def file_attributes(file_path: str) -> Optional[int]:
+        attr_data = WIN32_FILE_ATTRIBUTE_DATA()
+        if GetFileAttributesExW(file_path, 0, ctypes.byref(attr_data)):
+            return attr_data.dwFileAttributes
+        return None
+
+    _file_attributes = file_attributes
+    return file_attributes
+
+
+def _file_attributes(file_path: str) -> Optional[int]:
+    """Return the Win32 attribute bits of ``file_path``, or None if they cannot be read."""
+    return _bind_file_attributes()(file_path)
+
+
+def _allocated_size(stat_result: os.stat_result) -> Optional[int]:
+    # st_blocks is in 512-byte units on every platform that has it; Windows does not.
+    blocks = getattr(stat_result, "st_blocks", None)
+    return blocks * 512 if blocks is not None else None
 
 
 def extract_metadata(file_path: str) -> Optional[FileMetadata]:
     try:
-        stat_result = os.stat(file_path)
+        stat_result = _stat(file_path)
     except (OSError, PermissionError):
         return None
+    return metadata_from_stat(file_path, stat_result)
+
 
+def metadata_from_stat(file_path: str, stat_result: os.stat_result) -> FileMetadata:
+    """Build the record for ``file_path`` from a stat result the caller already has."""
     name = os.path.basename(file_path)
     size = stat_result.st_size
-    modified_time = datetime.fromtimestamp(stat_result.st_mtime)
-    created_time = datetime.fromtimestamp(stat_result.st_ctime)
+    modified_time = _fromtimestamp(stat_result.st_mtime)
+    created_time = _fromtimestamp(stat_result.st_ctime)
 
     is_hidden = False
     is_readonly = False
     is_system = False
     is_archive = False
 
-    try:
-        attr_data = WIN32_FILE_ATTRIBUTE_DATA()
-        if GetFileAttributesExW(file_path, 0, ctypes.byref(attr_data)):
-            attrs = attr_data.dwFileAttributes
-            is_hidden = bool(attrs & FILE_ATTRIBUTE_HIDDEN)
-            is_readonly = bool(attrs & FILE_ATTRIBUTE_READONLY)
-            is_system = bool(attrs & FILE_ATTRIBUTE_SYSTEM)
-            is_archive = bool(attrs & FILE_ATTRIBUTE_ARCHIVE)
-    except Exception:
-        pass
+    if _WINDOWS:
+        try:
+            attrs = _file_attributes(file_path)
+            if attrs is not None:
+                is_hidden = bool(attrs & FILE_ATTRIBUTE_HIDDEN)
+                is_readonly = bool(attrs & FILE_ATTRIBUTE_READONLY)
+                is_system = bool(attrs & FILE_ATTRIBUTE_SYSTEM)
+                is_archive = bool(attrs & FILE_ATTRIBUTE_ARCHIVE)
+        except Exception:
+            pass
 
     return FileMetadata(
         name=name,
@@ -64,6 +99,7 @@ def extract_metadata(file_path: str) -> Optional[FileMetadata]:
         is_readonly=is_readonly,
         is_system=is_system,
         is_archive=is_archive,
+        allocated_size=_allocated_size(stat_result),
     )
 
 
@@ -0,0 +1,211 @@
+"""
+Live indexing metrics in the Prometheus text exposition format.
+
+``IndexMetrics`` is fed by the scan (records, the directory frontier and a
+``WalkHealth``) and rendered on demand, either by ``MetricsServer`` on
+``/metrics`` or by ``write_textfile`` for node_exporter's textfile
+collector. Only the standard library is used.
+"""
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from .models import FileMetadata, WalkHealth
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Window over which files_per_second is averaged.
+RATE_WINDOW = 30.0
+
+
+def _resident_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        return 0
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class IndexMetrics:
+    """Counters and gauges for one indexing process; safe to render from another thread."""
+
+    def __init__(self, health: Optional[WalkHealth] = None):
+        self.health = health
+        self.files = 0
+        self.bytes = 0
+        self.dirs_queued = 0
+        self.updates = 0
+        self.index_files: Optional[int] = None
+        self.last_update = 0.0
+        self.phases: Dict[str, float] = {}
+        self.started = time.time()
+        self._phase: Optional[str] = None
+        self._phase_started = 0.0
+        self._samples = deque()
+        self._lock = threading.Lock()
+
+    def observe(self, files: Iterable[FileMetadata]) -> Iterator[FileMetadata]:
+        """Pass records through, counting files and bytes."""
+        for metadata in files:
+            self.files += 1
+            self.bytes += metadata.size
+            yield metadata
+
+    def on_directory(self, root: str, pending: List[str]) -> None:
+        self.dirs_queued = len(pending)
+
+    def record_update(self, changed: int, total_files: int) -> None:
+        """Watch mode: ``changed`` records were applied and the index now holds ``total_files``."""
+        self.updates += changed
+        self.index_files = total_files
+        self.last_update = time.time()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        self._phase, self._phase_started = name, time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - self._phase_started
+            self._phase = None
+
+    def _files_per_second(self, now: float) -> float:
+        with self._lock:
+            self._samples.append((now, self.files))
+            while len(self._samples) > 2 and now - self._samples[1][0] >= RATE_WINDOW:
+                self._samples.popleft()
+            then, files_then = self._samples[0]
+        if now - then <= 0:
+            then, files_then = self.started, 0
+        return (self.files - files_then) / (now - then) if now > then else 0.0
+
+    def render(self) -> str:
+        now = time.time()
+        phases = dict(self.phases)
+        if self._phase is not None:
+            phases[self._phase] = phases.get(self._phase, 0.0) + time.perf_counter() - self._phase_started
+
+        health = self.health
+        lines: List[str] = []
+
+        def metric(name: str, kind: str, help_text: str, samples) -> None:
+            lines.append(f"# HELP file_indexer_{name} {help_text}")
+            lines.append(f"# TYPE file_indexer_{name} {kind}")
+            for labels, value in samples:
+                label_text = ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+                lines.append(f"file_indexer_{name}{{{label_text}}} {value}" if label_text else f"file_indexer_{name} {value}")
+
+        metric("files_indexed_total", "counter", "Files indexed.", [({}, self.files)])
+        metric("bytes_indexed_total", "counter", "Bytes in the files indexed.", [({}, self.bytes)])
+        metric("files_per_second", "gauge", f"Files indexed per second over the last {RATE_WINDOW:.0f}s.",
+               [({}, round(self._files_per_second(now), 3))])
+        metric("directories_queued", "gauge", "Directories waiting to be listed.", [({}, self.dirs_queued)])
+        if health is not None:
+            roots = list(health.roots.values())
+            metric("directories_scanned_total", "counter", "Directories listed.",
+                   [({"root": r.root}, r.dirs_scanned) for r in roots])
+            metric("errors_total", "counter", "Files or directories that could not be read.",
+                   [({"root": r.root}, r.errors) for r in roots])
+            metric("root_quarantined", "gauge", "1 if the root stopped responding and was skipped.",
+                   [({"root": r.root}, int(r.quarantined)) for r in roots])
+        metric("phase_duration_seconds", "gauge", "Time spent in each phase so far.",
+               [({"phase": name}, round(seconds, 6)) for name, seconds in phases.items()])
+        metric("watch_updates_total", "counter", "Records changed by watch-mode updates.", [({}, self.updates)])
+        if self.index_files is not None:
+            metric("index_files", "gauge", "Files currently in the watched index.", [({}, self.index_files)])
+        if self.last_update:
+            metric("last_update_timestamp_seconds", "gauge", "Time of the last watch-mode update.",
+                   [({}, round(self.last_update, 3))])
+        metric("resident_memory_bytes", "gauge", "Resident memory of the indexer process.", [({}, _resident_bytes())])
+        metric("start_time_seconds", "gauge", "Start time of the indexer process.", [({}, round(self.started, 3))])
+        return "\n".join(lines) + "\n"
+
+
+def write_textfile(metrics: IndexMetrics, path: str) -> None:
+    """Write the metrics atomically, as the textfile collector requires."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(metrics.render())
+    os.replace(tmp_path, path)
+
+
+class MetricsServer:
+    """
+    Serve ``/metrics`` from a daemon thread and, with ``textfile``, rewrite
+    that file every ``interval`` seconds. ``close`` writes the file one last
+    time and stops the server.
+    """
+
+    def __init__(self, metrics: IndexMetrics, port: Optional[int] = None, host: str = "127.0.0.1",
+                 textfile: Optional[str] = None, interval: float = 15.0):
+        self.metrics = metrics
+        self.textfile = textfile
+        self.interval = interval
+        self._stop = threading.Event()
+        self._httpd: Optional[ThreadingHTTPServer] = None
+        self._threads: List[threading.Thread] = []
+
+        if port is not None:
+            self._httpd = ThreadingHTTPServer((host, port), self._handler())
+            self._httpd.daemon_threads = True
+            self.port = self._httpd.server_address[1]
+            self._start(self._httpd.serve_forever)
+            logger.info(f"Serving metrics on http://{host}:{self.port}/metrics")
+        if textfile is not None:
+            self._start(self._write_periodically)
+
+    def _start(self, target) -> None:
+        thread = threading.Thread(target=target, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def _handler(self):
+        metrics = self.metrics
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/metrics", "/"):
+                    self.send_error(404)
+                    return
+                body = metrics.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logger.debug(f"{self.address_string()} {format % args}")
+
+        return Handler
+
+    def _write_periodically(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                write_textfile(self.metrics, self.textfile)
+            except OSError as e:
+                logger.warning(f"Cannot write metrics to {self.textfile}: {e}")
+
+    def close(self) -> None:
+        self._stop.set()
+        if self.textfile is not None:
+            write_textfile(self.metrics, self.textfile)
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
@@ -1,8 +1,36 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field, fields
 from datetime import datetime
-from typing import List
+from typing import Dict, List, Optional, Tuple
 
 
+# Serialized field order of a file record; ``FileMetadata.to_row`` follows it.
+RECORD_FIELDS: Tuple[str, ...] = (
+    "name",
+    "path",
+    "size",
+    "modified_time",
+    "created_time",
+    "is_hidden",
+    "is_readonly",
+    "is_system",
+    "is_archive",
+    "allocated_size",
+)
+
+
+def _slotted(cls):
+    """Rebuild a dataclass with ``__slots__`` (``dataclass(slots=True)`` needs 3.10+)."""
+    names = tuple(f.name for f in fields(cls))
+    namespace = {
+        key: value
+        for key, value in cls.__dict__.items()
+        if key not in names and key not in ("__dict__", "__weakref__")
+    }
+    namespace["__slots__"] = names
+    return type(cls)(cls.__name__, cls.__bases__, namespace)
+
+
+@_slotted
 @dataclass
 class FileMetadata:
     name: str
@@ -14,6 +42,48 @@ class FileMetadata:
     is_readonly: bool
     is_system: bool
     is_archive: bool
+    # Bytes the file occupies on disk (st_blocks * 512); None where the
+    # platform does not report it. Below ``size`` for sparse files.
+    allocated_size: Optional[int] = None
+
+    @classmethod
+    def from_row(cls, row: Tuple) -> "FileMetadata":
+        """
+        Build a record from a ``to_row`` tuple (timestamps as ISO strings).
+        Rows written before ``allocated_size`` existed are accepted too.
+        """
+        name, path, size, modified, created, hidden, readonly, system, archive = row[:9]
+        return cls(
+            name,
+            path,
+            size,
+            datetime.fromisoformat(modified),
+            datetime.fromisoformat(created),
+            hidden,
+            readonly,
+            system,
+            archive,
+            row[9] if len(row) > 9 else None,
+        )
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "FileMetadata":
+        return cls.from_row(tuple(data.get(key) for key in RECORD_FIELDS))
+
+    def to_row(self) -> Tuple:
+        """Return JSON-ready field values in ``RECORD_FIELDS`` order."""
+        return (
+            self.name,
+            self.path,
+            self.size,
+            self.modified_time.isoformat(),
+            self.created_time.isoformat(),
+            self.is_hidden,
+            self.is_readonly,
+            self.is_system,
+            self.is_archive,
+            self.allocated_size,
+        )
 
     def to_dict(self) -> dict:
         return {
@@ -26,9 +96,11 @@ class FileMetadata:
             "is_readonly": self.is_readonly,
             "is_system": self.is_system,
             "is_archive": self.is_archive,
+            "allocated_size": self.allocated_size,
         }
 
 
+@_slotted
 @dataclass
 class IndexResult:
     files: List[FileMetadata]
@@ -41,17 +113,70 @@ class IndexResult:
         }
 
 
+@_slotted
 @dataclass
 class IndexSummary:
     total_files: int
     total_size: int
     indexed_paths: List[str]
     timestamp: datetime
+    error_count: int = 0
+    skipped_paths: List[str] = field(default_factory=list)
+    # Set by link-aware walks: total_size with every hard-linked or
+    # symlinked file counted once, and how many records were repeats.
+    deduplicated_size: Optional[int] = None
+    duplicate_files: int = 0
+    # Sum of the records' allocated_size (None when no record reports one).
+    allocated_size: Optional[int] = None
+
+    @property
+    def is_partial(self) -> bool:
+        """True when some subtrees could not be indexed."""
+        return bool(self.skipped_paths)
 
     def to_dict(self) -> dict:
-        return {
+        data = {
             "total_files": self.total_files,
             "total_size": self.total_size,
             "indexed_paths": self.indexed_paths,
             "timestamp": self.timestamp.isoformat(),
+            "error_count": self.error_count,
+            "skipped_paths": self.skipped_paths,
         }
+        if self.allocated_size is not None:
+            data["allocated_size"] = self.allocated_size
+        if self.deduplicated_size is not None:
+            data["deduplicated_size"] = self.deduplicated_size
+            data["duplicate_files"] = self.duplicate_files
+        return data
+
+
+@dataclass
+class RootHealth:
+    """Listing latency and error counts for one indexed root."""
+    root: str
+    dirs_scanned: int = 0
+    errors: int = 0
+    listing_time: float = 0.0
+    slowest_listing: float = 0.0
+    quarantined: bool = False
+
+
+@dataclass
+class WalkHealth:
+    """Health of a traversal: per-root stats and the subtrees that were not indexed."""
+    roots: Dict[str, RootHealth] = field(default_factory=dict)
+    skipped_paths: List[str] = field(default_factory=list)
+    # Link-aware walks only (see ``indexer.LinkTracker``).
+    links_tracked: bool = False
+    duplicate_files: int = 0
+    duplicate_size: int = 0
+    directory_loops: int = 0
+
+    @property
+    def error_count(self) -> int:
+        return sum(r.errors for r in self.roots.values())
+
+    @property
+    def quarantined_roots(self) -> List[str]:
+        return [r.root for r in self.roots.values() if r.quarantined]
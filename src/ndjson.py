@@ -0,0 +1,137 @@
+"""
+JSON Lines (NDJSON) output: one ``FileMetadata`` record per line.
+
+The summary goes to a ``.summary.json`` sidecar so every line of the data
+file is a record and the file can be split, tailed or grepped freely.
+``read_ndjson`` splits the file into newline-aligned byte ranges and parses
+them in a process pool, yielding records in file order.
+"""
+import json
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional, TextIO, Tuple
+
+from .models import FileMetadata, IndexResult
+from .output import record_encoder, sort_files
+from .pathindex import PathIndexBuilder, path_index_path
+
+NDJSON_EXTENSIONS = (".ndjson", ".jsonl")
+
+
+def summary_path_for(ndjson_path: str) -> str:
+    return f"{os.path.splitext(ndjson_path)[0]}.summary.json"
+
+
+class NdjsonWriter:
+    """Buffered record writer; call ``flush`` (or ``close``) when done."""
+
+    def __init__(self, fp: TextIO, buffer_rows: int = 4096, path_index: Optional[PathIndexBuilder] = None):
+        self._fp = fp
+        self._buffer_rows = buffer_rows
+        self._encode = record_encoder(indent=None)
+        self._pending: List[str] = []
+        self._pending_paths: List[str] = []
+        self._path_index = path_index
+        self.records = 0
+
+    def write(self, metadata: FileMetadata) -> None:
+        self._pending.append(self._encode(metadata.to_row()))
+        if self._path_index is not None:
+            self._pending_paths.append(metadata.path)
+        self.records += 1
+        if len(self._pending) >= self._buffer_rows:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._pending:
+            self._fp.write("\n".join(self._pending) + "\n")
+            if self._path_index is not None:
+                self._path_index.add(self._pending_paths, self._pending, "\n")
+                self._pending_paths = []
+            self._pending = []
+
+    def close(self) -> None:
+        self.flush()
+        self._fp.close()
+
+
+def write_ndjson(index_result: IndexResult, fp: TextIO, sort_by: str = "path",
+                 path_index: Optional[PathIndexBuilder] = None) -> None:
+    writer = NdjsonWriter(fp, path_index=path_index)
+    for metadata in sort_files(index_result.files, sort_by):
+        writer.write(metadata)
+    writer.flush()
+
+
+def save_ndjson(index_result: IndexResult, filepath: str, sort_by: str = "path", indent: int = 2) -> str:
+    """
+    Write ``filepath`` and its summary sidecar; return the sidecar path.
+    Path-sorted output also gets a path-prefix offset table.
+    """
+    summary_path = summary_path_for(filepath)
+    path_index = PathIndexBuilder() if sort_by == "path" else None
+    for path in (filepath, summary_path, path_index_path(filepath) if path_index else None):
+        if path and os.path.exists(path):
+            raise FileExistsError(f"File already exists: {path}")
+    os.makedirs(os.path.dirname(filepath) or ".", exist_ok=True)
+
+    with open(filepath, "w", encoding="utf-8") as f:
+        write_ndjson(index_result, f, sort_by=sort_by, path_index=path_index)
+    with open(summary_path, "w", encoding="utf-8") as f:
+        json.dump(index_result.summary.to_dict(), f, indent=indent)
+    if path_index is not None:
+        path_index.save(filepath, "ndjson")
+    return summary_path
+
+
+def _byte_ranges(path: str, chunk_bytes: int) -> List[Tuple[int, int]]:
+    """Split the file into ranges that start and end on line boundaries."""
+    size = os.path.getsize(path)
+    ranges = []
+    with open(path, "rb") as f:
+        start = 0
+        while start < size:
+            f.seek(min(start + chunk_bytes, size))
+            f.readline()
+            end = min(f.tell(), size)
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def _parse_range(path: str, start: int, end: int) -> List[FileMetadata]:
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    loads = json.loads
+    from_dict = FileMetadata.from_dict
+    return [from_dict(loads(line)) for line in data.splitlines() if line.strip()]
+
+
+def read_ndjson(path: str, workers: Optional[int] = None, chunk_bytes: int = 8 << 20) -> Iterator[FileMetadata]:
+    """
+    Yield the records of an NDJSON index in order. Files larger than one
+    chunk are parsed by ``workers`` processes (default: CPU count); at most
+    two chunks per worker are in flight, which bounds memory.
+    """
+    ranges = _byte_ranges(path, chunk_bytes)
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(ranges) <= 1:
+        for start, end in ranges:
+            yield from _parse_range(path, start, end)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        in_flight = deque()
+        pending = iter(ranges)
+        for start, end in pending:
+            in_flight.append(pool.submit(_parse_range, path, start, end))
+            if len(in_flight) >= workers * 2:
+                break
+        while in_flight:
+            batch = in_flight.popleft().result()
+            next_range = next(pending, None)
+            if next_range is not None:
+                in_flight.append(pool.submit(_parse_range, path, *next_range))
+            yield from batch
@@ -1,20 +1,52 @@
 import json
 import os
-import shutil
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator, List, Dict, Any, Optional, TextIO, Tuple
 
-from src.models import FileMetadata, IndexResult, IndexSummary
+from src.models import RECORD_FIELDS, FileMetadata, IndexResult, IndexSummary, WalkHealth
 
+if TYPE_CHECKING:
+    from src.aggregate import DirectoryReport
+    from src.pathindex import PathIndexBuilder
 
-def create_index_result(files: List[FileMetadata], indexed_paths: List[str]) -> IndexResult:
-    total_size = sum(f.size for f in files)
+
+_encode_str = json.encoder.encode_basestring_ascii
+_JSON_BOOL = {True: "true", False: "false"}
+
+# Records are buffered into chunks of this many rows before hitting the file.
+WRITE_CHUNK_ROWS = 4096
+
+# Below this many records, starting encoder processes costs more than it saves.
+PARALLEL_ENCODE_MIN_ROWS = 100_000
+
+# Records per task handed to an encoder process.
+PARALLEL_ENCODE_CHUNK_ROWS = 16384
+
+# Rows per Parquet row group; one group is buffered in memory at a time.
+PARQUET_ROW_GROUP_ROWS = 131072
+
+
+def create_index_result(files: List[FileMetadata], indexed_paths: List[str], health: Optional[WalkHealth] = None) -> IndexResult:
+    total_size = 0
+    allocated_size = 0
+    allocated_known = False
+    for f in files:
+        total_size += f.size
+        if f.allocated_size is not None:
+            allocated_size += f.allocated_size
+            allocated_known = True
     summary = IndexSummary(
         total_files=len(files),
         total_size=total_size,
         indexed_paths=indexed_paths,
         timestamp=datetime.now(),
+        error_count=health.error_count if health else 0,
+        skipped_paths=list(health.skipped_paths) if health else [],
+        allocated_size=allocated_size if allocated_known else None,
     )
+    if health is not None and health.links_tracked:
+        summary.deduplicated_size = total_size - health.duplicate_size
+        summary.duplicate_files = health.duplicate_files
     return IndexResult(files=files, summary=summary)
 
 
@@ -25,24 +57,417 @@ def sort_files(files: List[FileMetadata], sort_by: str = "path") -> List[FileMet
     return sorted(files, key=lambda f: getattr(f, sort_by, f.path))
 
 
-def to_json(index_result: IndexResult, indent: int = 2, sort_by: str = "path") -> str:
+def _newline(indent: Optional[int], level: int) -> str:
+    return "" if indent is None else "\n" + " " * (indent * level)
+
+
+def record_encoder(indent: Optional[int] = 2, level: int = 2) -> Callable[[Tuple], str]:
+    """
+    Return a function encoding a ``FileMetadata.to_row`` tuple as a JSON object.
+    The output matches ``json.dumps(record.to_dict(), indent=indent)`` nested
+    ``level`` deep, without building the intermediate dict.
+    """
+    item_sep = "," if indent is not None else ", "
+    inner = _newline(indent, level + 1)
+    parts = [f'{inner}"{key}": %s' for key in RECORD_FIELDS]
+    template = "{" + item_sep.join(parts) + _newline(indent, level) + "}"
+
+    def encode(row: Tuple) -> str:
+        name, path, size, modified, created, hidden, readonly, system, archive, allocated = row
+        return template % (
+            _encode_str(name),
+            _encode_str(path),
+            int.__repr__(size),
+            _encode_str(modified),
+            _encode_str(created),
+            _JSON_BOOL[hidden],
+            _JSON_BOOL[readonly],
+            _JSON_BOOL[system],
+            _JSON_BOOL[archive],
+            "null" if allocated is None else int.__repr__(allocated),
+        )
+
+    return encode
+
+
+def _json_head(indent: Optional[int]) -> str:
+    return "{" + _newline(indent, 1) + '"files": ['
+
+
+def _json_tail(summary: Dict[str, Any], indent: Optional[int], has_files: bool) -> str:
+    item_sep = "," if indent is not None else ", "
+    text = json.dumps(summary, indent=indent)
+    if indent is not None:
+        text = text.replace("\n", _newline(indent, 1))
+    close_files = _newline(indent, 1) + "]" if has_files else "]"
+    return close_files + item_sep + _newline(indent, 1) + '"summary": ' + text + _newline(indent, 0) + "}"
+
+
+EncodedChunk = Tuple[int, int, str, Optional[List[int]]]
+
+# The sorted records, inherited by forked encoder processes.
+_worker_files: List[FileMetadata] = []
+
+
+def _set_worker_files(files: List[FileMetadata]) -> None:
+    global _worker_files
+    _worker_files = files
+
+
+def _encode_range(files: List[FileMetadata], start: int, end: int, indent: Optional[int], sizes: bool) -> EncodedChunk:
+    """Encode ``files[start:end]`` joined by the record separator, with each record's byte size if asked."""
+    encode = record_encoder(indent, level=2)
+    record_sep = ("," if indent is not None else ", ") + _newline(indent, 2)
+    encoded = [encode(f.to_row()) for f in files[start:end]]
+    if not sizes:
+        return start, end, record_sep.join(encoded), None
+    # Already loaded by whoever built the PathIndexBuilder, so a forked worker only finds it in sys.modules.
+    from src.pathindex import _text_bytes
+    return start, end, record_sep.join(encoded), [_text_bytes(text) for text in encoded]
+
+
+def _encode_worker_range(start: int, end: int, indent: Optional[int], sizes: bool) -> EncodedChunk:
+    return _encode_range(_worker_files, start, end, indent, sizes)
+
+
+def _fork_context():
+    import multiprocessing
+    if "fork" not in multiprocessing.get_all_start_methods():
+        return None
+    return multiprocessing.get_context("fork")
+
+
+def _iter_encoded(files: List[FileMetadata], indent: Optional[int], sizes: bool, workers: Optional[int]) -> Iterator[EncodedChunk]:
+    """
+    Encode ``files`` a chunk at a time, in order, in this process unless
+    ``workers`` above 1 is asked for. Then large lists are split across that
+    many forked processes, which inherit the records instead of having them
+    pickled; at most two chunks per worker are in flight. Forking a process
+    that runs other threads (metrics server, directory timeouts, batch jobs)
+    can leave a lock held in the child, so callers opt in explicitly. Without
+    ``fork`` (Windows) encoding stays in this process, since pickling the
+    records costs more than encoding them.
+    """
+    context = _fork_context() if workers and workers > 1 and len(files) >= PARALLEL_ENCODE_MIN_ROWS else None
+    if context is None:
+        for start in range(0, len(files), WRITE_CHUNK_ROWS):
+            yield _encode_range(files, start, min(start + WRITE_CHUNK_ROWS, len(files)), indent, sizes)
+        return
+
+    from collections import deque
+    from concurrent.futures import ProcessPoolExecutor
+    ranges = iter([(start, min(start + PARALLEL_ENCODE_CHUNK_ROWS, len(files)))
+                   for start in range(0, len(files), PARALLEL_ENCODE_CHUNK_ROWS)])
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=_set_worker_files, initargs=(files,)) as pool:
+        in_flight = deque()
+        for start, end in ranges:
+            in_flight.append(pool.submit(_encode_worker_range, start, end, indent, sizes))
+            if len(in_flight) >= workers * 2:
+                break
+        while in_flight:
+            chunk = in_flight.popleft().result()
+            next_range = next(ranges, None)
+            if next_range is not None:
+                in_flight.append(pool.submit(_encode_worker_range, *next_range, indent, sizes))
+            yield chunk
+
+
+def iter_json_chunks(
+    index_result: IndexResult,
+    indent: Optional[int] = 2,
+    sort_by: str = "path",
+    path_index: Optional["PathIndexBuilder"] = None,
+    workers: Optional[int] = None,
+) -> Iterator[str]:
+    """
+    Yield the text of ``to_json`` piece by piece, a chunk of records at a
+    time. ``path_index``, when given, is told where each record lands.
+    Large indexes are encoded by ``workers`` processes when more than one is
+    asked for (see ``_iter_encoded``); the text is the same either way.
+    """
     files = sort_files(index_result.files, sort_by)
-    result = IndexResult(files=files, summary=index_result.summary)
-    return json.dumps(result.to_dict(), indent=indent)
+    item_sep = "," if indent is not None else ", "
+    record_sep = item_sep + _newline(indent, 2)
 
+    head = _json_head(indent)
+    yield head
+    if files:
+        yield _newline(indent, 2)
+        if path_index is not None:
+            path_index.skip(head + _newline(indent, 2))
+        for start, end, text, sizes in _iter_encoded(files, indent, path_index is not None, workers):
+            if path_index is not None:
+                path_index.add_sizes([f.path for f in files[start:end]], sizes, record_sep)
+            yield text if start == 0 else record_sep + text
+    yield _json_tail(index_result.summary.to_dict(), indent, bool(files))
 
-def save_to_file(index_result: IndexResult, filepath: str, indent: int = 2) -> None:
-    json_str = to_json(index_result, indent=indent)
-    
+
+def write_json(
+    index_result: IndexResult,
+    fp: TextIO,
+    indent: Optional[int] = 2,
+    sort_by: str = "path",
+    path_index: Optional["PathIndexBuilder"] = None,
+    workers: Optional[int] = None,
+) -> None:
+    """Stream the index to an open text file without building it in memory."""
+    for chunk in iter_json_chunks(index_result, indent=indent, sort_by=sort_by, path_index=path_index, workers=workers):
+        fp.write(chunk)
+
+
+def write_indexed_json(
+    index_result: IndexResult,
+    filepath: str,
+    indent: Optional[int] = 2,
+    workers: Optional[int] = None,
+) -> str:
+    """
+    Write the index sorted by path to ``filepath`` along with its path-prefix
+    offset table (see ``src.pathindex``); returns the table's path.
+    """
+    from src.pathindex import PathIndexBuilder, path_index_path
+    if os.path.exists(path_index_path(filepath)):
+        raise FileExistsError(f"File already exists: {path_index_path(filepath)}")
+    builder = PathIndexBuilder()
+    with open(filepath, "w", encoding="utf-8") as f:
+        write_json(index_result, f, indent=indent, sort_by="path", path_index=builder, workers=workers)
+    return builder.save(filepath, "json")
+
+
+def write_sharded(
+    index_result: IndexResult,
+    manifest_path: str,
+    max_records: Optional[int] = None,
+    max_bytes: Optional[int] = None,
+    indent: Optional[int] = 2,
+) -> Dict[str, Any]:
+    """
+    Write the index as path-sorted segment files plus a manifest.
+
+    A new segment starts once the current one holds ``max_records`` records
+    or ``max_bytes`` of encoded text. Each segment is a complete index
+    document on its own; the manifest records every segment's file name,
+    record count, size and first/last path so readers can go straight to
+    the segment holding a path. Segments are named after the manifest:
+    ``name.manifest.json`` -> ``name.part-00001.json``, each with its own
+    path-prefix offset table (``name.part-00001.json.pathidx.json``).
+    """
+    if not max_records and not max_bytes:
+        raise ValueError("Sharded output needs max_records or max_bytes")
+    from src.pathindex import PathIndexBuilder
+
+    files = sort_files(index_result.files, "path")
+    encode = record_encoder(indent, level=2)
+    item_sep = "," if indent is not None else ", "
+    record_sep = item_sep + _newline(indent, 2)
+    directory = os.path.dirname(manifest_path) or "."
+    stem = os.path.basename(manifest_path)
+    if stem.endswith(".manifest.json"):
+        stem = stem[:-len(".manifest.json")]
+    else:
+        stem = os.path.splitext(stem)[0]
+    summary = index_result.summary.to_dict()
+
+    segments: List[Dict[str, Any]] = []
+
+    def flush(batch: List[FileMetadata], encoded: List[str]) -> None:
+        name = f"{stem}.part-{len(segments) + 1:05d}.json"
+        segment_size = sum(f.size for f in batch)
+        segment_summary = dict(summary, total_files=len(batch), total_size=segment_size)
+        head = _json_head(indent) + _newline(indent, 2)
+        path_index = PathIndexBuilder()
+        path_index.skip(head)
+        path_index.add([f.path for f in batch], encoded, record_sep)
+        with open(os.path.join(directory, name), "w", encoding="utf-8") as f:
+            f.write(head)
+            f.write(record_sep.join(encoded))
+            f.write(_json_tail(segment_summary, indent, True))
+        path_index.save(os.path.join(directory, name), "json")
+        segments.append({
+            "file": name,
+            "records": len(batch),
+            "total_size": segment_size,
+            "bytes": os.path.getsize(os.path.join(directory, name)),
+            "first_path": batch[0].path,
+            "last_path": batch[-1].path,
+        })
+
+    os.makedirs(directory, exist_ok=True)
+    batch: List[FileMetadata] = []
+    encoded: List[str] = []
+    encoded_bytes = 0
+    for metadata in files:
+        text = encode(metadata.to_row())
+        batch.append(metadata)
+        encoded.append(text)
+        encoded_bytes += len(text)
+        if (max_records and len(batch) >= max_records) or (max_bytes and encoded_bytes >= max_bytes):
+            flush(batch, encoded)
+            batch, encoded, encoded_bytes = [], [], 0
+    if batch:
+        flush(batch, encoded)
+
+    manifest = {"sort_by": "path", "summary": summary, "segments": segments}
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=indent)
+    return manifest
+
+
+def parquet_available() -> bool:
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _parquet_schema(summary: Optional[IndexSummary]):
+    import pyarrow as pa
+
+    metadata = {"file_indexer.summary": json.dumps(summary.to_dict())} if summary else None
+    return pa.schema([
+        ("directory", pa.dictionary(pa.int32(), pa.string())),
+        ("name", pa.string()),
+        ("size", pa.int64()),
+        ("modified_time", pa.timestamp("us")),
+        ("created_time", pa.timestamp("us")),
+        ("is_hidden", pa.bool_()),
+        ("is_readonly", pa.bool_()),
+        ("is_system", pa.bool_()),
+        ("is_archive", pa.bool_()),
+        ("allocated_size", pa.int64()),
+    ], metadata=metadata)
+
+
+def write_parquet(
+    files: Iterable[FileMetadata],
+    filepath: str,
+    summary: Optional[IndexSummary] = None,
+    row_group_rows: int = PARQUET_ROW_GROUP_ROWS,
+) -> int:
+    """
+    Write records to a Parquet file one row group at a time and return the
+    record count. ``files`` can be a live ``index_directory`` generator.
+
+    The parent directory is stored as a dictionary-encoded column next to
+    the file name (``path`` is ``directory`` joined with ``name``) and the
+    times are real timestamp columns. ``summary``, when given, is kept as
+    JSON in the file's key/value metadata. Needs pyarrow; raises
+    ImportError with an install hint when it is missing.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Parquet export needs pyarrow: pip install pyarrow") from None
+
+    schema = _parquet_schema(summary)
+    columns: List[list] = [[] for _ in schema.names]
+    count = 0
+
+    def flush(writer) -> None:
+        arrays = [pa.array(values, type=f.type) for values, f in zip(columns, schema)]
+        writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+        for values in columns:
+            values.clear()
+
+    with pq.ParquetWriter(filepath, schema) as writer:
+        (directories, names, sizes, modified, created,
+         hidden, readonly, system, archive, allocated) = columns
+        for metadata in files:
+            directory, name = os.path.split(metadata.path)
+            directories.append(directory)
+            names.append(name)
+            sizes.append(metadata.size)
+            modified.append(metadata.modified_time)
+            created.append(metadata.created_time)
+            hidden.append(metadata.is_hidden)
+            readonly.append(metadata.is_readonly)
+            system.append(metadata.is_system)
+            archive.append(metadata.is_archive)
+            allocated.append(metadata.allocated_size)
+            count += 1
+            if len(names) >= row_group_rows:
+                flush(writer)
+        if names:
+            flush(writer)
+    return count
+
+
+def to_json(index_result: IndexResult, indent: int = 2, sort_by: str = "path", workers: Optional[int] = None) -> str:
+    return "".join(iter_json_chunks(index_result, indent=indent, sort_by=sort_by, workers=workers))
+
+
+def save_to_file(index_result: IndexResult, filepath: str, indent: int = 2, workers: Optional[int] = None) -> None:
     # Check if file exists and warn user
     if os.path.exists(filepath):
         raise FileExistsError(f"File already exists: {filepath}")
     
     # Create directory if it doesn't exist
-    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    os.makedirs(os.path.dirname(filepath) or ".", exist_ok=True)
     
-    with open(filepath, "w", encoding="utf-8") as f:
-        f.write(json_str)
+    write_indexed_json(index_result, filepath, indent=indent, workers=workers)
+
+
+OUTPUT_FORMATS = ("json", "ndjson", "parquet")
+
+
+def format_for_path(filepath: Optional[str]) -> str:
+    """Pick the output format from a file extension (.ndjson/.jsonl, .parquet, otherwise json)."""
+    extension = os.path.splitext(filepath or "")[1].lower()
+    if extension in (".ndjson", ".jsonl"):
+        return "ndjson"
+    if extension == ".parquet":
+        return "parquet"
+    return "json"
+
+
+def save_index(
+    index_result: IndexResult,
+    filepath: str,
+    output_format: str = "json",
+    sort_by: str = "path",
+    shard_records: Optional[int] = None,
+    shard_bytes: Optional[int] = None,
+    workers: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Save the index to ``filepath`` in ``output_format`` without overwriting
+    anything. JSON output is sharded when ``shard_records`` or
+    ``shard_bytes`` is set, in which case ``filepath`` becomes the manifest
+    ``<stem>.manifest.json``; otherwise ``workers`` processes encode it (see
+    ``_iter_encoded``). Returns ``index_file`` plus ``summary_file``
+    (NDJSON) or ``segments`` (sharded), ``membership_file`` (see
+    ``src.membership``), and ``path_index_file`` when a path-sorted JSON or
+    NDJSON file got a path-prefix offset table.
+    """
+    from src.membership import membership_path, write_membership
+    saved: Dict[str, Any] = {}
+    if os.path.exists(membership_path(filepath)):
+        raise FileExistsError(f"File already exists: {membership_path(filepath)}")
+    if output_format == "ndjson":
+        from src.ndjson import save_ndjson
+        saved["summary_file"] = save_ndjson(index_result, filepath, sort_by=sort_by)
+    elif output_format == "parquet":
+        if os.path.exists(filepath):
+            raise FileExistsError(f"File already exists: {filepath}")
+        write_parquet(sort_files(index_result.files, sort_by), filepath, index_result.summary)
+    elif shard_records or shard_bytes:
+        filepath = f"{os.path.splitext(filepath)[0]}.manifest.json"
+        if os.path.exists(filepath):
+            raise FileExistsError(f"File already exists: {filepath}")
+        manifest = write_sharded(index_result, filepath, shard_records, shard_bytes)
+        saved["segments"] = len(manifest["segments"])
+    else:
+        save_to_file(index_result, filepath, workers=workers)
+    saved["index_file"] = filepath
+    saved["membership_file"] = write_membership((f.path for f in index_result.files), membership_path(filepath), filepath)
+    if output_format in ("json", "ndjson") and not saved.get("segments"):
+        from src.pathindex import path_index_path
+        if os.path.exists(path_index_path(filepath)):
+            saved["path_index_file"] = path_index_path(filepath)
+    return saved
 
 
 def build_directory_structure(index_result: IndexResult) -> Dict[str, Any]:
@@ -89,12 +514,30 @@ def get_file_saver():
     return saver
 
 
-def save_with_duplicate_check(index_result: IndexResult, base_name: str, indent: int = 2) -> Dict[str, str]:
+def save_with_duplicate_check(
+    index_result: IndexResult,
+    base_name: str,
+    indent: int = 2,
+    output_dir: str = None,
+    directory_stats: Optional["DirectoryReport"] = None,
+    shard_records: Optional[int] = None,
+    shard_bytes: Optional[int] = None,
+    output_format: str = "json",
+    write_structure: bool = True,
+) -> Dict[str, str]:
     """
     Save files with duplicate protection and return file paths.
-    Returns dictionary with file paths.
+    Returns dictionary with file paths. The nested ``_structure`` dump of
+    every path is only written when ``write_structure`` is set. When
+    ``directory_stats`` is given, the per-directory rollups are saved too. With
+    ``shard_records`` or ``shard_bytes`` the index is written as segments and
+    ``index_file`` points at their manifest. ``output_format="ndjson"`` writes
+    one record per line and adds ``summary_file``; ``"parquet"`` writes a
+    columnar file (see ``write_parquet``).
     """
-    output_dir = "file_indexer/output"
+    # Use default output directory or custom
+    if output_dir is None:
+        output_dir = "file_indexer/output"
     os.makedirs(output_dir, exist_ok=True)
     
     # Get current timestamp for unique filenames
@@ -104,21 +547,49 @@ def save_with_duplicate_check(index_result: IndexResult, base_name: str, indent:
     base_filename = os.path.join(output_dir, base_name)
     
     # Add timestamp to avoid duplicates
-    index_filepath = f"{base_filename}_{timestamp}.json"
+    sharded = bool(shard_records or shard_bytes)
+    ndjson = output_format == "ndjson"
+    if ndjson:
+        index_filepath = f"{base_filename}_{timestamp}.ndjson"
+    elif output_format == "parquet":
+        index_filepath = f"{base_filename}_{timestamp}.parquet"
+    elif sharded:
+        index_filepath = f"{base_filename}_{timestamp}.manifest.json"
+    else:
+        index_filepath = f"{base_filename}_{timestamp}.json"
     structure_filepath = f"{base_filename}_structure_{timestamp}.json"
+    stats_filepath = f"{base_filename}_directory_stats_{timestamp}.json"
     
     # Check if files exist (should not with timestamp, but just in case)
-    if os.path.exists(index_filepath) or os.path.exists(structure_filepath):
+    from src.membership import membership_path, write_membership
+    if any(os.path.exists(p) for p in (index_filepath, structure_filepath, stats_filepath, membership_path(index_filepath))):
         raise FileExistsError("Generated file names already exist. This should not happen with timestamp.")
     
     # Save both files (without creating directory, it already exists)
-    with open(index_filepath, "w", encoding="utf-8") as f:
-        f.write(to_json(index_result, indent=indent))
+    summary_filepath = None
+    if ndjson:
+        from src.ndjson import save_ndjson
+        summary_filepath = save_ndjson(index_result, index_filepath, indent=indent)
+    elif output_format == "parquet":
+        write_parquet(sort_files(index_result.files, "path"), index_filepath, index_result.summary)
+    elif sharded:
+        write_sharded(index_result, index_filepath, shard_records, shard_bytes, indent=indent)
+    else:
+        write_indexed_json(index_result, index_filepath, indent=indent)
+    
+    saved = {"index_file": index_filepath}
+    saved["membership_file"] = write_membership((f.path for f in index_result.files), membership_path(index_filepath), index_filepath)
+    if write_structure:
+        with open(structure_filepath, "w", encoding="utf-8") as f:
+            f.write(json.dumps(build_directory_structure(index_result), indent=indent))
+        saved["structure_file"] = structure_filepath
+    if summary_filepath:
+        saved["summary_file"] = summary_filepath
     
-    with open(structure_filepath, "w", encoding="utf-8") as f:
-        f.write(json.dumps(build_directory_structure(index_result), indent=indent))
+    if directory_stats is not None:
+        from src.aggregate import write_directory_stats
+        with open(stats_filepath, "w", encoding="utf-8") as f:
+            write_directory_stats(directory_stats, f, indent=indent)
+        saved["directory_stats_file"] = stats_filepath
     
-    return {
-        "index_file": index_filepath,
-        "structure_file": structure_filepath
-    }
+    return saved
@@ -0,0 +1,236 @@
+"""
+Path-prefix index for saved indexes.
+
+A path-sorted JSON or NDJSON index is saved with a ``<name>.pathidx.json``
+sidecar (``out.json.pathidx.json``) holding the path and byte offset of every ``BLOCK_RECORDS``-th
+record. Listing or exporting one folder bisects that table, seeks to the
+block that can hold the folder's first file and decodes records only until
+the paths sort past the folder, instead of reading the whole index.
+"""
+import io
+import json
+import logging
+import os
+from bisect import bisect_right
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from .reader import IndexReader, iter_record_dicts, load_manifest, segments_for_prefix
+
+logger = logging.getLogger(__name__)
+
+BLOCK_RECORDS = 256
+
+# Text-mode files write "\n" as os.linesep.
+_NEWLINE_EXTRA = len(os.linesep) - 1
+
+
+def path_index_path(index_path: str) -> str:
+    """Named after the whole file name, so ``out.json`` and ``out.ndjson`` keep separate tables."""
+    return f"{index_path}.pathidx.json"
+
+
+def _text_bytes(text: str) -> int:
+    # Everything written around and inside records is ASCII.
+    return len(text) + _NEWLINE_EXTRA * text.count("\n") if _NEWLINE_EXTRA else len(text)
+
+
+class PathIndexBuilder:
+    """Follows an index file as it is written and notes where every block of records starts."""
+
+    def __init__(self, block_records: int = BLOCK_RECORDS):
+        self.block_records = block_records
+        self.blocks: List[List[Any]] = []
+        self.records = 0
+        self.offset = 0
+
+    def skip(self, text: str) -> None:
+        """Account for text written before the first record."""
+        self.offset += _text_bytes(text)
+
+    def add(self, paths: Sequence[str], texts: Sequence[str], sep: str) -> None:
+        """Account for records written as ``sep.join(texts)``, joined to any earlier records by ``sep``."""
+        self.add_sizes(paths, [_text_bytes(text) for text in texts], sep)
+
+    def add_sizes(self, paths: Sequence[str], sizes: Sequence[int], sep: str) -> None:
+        """Like ``add``, given each record's size in bytes instead of its text."""
+        sep_bytes = _text_bytes(sep)
+        for path, size in zip(paths, sizes):
+            if self.records:
+                self.offset += sep_bytes
+            if self.records % self.block_records == 0:
+                self.blocks.append([path, self.offset])
+            self.records += 1
+            self.offset += size
+
+    def save(self, index_path: str, index_format: str) -> str:
+        """Write the sidecar for the finished, closed ``index_path``; returns its path."""
+        sidecar = path_index_path(index_path)
+        stat_result = os.stat(index_path)
+        table = {
+            "index": os.path.basename(index_path),
+            "format": index_format,
+            "bytes": stat_result.st_size,
+            "mtime_ns": stat_result.st_mtime_ns,
+            "records": self.records,
+            "block_records": self.block_records,
+            "blocks": self.blocks,
+        }
+        # Replaced atomically: watch mode rewrites it while readers may have it open.
+        tmp_path = f"{sidecar}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(table, f, separators=(",", ":"))
+        os.replace(tmp_path, sidecar)
+        return sidecar
+
+
+def load_path_index(index_path: str) -> Optional[Dict[str, Any]]:
+    """Return the index's offset table, or None if it has none or the index changed since."""
+    sidecar = path_index_path(index_path)
+    if not os.path.exists(sidecar):
+        return None
+    with open(sidecar, "r", encoding="utf-8") as f:
+        table = json.load(f)
+    # Size and modification time together catch same-length rewrites.
+    stat_result = os.stat(index_path)
+    if table.get("bytes") != stat_result.st_size or table.get("mtime_ns") != stat_result.st_mtime_ns:
+        logger.warning(f"Ignoring {sidecar}: {index_path} has changed since it was written")
+        return None
+    return table
+
+
+def _directory_prefix(directory: str) -> str:
+    return directory.rstrip("/\\") + os.sep
+
+
+def _iter_from(index_path: str, table: Dict[str, Any], prefix: str) -> Iterator[Dict[str, Any]]:
+    starts = [block[0] for block in table["blocks"]]
+    block = max(bisect_right(starts, prefix) - 1, 0)
+    with open(index_path, "rb") as f:
+        if table["blocks"]:
+            f.seek(table["blocks"][block][1])
+        if table["format"] == "ndjson":
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from IndexReader(io.TextIOWrapper(f, encoding="utf-8")).iter_array()
+
+
+def _iter_file_subtree(index_path: str, prefix: str) -> Iterator[Dict[str, Any]]:
+    table = load_path_index(index_path)
+    if table is None:
+        # No offset table: the index may not be path-sorted, so read all of it.
+        for record in iter_record_dicts(index_path):
+            if record["path"].startswith(prefix):
+                yield record
+        return
+    for record in _iter_from(index_path, table, prefix):
+        path = record["path"]
+        if path.startswith(prefix):
+            yield record
+        elif path > prefix:
+            return
+
+
+def iter_subtree(index_path: str, directory: str) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the records under ``directory`` as plain dicts, in path order when
+    the index has an offset table. Sharded indexes only open the segments
+    whose path range overlaps the directory.
+    """
+    prefix = _directory_prefix(directory)
+    if not index_path.lower().endswith(".manifest.json"):
+        yield from _iter_file_subtree(index_path, prefix)
+        return
+    folder = os.path.dirname(index_path)
+    for segment in segments_for_prefix(load_manifest(index_path), prefix):
+        yield from _iter_file_subtree(os.path.join(folder, segment["file"]), prefix)
+
+
+def _iter_file_direct(index_path: str, prefix: str) -> Iterator[Dict[str, Any]]:
+    base = len(prefix)
+    table = load_path_index(index_path)
+    if table is None:
+        for record in iter_record_dicts(index_path):
+            path = record["path"]
+            if path.startswith(prefix) and path.find(os.sep, base) < 0:
+                yield record
+        return
+    starts = [block[0] for block in table["blocks"]]
+    target: Optional[str] = prefix
+    while target is not None:
+        # Records before ``low`` share the block sought to but are not wanted.
+        low, target = target, None
+        records = _iter_from(index_path, table, low)
+        for record in records:
+            path = record["path"]
+            if path < low:
+                continue
+            if not path.startswith(prefix):
+                return
+            cut = path.find(os.sep, base)
+            if cut < 0:
+                yield record
+                continue
+            # A subfolder: seek past its records when they run on into later blocks.
+            past = path[:cut + 1] + "\U0010ffff"
+            if starts[bisect_right(starts, past) - 1] > path:
+                target = past
+                break
+        records.close()
+
+
+def iter_directory_files(index_path: str, directory: str) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the records directly in ``directory``. With an offset table the
+    records of its subfolders are skipped by seeking, not read.
+    """
+    prefix = _directory_prefix(directory)
+    if not index_path.lower().endswith(".manifest.json"):
+        yield from _iter_file_direct(index_path, prefix)
+        return
+    folder = os.path.dirname(index_path)
+    for segment in segments_for_prefix(load_manifest(index_path), prefix):
+        yield from _iter_file_direct(os.path.join(folder, segment["file"]), prefix)
+
+
+def list_children(records: Iterable[Dict[str, Any]], directory: str) -> Dict[str, Any]:
+    """
+    Group the records under ``directory`` into its own files and its
+    immediate subdirectories, each with a recursive file count and size.
+    """
+    prefix = _directory_prefix(directory)
+    base = len(prefix)
+    files: List[Dict[str, Any]] = []
+    dirs: Dict[str, List[int]] = {}
+    for record in records:
+        path = record["path"]
+        cut = path.find(os.sep, base)
+        if cut < 0:
+            files.append(record)
+        else:
+            entry = dirs.setdefault(path[:cut], [0, 0])
+            entry[0] += 1
+            entry[1] += record["size"]
+    return {
+        "dirs": [{"path": path, "files": count, "size": size} for path, (count, size) in dirs.items()],
+        "files": files,
+    }
+
+
+def list_directory(index_path: str, directory: str) -> Dict[str, Any]:
+    """``ls`` over a saved index: see ``list_children``."""
+    return list_children(iter_subtree(index_path, directory), directory)
+
+
+def export_subtree(index_path: str, directory: str, output_path: str, output_format: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Save the records under ``directory`` as an index of their own (format from
+    ``output_path``'s extension by default); returns ``save_index``'s result.
+    """
+    from .models import FileMetadata
+    from .output import create_index_result, format_for_path, save_index
+
+    files = [FileMetadata.from_dict(record) for record in iter_subtree(index_path, directory)]
+    result = create_index_result(files, [directory])
+    return save_index(result, output_path, output_format or format_for_path(output_path))
@@ -0,0 +1,213 @@
+"""
+Opt-in run instrumentation: phase timers, per-root counters, call counts
+and optional cProfile/tracemalloc capture.
+
+Nothing here is installed unless a ``RunStats`` is started, so an
+uninstrumented run pays nothing. The indexer, metadata and output modules
+call the file system, datetime conversion, sorting and record encoding
+through module-level names; while a run is instrumented those names are
+bound to counting wrappers, so only the indexer's own calls are counted,
+from whichever thread makes them (including the ``dir_timeout`` lister).
+"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from . import indexer as _indexer
+from . import metadata as _metadata
+from . import output as _output
+from .models import FileMetadata, WalkHealth
+
+PROFILE_MODES = ("cpu", "memory", "all")
+
+
+@dataclass
+class RootCounters:
+    files: int = 0
+    bytes: int = 0
+
+
+class _CallCounter:
+    """Swap counting wrappers in for module-level functions."""
+
+    def __init__(self):
+        self.calls: Dict[str, List[float]] = {}
+        self._originals: List[Tuple[object, str, object]] = []
+
+    def _wrap(self, owner: object, attr: str, label: str) -> None:
+        func = getattr(owner, attr, None)
+        if func is None:
+            return
+        entry = self.calls.setdefault(label, [0, 0.0])
+        perf_counter = time.perf_counter
+
+        def counted(*args, **kwargs):
+            started = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                entry[0] += 1
+                entry[1] += perf_counter() - started
+
+        self._originals.append((owner, attr, func))
+        setattr(owner, attr, counted)
+
+    def uninstall(self) -> None:
+        for owner, attr, func in reversed(self._originals):
+            setattr(owner, attr, func)
+        self._originals.clear()
+
+    def to_dict(self) -> Dict[str, dict]:
+        return {name: {"calls": int(count), "seconds": round(seconds, 6)} for name, (count, seconds) in self.calls.items()}
+
+
+class _SyscallCounter(_CallCounter):
+    def install(self) -> None:
+        self._wrap(_indexer, "_scandir", "scandir")
+        self._wrap(_indexer, "_stat", "stat")
+        self._wrap(_metadata, "_stat", "stat")
+        if _metadata._WINDOWS:
+            _metadata._bind_file_attributes()
+            self._wrap(_metadata, "_file_attributes", "GetFileAttributesExW")
+
+
+class _OperationCounter(_CallCounter):
+    def install(self) -> None:
+        self._wrap(_metadata, "_fromtimestamp", "datetime")
+        self._wrap(_output, "sort_files", "sort")
+        # In-process JSON encoding, one call per chunk of records.
+        self._wrap(_output, "_encode_range", "encode")
+
+
+class RunStats:
+    """
+    Collect timings and counters for one run. ``profile`` is one of
+    ``PROFILE_MODES`` (or None): "cpu" runs cProfile, "memory" runs
+    tracemalloc, "all" runs both.
+    """
+
+    def __init__(self, profile: Optional[str] = None, top: int = 25):
+        self.profile = profile
+        self.top = top
+        self.phases: Dict[str, float] = {}
+        self.roots: Dict[str, RootCounters] = {}
+        self._syscalls = _SyscallCounter()
+        self._operations = _OperationCounter()
+        self._profiler: Optional[cProfile.Profile] = None
+        self._memory: Optional[dict] = None
+        self._started = 0.0
+        self.wall_time = 0.0
+
+    def start(self) -> None:
+        self._started = time.perf_counter()
+        self._syscalls.install()
+        self._operations.install()
+        if self.profile in ("memory", "all"):
+            tracemalloc.start()
+        if self.profile in ("cpu", "all"):
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+    def stop(self) -> None:
+        if self._profiler is not None:
+            self._profiler.disable()
+        if tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            top = tracemalloc.take_snapshot().statistics("lineno")[:self.top]
+            tracemalloc.stop()
+            self._memory = {
+                "current_bytes": current,
+                "peak_bytes": peak,
+                "top_allocations": [{"site": str(s.traceback), "bytes": s.size, "blocks": s.count} for s in top],
+            }
+        self._syscalls.uninstall()
+        self._operations.uninstall()
+        self.wall_time = time.perf_counter() - self._started
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - started
+
+    def count_roots(self, files: Iterable[FileMetadata], roots: Iterable[str]) -> Iterator[FileMetadata]:
+        """Pass records through, attributing each one to the root it was found under."""
+        # Match on whole path components, so "/a" does not claim "/ab".
+        prefixes = sorted(((r, r.rstrip("/\\") + os.sep) for r in roots), key=lambda p: len(p[1]), reverse=True)
+        current_prefix, counters = None, None
+        for metadata in files:
+            if current_prefix is None or not metadata.path.startswith(current_prefix):
+                current_root, current_prefix = next(
+                    ((r, prefix) for r, prefix in prefixes if metadata.path.startswith(prefix)), ("(other)", None))
+                counters = self.roots.setdefault(current_root, RootCounters())
+            counters.files += 1
+            counters.bytes += metadata.size
+            yield metadata
+
+    def profile_text(self) -> Optional[str]:
+        if self._profiler is None:
+            return None
+        stream = io.StringIO()
+        pstats.Stats(self._profiler, stream=stream).sort_stats("cumulative").print_stats(self.top)
+        return stream.getvalue()
+
+    def dump_profile(self, path: str) -> None:
+        if self._profiler is not None:
+            self._profiler.dump_stats(path)
+
+    def to_dict(self, health: Optional[WalkHealth] = None) -> dict:
+        roots = {}
+        for root, counters in self.roots.items():
+            roots[root] = {"files": counters.files, "bytes": counters.bytes}
+        if health is not None:
+            for root, root_health in health.roots.items():
+                entry = roots.setdefault(root, {"files": 0, "bytes": 0})
+                entry.update(
+                    dirs=root_health.dirs_scanned,
+                    errors=root_health.errors,
+                    listing_seconds=round(root_health.listing_time, 6),
+                    slowest_listing_seconds=round(root_health.slowest_listing, 6),
+                    quarantined=root_health.quarantined,
+                )
+        stats = {
+            "wall_seconds": round(self.wall_time, 6),
+            "phases": {name: round(seconds, 6) for name, seconds in self.phases.items()},
+            "roots": roots,
+            "syscalls": self._syscalls.to_dict(),
+            "operations": self._operations.to_dict(),
+        }
+        if self._memory is not None:
+            stats["memory"] = self._memory
+        return stats
+
+    def write_json(self, fp: TextIO, health: Optional[WalkHealth] = None) -> None:
+        json.dump(self.to_dict(health), fp, indent=2)
+
+    def print_report(self, fp: TextIO, health: Optional[WalkHealth] = None) -> None:
+        stats = self.to_dict(health)
+        print(f"Run time: {stats['wall_seconds']:.3f}s", file=fp)
+        for name, seconds in stats["phases"].items():
+            print(f"  {name:<16} {seconds:10.3f}s", file=fp)
+        for root, counters in stats["roots"].items():
+            print(f"  {root}: {counters['files']:,} files, {counters['bytes']:,} bytes, "
+                  f"{counters.get('dirs', 0):,} dirs, {counters.get('errors', 0):,} errors", file=fp)
+        for name, call in list(stats["syscalls"].items()) + list(stats["operations"].items()):
+            if call["calls"]:
+                print(f"  {name:<16} {call['calls']:>10,} calls {call['seconds']:10.3f}s", file=fp)
+        memory = stats.get("memory")
+        if memory:
+            print(f"  peak traced memory: {memory['peak_bytes'] / (1024 * 1024):.1f} MB", file=fp)
+            for site in memory["top_allocations"][:10]:
+                print(f"    {site['bytes'] / 1024:10.1f} KB  {site['site']}", file=fp)
+        text = self.profile_text()
+        if text:
+            print(text, file=fp)
@@ -0,0 +1,274 @@
+"""
+Progress and ETA for a walk whose size is not known up front.
+
+The total is estimated before the walk starts, either from the file counts
+recorded for the same roots by an earlier scan (``ScanHistory``) or, for a
+root never scanned before, by sampling the tree (``sample_tree``). During
+the walk a ``ProgressReporter`` counts files per directory and hands a
+``ScanProgress`` snapshot to a callback at most once per ``interval``.
+A walk given no reporter does no progress work at all.
+"""
+import json
+import logging
+import os
+import queue
+import random
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ScanEstimate:
+    files: int
+    dirs: int
+    source: str  # "history" or "sample"
+
+
+@dataclass
+class ScanProgress:
+    files: int
+    dirs: int
+    elapsed: float
+    estimated_files: Optional[int] = None
+    resumed_files: int = 0
+
+    @property
+    def fraction(self) -> Optional[float]:
+        """Share of the estimate done, held below 1 until the walk ends."""
+        if not self.estimated_files:
+            return None
+        return min(self.files / self.estimated_files, 0.99)
+
+    @property
+    def eta(self) -> Optional[float]:
+        """Seconds left at the current rate, or None once the walk has outrun its estimate."""
+        found = self.files - self.resumed_files
+        if not self.estimated_files or found <= 0 or self.files >= self.estimated_files:
+            return None
+        return self.elapsed * (self.estimated_files - self.files) / found
+
+
+ProgressCallback = Callable[[ScanProgress], None]
+
+
+class ProgressReporter:
+    """
+    Counts what a walk has yielded and calls ``callback`` at most every
+    ``interval`` seconds. ``files`` starts a resumed walk at the files it
+    already has.
+    """
+
+    def __init__(
+        self,
+        callback: ProgressCallback,
+        estimated_files: Optional[int] = None,
+        interval: float = 0.5,
+        files: int = 0,
+    ):
+        self.callback = callback
+        self.estimated_files = estimated_files
+        self.interval = interval
+        self.files = files
+        self.dirs = 0
+        self._resumed = files
+        self._started = time.monotonic()
+        self._next = self._started + interval
+
+    def advance(self, files: int, dirs: int = 1) -> None:
+        self.files += files
+        self.dirs += dirs
+        now = time.monotonic()
+        if now >= self._next:
+            self._next = now + self.interval
+            self.callback(self.snapshot(now))
+
+    def snapshot(self, now: Optional[float] = None) -> ScanProgress:
+        elapsed = (now if now is not None else time.monotonic()) - self._started
+        return ScanProgress(self.files, self.dirs, elapsed, self.estimated_files, self._resumed)
+
+    def finish(self) -> ScanProgress:
+        """Report the final counts, whatever the interval, and return them."""
+        progress = self.snapshot()
+        self.callback(progress)
+        return progress
+
+
+def _list_for_sample(path: str) -> Tuple[int, List[str]]:
+    # Counts what the walk would yield: files and file symlinks, not symlinked folders.
+    files = 0
+    subdirs: List[str] = []
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir():
+                        if not entry.is_symlink():
+                            subdirs.append(entry.path)
+                    else:
+                        files += 1
+                except OSError:
+                    continue
+    except OSError:
+        pass
+    return files, subdirs
+
+
+def sample_tree(
+    root: str,
+    exact_dirs: int = 256,
+    probes: int = 65536,
+    time_budget: float = 1.0,
+    max_depth: int = 64,
+    rng: Optional[random.Random] = None,
+    dir_timeout: Optional[float] = None,
+) -> ScanEstimate:
+    """
+    Estimate the files and folders under ``root``. The top of the tree is
+    listed breadth first, exactly, until ``exact_dirs`` folders are done;
+    each folder left on that frontier is then estimated from random
+    folder-to-leaf probes (Knuth's estimator: a folder on a probe stands for
+    as many folders as the product of the fan-outs above it), taking turns
+    until ``probes`` probes or ``time_budget`` seconds are spent.
+
+    With ``dir_timeout``, listings run on a separate thread and sampling
+    stops at one that takes longer than that or than the time left, as the
+    walk would skip it too. A sample cut short undercounts.
+    """
+    rng = rng or random.Random()
+    deadline = time.monotonic() + time_budget
+    lister = None
+    if dir_timeout is not None:
+        from .indexer import _TimedLister
+        lister = _TimedLister()
+
+    def list_dir(path: str) -> Optional[Tuple[int, List[str]]]:
+        # None once the time budget is spent or a listing hangs.
+        left = deadline - time.monotonic()
+        if left <= 0:
+            return None
+        if lister is None:
+            return _list_for_sample(path)
+        try:
+            return lister.call(min(dir_timeout, left), _list_for_sample, path)
+        except queue.Empty:
+            logger.warning(f"Stopped sampling {root}: listing {path} took over {min(dir_timeout, left):.1f}s")
+            return None
+
+    try:
+        files = dirs = 0
+        frontier = [root]
+        while frontier and dirs < exact_dirs:
+            listing = list_dir(frontier[0])
+            if listing is None:
+                return ScanEstimate(files, dirs + len(frontier), "sample")
+            frontier.pop(0)
+            files += listing[0]
+            dirs += 1
+            frontier.extend(listing[1])
+        if not frontier:
+            return ScanEstimate(files, dirs, "sample")
+
+        listings: Dict[str, Tuple[int, List[str]]] = {}
+        sums = [[0.0, 0.0, 0] for _ in frontier]  # files, folders, probes per frontier folder
+        stopped = False
+        for probe in range(max(probes, len(frontier))):
+            if time.monotonic() >= deadline:
+                break
+            which = probe % len(frontier)
+            path, weight = frontier[which], 1
+            file_sum = dir_sum = 0.0
+            for _ in range(max_depth):
+                if path not in listings:
+                    listing = list_dir(path)
+                    if listing is None:
+                        stopped = True
+                        break
+                    listings[path] = listing
+                count, subdirs = listings[path]
+                file_sum += weight * count
+                dir_sum += weight
+                if not subdirs:
+                    break
+                weight *= len(subdirs)
+                path = rng.choice(subdirs)
+            if stopped:
+                break
+            sums[which][0] += file_sum
+            sums[which][1] += dir_sum
+            sums[which][2] += 1
+    finally:
+        if lister is not None:
+            lister.close()
+
+    # Frontier folders the time ran out before probing stand for the average probed one.
+    probed = [(f / n, d / n) for f, d, n in sums if n]
+    mean_files = sum(f for f, _ in probed) / len(probed) if probed else 0.0
+    mean_dirs = sum(d for _, d in probed) / len(probed) if probed else 1.0
+    for file_sum, dir_sum, n in sums:
+        files += round(file_sum / n) if n else round(mean_files)
+        dirs += round(dir_sum / n) if n else round(mean_dirs)
+    return ScanEstimate(files, dirs, "sample")
+
+
+class ScanHistory:
+    """File and folder counts of earlier complete scans, one entry per root, kept in a JSON file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.roots: Dict[str, Dict[str, object]] = {}
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self.roots = json.load(f).get("roots", {})
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring scan history {path}: {e}")
+
+    @staticmethod
+    def _key(root: str) -> str:
+        return os.path.normcase(os.path.abspath(root))
+
+    def get(self, root: str) -> Optional[ScanEstimate]:
+        entry = self.roots.get(self._key(root))
+        if entry is None:
+            return None
+        return ScanEstimate(files=int(entry["files"]), dirs=int(entry["dirs"]), source="history")
+
+    def record(self, root: str, files: int, dirs: int, seconds: float) -> None:
+        self.roots[self._key(root)] = {
+            "files": files,
+            "dirs": dirs,
+            "seconds": round(seconds, 3),
+            "timestamp": datetime.now().isoformat(),
+        }
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"roots": self.roots}, f, indent=2)
+        os.replace(temp_path, self.path)
+
+
+def estimate_scan(
+    roots: Sequence[str],
+    history: Optional[ScanHistory] = None,
+    time_budget: float = 1.0,
+    dir_timeout: Optional[float] = None,
+) -> ScanEstimate:
+    """
+    Estimate a walk of ``roots``: recorded counts where ``history`` has the
+    root, otherwise a sample sharing ``time_budget`` with the other roots
+    (``dir_timeout`` as for ``sample_tree``).
+    """
+    known = {root: history.get(root) for root in roots} if history is not None else {}
+    unknown = [root for root in roots if known.get(root) is None]
+    files = dirs = 0
+    for root in roots:
+        estimate = known.get(root) or sample_tree(root, time_budget=time_budget / len(unknown), dir_timeout=dir_timeout)
+        files += estimate.files
+        dirs += estimate.dirs
+    return ScanEstimate(files, dirs, "sample" if unknown else "history")
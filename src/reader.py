@@ -0,0 +1,251 @@
+"""
+Streaming reader for saved index files.
+
+``json.load`` needs the whole document in memory; ``IndexReader`` walks the
+top-level object incrementally and yields the ``files`` records one by one, so
+multi-GB indexes can be processed with memory bounded by the largest record.
+"""
+import json
+import os
+from bisect import bisect_left
+from typing import Any, Dict, Iterator, List, Optional, TextIO
+
+from .models import RECORD_FIELDS, FileMetadata
+
+_WHITESPACE = " \t\n\r"
+
+
+class IndexReader:
+    """
+    Iterate the file records of a saved index.
+
+    Keys other than ``files`` (normally ``summary``) are decoded whole and are
+    available in ``extra`` once iteration finishes; ``summary`` is a shortcut.
+    """
+
+    def __init__(self, fp: TextIO, chunk_size: int = 1 << 20):
+        self._fp = fp
+        self._chunk_size = chunk_size
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+        self._decoder = json.JSONDecoder()
+        self.extra: Dict[str, Any] = {}
+        self.seen_files = False
+
+    @classmethod
+    def open(cls, path: str, **kwargs) -> "IndexReader":
+        return cls(open(path, "r", encoding="utf-8"), **kwargs)
+
+    @property
+    def summary(self) -> Optional[Dict[str, Any]]:
+        return self.extra.get("summary")
+
+    def close(self) -> None:
+        self._fp.close()
+
+    def __enter__(self) -> "IndexReader":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _fill(self) -> bool:
+        if self._eof:
+            return False
+        chunk = self._fp.read(self._chunk_size)
+        if not chunk:
+            self._eof = True
+            return False
+        if self._pos > len(self._buffer) // 2:
+            self._buffer = self._buffer[self._pos:]
+            self._pos = 0
+        self._buffer += chunk
+        return True
+
+    def _peek(self) -> str:
+        """Skip whitespace and return the next character ('' at end of input)."""
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                return ""
+
+    def _expect(self, char: str) -> None:
+        found = self._peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} at offset {self._pos}, found {found!r}")
+        self._pos += 1
+
+    def _value(self) -> Any:
+        self._peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            # A number cut off at the end of the buffer would decode short.
+            if end == len(self._buffer) and self._fill():
+                continue
+            self._pos = end
+            return value
+
+    def iter_array(self) -> Iterator[Any]:
+        """
+        Yield values from just inside an array (after its ``[``, or at the
+        start of any element) through its closing ``]``.
+        """
+        if self._peek() == "]":
+            self._pos += 1
+            return
+        while True:
+            yield self._value()
+            if self._peek() == ",":
+                self._pos += 1
+                continue
+            self._expect("]")
+            return
+
+    def iter_dicts(self) -> Iterator[Dict[str, Any]]:
+        """Yield each record of ``files`` as a plain dict."""
+        self._expect("{")
+        if self._peek() == "}":
+            self._pos += 1
+            return
+        while True:
+            key = self._value()
+            self._expect(":")
+            if key == "files":
+                self.seen_files = True
+                self._expect("[")
+                yield from self.iter_array()
+            else:
+                self.extra[key] = self._value()
+            if self._peek() == ",":
+                self._pos += 1
+                continue
+            self._expect("}")
+            return
+
+    def __iter__(self) -> Iterator[FileMetadata]:
+        for record in self.iter_dicts():
+            yield FileMetadata.from_dict(record)
+
+
+def iter_index_records(path: str) -> Iterator[FileMetadata]:
+    with IndexReader.open(path) as reader:
+        yield from reader
+
+
+def load_manifest(path: str) -> Dict[str, Any]:
+    """Load a sharded-index manifest written by ``output.write_sharded``."""
+    with open(path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if "segments" not in manifest:
+        raise ValueError(f"{path} is not a sharded index manifest")
+    return manifest
+
+
+def segments_for_prefix(manifest: Dict[str, Any], prefix: str) -> List[Dict[str, Any]]:
+    """Return the segments whose path range can hold paths starting with ``prefix``."""
+    segments = manifest["segments"]
+    last_paths = [segment["last_path"] for segment in segments]
+    # Every path with this prefix sorts before prefix + the highest code point.
+    upper = prefix + "\U0010ffff"
+    matches = []
+    for segment in segments[bisect_left(last_paths, prefix):]:
+        if segment["first_path"] > upper:
+            break
+        matches.append(segment)
+    return matches
+
+
+def iter_manifest_records(manifest_path: str, prefix: Optional[str] = None) -> Iterator[FileMetadata]:
+    """
+    Yield the records of a sharded index in path order. With ``prefix``, only
+    the segments that can contain it are opened.
+    """
+    manifest = load_manifest(manifest_path)
+    directory = os.path.dirname(manifest_path)
+    segments = manifest["segments"] if prefix is None else segments_for_prefix(manifest, prefix)
+    for segment in segments:
+        for record in iter_index_records(os.path.join(directory, segment["file"])):
+            if prefix is None or record.path.startswith(prefix):
+                yield record
+
+
+def _iter_parquet_dicts(path: str) -> Iterator[Dict[str, Any]]:
+    # Written by ``output.write_parquet``: path split into directory and name, times as timestamps.
+    import pyarrow.parquet as pq
+    for batch in pq.ParquetFile(path).iter_batches():
+        for row in batch.to_pylist():
+            row["path"] = os.path.join(row.pop("directory"), row["name"])
+            row["modified_time"] = row["modified_time"].isoformat()
+            row["created_time"] = row["created_time"].isoformat()
+            yield {key: row[key] for key in RECORD_FIELDS}
+
+
+def iter_record_dicts(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the records of any saved index as plain dicts: a JSON index, a
+    sharded index's ``.manifest.json``, an NDJSON file or a Parquet file
+    (needs pyarrow).
+    """
+    lower = path.lower()
+    if lower.endswith(".parquet"):
+        yield from _iter_parquet_dicts(path)
+        return
+    if lower.endswith(".manifest.json"):
+        directory = os.path.dirname(path)
+        for segment in load_manifest(path)["segments"]:
+            with IndexReader.open(os.path.join(directory, segment["file"])) as reader:
+                yield from reader.iter_dicts()
+    elif lower.endswith((".ndjson", ".jsonl")):
+        with open(path, "rb") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    else:
+        with IndexReader.open(path) as reader:
+            yield from reader.iter_dicts()
+
+
+def read_summary(path: str, tail_bytes: int = 1 << 20) -> Optional[Dict[str, Any]]:
+    """
+    Return the summary of a saved index without reading its records where
+    possible: from a manifest, an NDJSON summary sidecar, a Parquet file's
+    metadata, or the end of a JSON index (where ``write_json`` puts it).
+    """
+    lower = path.lower()
+    if lower.endswith(".parquet"):
+        import pyarrow.parquet as pq
+        summary = (pq.read_schema(path).metadata or {}).get(b"file_indexer.summary")
+        return json.loads(summary) if summary is not None else None
+    if lower.endswith(".manifest.json"):
+        return load_manifest(path).get("summary")
+    if lower.endswith((".ndjson", ".jsonl")):
+        sidecar = f"{os.path.splitext(path)[0]}.summary.json"
+        if not os.path.exists(sidecar):
+            return None
+        with open(sidecar, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    with open(path, "rb") as f:
+        f.seek(max(0, os.path.getsize(path) - tail_bytes))
+        tail = f.read().decode("utf-8", errors="replace")
+    start = tail.rfind('"summary":')
+    if start >= 0:
+        try:
+            summary, _ = json.JSONDecoder().raw_decode(tail, start + len('"summary":') + 1)
+            if isinstance(summary, dict):
+                return summary
+        except json.JSONDecodeError:
+            pass
+    with IndexReader.open(path) as reader:
+        for _ in reader.iter_dicts():
+            pass
+        return reader.summary
@@ -1,5 +1,8 @@
 import json
-from typing import Any, Dict, List
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
 
 
 INDEX_SCHEMA: Dict[str, Any] = {
@@ -33,6 +36,7 @@ INDEX_SCHEMA: Dict[str, Any] = {
                     "is_readonly": {"type": "boolean"},
                     "is_system": {"type": "boolean"},
                     "is_archive": {"type": "boolean"},
+                    "allocated_size": {"type": ["integer", "null"]},
                 },
             },
         },
@@ -44,19 +48,205 @@ INDEX_SCHEMA: Dict[str, Any] = {
                 "total_size": {"type": "integer"},
                 "indexed_paths": {"type": "array", "items": {"type": "string"}},
                 "timestamp": {"type": "string", "format": "date-time"},
+                "error_count": {"type": "integer"},
+                "skipped_paths": {"type": "array", "items": {"type": "string"}},
+                "deduplicated_size": {"type": "integer"},
+                "duplicate_files": {"type": "integer"},
+                "allocated_size": {"type": "integer"},
             },
         },
     },
 }
 
 
-def validate_index_result(data: Dict[str, Any]) -> bool:
+# A compiled check returns None for a valid value, else a short error message.
+Checker = Callable[[Any], Optional[str]]
+
+_PYTHON_TYPES = {
+    "string": (str,),
+    "integer": (int,),
+    "number": (int, float),
+    "boolean": (bool,),
+    "array": (list,),
+    "object": (dict,),
+    "null": (type(None),),
+}
+
+
+def _is_date_time(value: str) -> bool:
+    # Matches what ``datetime.isoformat`` writes, which is what the indexer emits.
     try:
-        json.validate(data, INDEX_SCHEMA)
+        datetime.fromisoformat(value)
         return True
-    except Exception:
+    except ValueError:
         return False
 
 
+def _compile_leaf(schema: Dict[str, Any], where: str) -> Checker:
+    kind = schema.get("type")
+    if isinstance(kind, list):
+        allowed = tuple(t for k in kind for t in _PYTHON_TYPES[k])
+        kind = " or ".join(kind)
+    else:
+        allowed = _PYTHON_TYPES.get(kind)
+    is_date_time = schema.get("format") == "date-time"
+    message = f"{where}: expected {kind}"
+
+    if kind == "string" and is_date_time:
+        def check(value: Any) -> Optional[str]:
+            if type(value) is not str or not _is_date_time(value):
+                return f"{where}: expected date-time string"
+            return None
+    elif allowed is not None and len(allowed) == 1:
+        # ``type() is`` keeps bools out of integer fields, unlike isinstance.
+        expected = allowed[0]
+
+        def check(value: Any) -> Optional[str]:
+            return None if type(value) is expected else message
+    elif allowed is not None:
+        def check(value: Any) -> Optional[str]:
+            return None if type(value) in allowed else message
+    else:
+        def check(value: Any) -> Optional[str]:
+            return None
+    return check
+
+
+def _compile_array(schema: Dict[str, Any], where: str) -> Checker:
+    item_check = compile_schema(schema["items"], f"{where}[]") if "items" in schema else None
+
+    def check(value: Any) -> Optional[str]:
+        if type(value) is not list:
+            return f"{where}: expected array"
+        if item_check is not None:
+            for item in value:
+                error = item_check(item)
+                if error is not None:
+                    return error
+        return None
+    return check
+
+
+def _compile_object(schema: Dict[str, Any], where: str) -> Checker:
+    required = frozenset(schema.get("required", ()))
+    prefix = f"{where}." if where else ""
+    properties = [
+        (key, compile_schema(sub, prefix + key))
+        for key, sub in schema.get("properties", {}).items()
+    ]
+
+    def check(value: Any) -> Optional[str]:
+        if type(value) is not dict:
+            return f"{where or 'document'}: expected object"
+        if not value.keys() >= required:
+            missing = ", ".join(sorted(required - value.keys()))
+            return f"{where or 'document'}: missing {missing}"
+        for key, sub_check in properties:
+            if key in value:
+                error = sub_check(value[key])
+                if error is not None:
+                    return error
+        return None
+    return check
+
+
+def compile_schema(schema: Dict[str, Any], where: str = "") -> Checker:
+    """
+    Compile a JSON schema into a nest of specialised check functions.
+    Supports the subset ``INDEX_SCHEMA`` uses: type (a name or a list of
+    names), required, properties, items and the date-time format.
+    """
+    kind = schema.get("type")
+    if kind == "object":
+        return _compile_object(schema, where)
+    if kind == "array":
+        return _compile_array(schema, where)
+    return _compile_leaf(schema, where)
+
+
+check_index = compile_schema(INDEX_SCHEMA)
+check_record = compile_schema(INDEX_SCHEMA["properties"]["files"]["items"], "files[]")
+check_summary = compile_schema(INDEX_SCHEMA["properties"]["summary"], "summary")
+
+
+def validate_index_result(data: Dict[str, Any]) -> bool:
+    return check_index(data) is None
+
+
+@dataclass
+class ValidationReport:
+    records: int = 0
+    errors: List[str] = field(default_factory=list)
+    error_count: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def valid(self) -> bool:
+        return self.error_count == 0
+
+    @property
+    def records_per_second(self) -> float:
+        return self.records / self.elapsed if self.elapsed > 0 else 0.0
+
+    def add_error(self, message: str, max_errors: int) -> None:
+        self.error_count += 1
+        if len(self.errors) < max_errors:
+            self.errors.append(message)
+
+
+def validate_index_file(path: str, max_errors: int = 20) -> ValidationReport:
+    """
+    Validate a saved index (JSON, NDJSON, Parquet or a sharded
+    ``.manifest.json``) one record at a time with bounded memory. Also checks
+    that the summary totals agree with the records.
+    """
+    from .reader import IndexReader, iter_record_dicts, read_summary
+
+    report = ValidationReport()
+    total_size = 0
+    started = time.perf_counter()
+
+    def check_records(records) -> None:
+        nonlocal total_size
+        for record in records:
+            error = check_record(record)
+            if error is not None:
+                report.add_error(f"record {report.records}: {error}", max_errors)
+            else:
+                total_size += record["size"]
+            report.records += 1
+
+    try:
+        if path.lower().endswith((".manifest.json", ".ndjson", ".jsonl", ".parquet")):
+            check_records(iter_record_dicts(path))
+            summary = read_summary(path)
+        else:
+            with IndexReader.open(path) as reader:
+                check_records(reader.iter_dicts())
+                if not reader.seen_files:
+                    report.add_error("document: missing files", max_errors)
+                summary = reader.summary
+        if summary is None:
+            report.add_error("document: missing summary", max_errors)
+        else:
+            error = check_summary(summary)
+            if error is not None:
+                report.add_error(error, max_errors)
+            elif summary["total_files"] != report.records:
+                report.add_error(
+                    f"summary.total_files is {summary['total_files']} but the index holds {report.records} records",
+                    max_errors,
+                )
+            elif report.error_count == 0 and summary["total_size"] != total_size:
+                report.add_error(
+                    f"summary.total_size is {summary['total_size']} but the records add up to {total_size}",
+                    max_errors,
+                )
+    except (OSError, ValueError) as e:
+        report.add_error(f"cannot parse index: {e}", max_errors)
+    report.elapsed = time.perf_counter() - started
+    return report
+
+
 def get_schema_json() -> str:
     return json.dumps(INDEX_SCHEMA, indent=2)
@@ -0,0 +1,118 @@
+"""
+Directory tree over a saved index, built only as far as it is expanded.
+
+Subfolders and their rollup sizes come from the directory stats table saved
+with the index when there is one, so expanding a folder reads no records
+unless the folder holds files of its own. Without a table each expansion
+lists the folder through the index's path-prefix offset table.
+"""
+import json
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .aggregate import find_directory_stats
+from .pathindex import iter_directory_files, list_directory
+from .reader import read_summary
+
+
+@dataclass
+class TreeNode:
+    path: str
+    total_size: Optional[int] = None
+    file_count: Optional[int] = None
+    depth: int = 0
+    expanded: bool = False
+    children: Optional[List["TreeNode"]] = None
+    files: Optional[List[Dict[str, Any]]] = None
+
+    @property
+    def name(self) -> str:
+        return os.path.basename(self.path.rstrip("/\\")) or self.path
+
+    @property
+    def loaded(self) -> bool:
+        return self.children is not None
+
+
+class LazyTree:
+    """Expandable folder tree of one saved index; ``roots`` are its top-level folders."""
+
+    def __init__(self, index_path: str, stats_path: Optional[str] = None):
+        self.index_path = index_path
+        self.stats_path = stats_path
+        self._table: Optional[Dict[str, Tuple[int, int]]] = None
+        self._subdirs: Dict[str, List[str]] = {}
+        if stats_path is not None:
+            self._load_table(stats_path)
+        self.roots = self._root_nodes()
+
+    @classmethod
+    def open(cls, index_path: str) -> "LazyTree":
+        """Use the directory stats saved next to ``index_path`` when present."""
+        return cls(index_path, find_directory_stats(index_path))
+
+    def _load_table(self, stats_path: str) -> None:
+        with open(stats_path, "r", encoding="utf-8") as f:
+            directories = json.load(f)["directories"]
+        self._table = {d["path"]: (d["total_size"], d["file_count"]) for d in directories}
+        for path in self._table:
+            parent = os.path.dirname(path)
+            if parent != path and parent in self._table:
+                self._subdirs.setdefault(parent, []).append(path)
+
+    def _node(self, path: str, depth: int) -> TreeNode:
+        size, count = self._table.get(path, (None, None)) if self._table is not None else (None, None)
+        return TreeNode(path, size, count, depth)
+
+    def _root_nodes(self) -> List[TreeNode]:
+        if self._table is not None:
+            tops = [p for p in self._table if os.path.dirname(p) == p or os.path.dirname(p) not in self._table]
+        else:
+            summary = read_summary(self.index_path) or {}
+            tops = list(summary.get("indexed_paths", []))
+        roots = [self._node(path, 0) for path in sorted(tops)]
+        if self._table is None and len(roots) == 1:
+            roots[0].total_size, roots[0].file_count = summary.get("total_size"), summary.get("total_files")
+        return roots
+
+    def _load(self, node: TreeNode) -> None:
+        if self._table is not None:
+            children = [self._node(p, node.depth + 1) for p in self._subdirs.get(node.path, [])]
+            own_files = (node.file_count or 0) - sum(c.file_count or 0 for c in children)
+            files = list(iter_directory_files(self.index_path, node.path)) if own_files > 0 else []
+        else:
+            listing = list_directory(self.index_path, node.path)
+            children = [TreeNode(d["path"], d["size"], d["files"], node.depth + 1) for d in listing["dirs"]]
+            files = listing["files"]
+            node.total_size = sum(c.total_size for c in children) + sum(f["size"] for f in files)
+            node.file_count = sum(c.file_count for c in children) + len(files)
+        node.children = sorted(children, key=lambda c: c.total_size or 0, reverse=True)
+        node.files = sorted(files, key=lambda f: f["size"], reverse=True)
+
+    def expand(self, node: TreeNode) -> None:
+        if not node.loaded:
+            self._load(node)
+        node.expanded = True
+
+    def collapse(self, node: TreeNode) -> None:
+        node.expanded = False
+
+    def toggle(self, node: TreeNode) -> None:
+        if node.expanded:
+            self.collapse(node)
+        else:
+            self.expand(node)
+
+    def collapse_all(self) -> None:
+        for node in list(self.visible()):
+            node.expanded = False
+
+    def visible(self) -> Iterator[TreeNode]:
+        """Folders currently on screen, depth first in display order."""
+        stack = list(reversed(self.roots))
+        while stack:
+            node = stack.pop()
+            yield node
+            if node.expanded and node.children:
+                stack.extend(reversed(node.children))
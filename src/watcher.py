@@ -0,0 +1,415 @@
+"""
+Watch mode: keep a saved index current after the initial scan.
+
+File system events come from inotify on Linux and from a directory-mtime
+polling snapshot elsewhere. Events are coalesced into a set of dirty paths
+and only applied once the tree has been quiet for ``debounce`` seconds, so a
+burst of writes to one file costs a single re-stat instead of a rescan.
+"""
+import ctypes
+import ctypes.util
+import errno
+import logging
+import os
+import select
+import struct
+import sys
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from .indexer import index_directory
+from .metadata import extract_metadata_safe
+from .metrics import IndexMetrics
+from .models import FileMetadata, IndexResult
+from .output import create_index_result, write_json
+
+logger = logging.getLogger(__name__)
+
+# (kind, path) where kind is one of "created", "modified", "deleted".
+# Renames are reported as a deletion of the old path and a creation of the new one.
+WatchEvent = Tuple[str, str]
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = getattr(os, "O_CLOEXEC", 0o2000000)
+
+WATCH_MASK = (
+    IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+    | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF
+)
+
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class InotifyWatcher:
+    """Recursive inotify watcher bound through ctypes (Linux only)."""
+
+    def __init__(self, roots: Iterable[str]):
+        libc_name = ctypes.util.find_library("c") or "libc.so.6"
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self._libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self._dirs: Dict[int, str] = {}
+        self.overflowed = False
+        try:
+            for root in roots:
+                self.add_tree(root)
+        except OSError:
+            self.close()
+            raise
+
+    def add_tree(self, root: str) -> None:
+        for dirpath, _, _ in os.walk(root):
+            self._add_watch(dirpath)
+
+    def _add_watch(self, dirpath: str) -> None:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(dirpath), WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err == errno.ENOSPC:
+                raise OSError(err, "inotify watch limit reached (fs.inotify.max_user_watches)")
+            logger.debug(f"Cannot watch directory: {dirpath} - {os.strerror(err)}")
+            return
+        self._dirs[wd] = dirpath
+
+    def poll(self, timeout: float) -> List[WatchEvent]:
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        events: List[WatchEvent] = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                self.overflowed = True
+                continue
+            if mask & IN_IGNORED:
+                self._dirs.pop(wd, None)
+                continue
+            dirpath = self._dirs.get(wd)
+            if dirpath is None:
+                continue
+            path = os.path.join(dirpath, name) if name else dirpath
+
+            if mask & (IN_CREATE | IN_MOVED_TO):
+                if mask & IN_ISDIR:
+                    self.add_tree(path)
+                events.append(("created", path))
+            elif mask & (IN_DELETE | IN_MOVED_FROM | IN_DELETE_SELF | IN_MOVE_SELF):
+                events.append(("deleted", path))
+            else:
+                events.append(("modified", path))
+        return events
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class PollingWatcher:
+    """
+    Portable fallback that snapshots directory mtimes.
+
+    Each poll costs one stat per directory; only directories whose mtime moved
+    are re-listed. In-place file modifications do not touch the directory
+    mtime, so every ``file_check_every`` polls the files are re-stat'ed too.
+    """
+
+    def __init__(self, roots: Iterable[str], interval: float = 2.0, file_check_every: int = 10):
+        self.interval = interval
+        self.file_check_every = file_check_every
+        self.overflowed = False
+        self._polls = 0
+        self._dir_mtimes: Dict[str, int] = {}
+        self._entries: Dict[str, Dict[str, Tuple[bool, int, int]]] = {}
+        for root in roots:
+            self.add_tree(root)
+
+    def add_tree(self, root: str) -> None:
+        pending = [root]
+        while pending:
+            dirpath = pending.pop()
+            entries = self._snapshot(dirpath)
+            if entries is None:
+                continue
+            pending.extend(os.path.join(dirpath, n) for n, (is_dir, _, _) in entries.items() if is_dir)
+
+    def _snapshot(self, dirpath: str) -> Optional[Dict[str, Tuple[bool, int, int]]]:
+        try:
+            dir_mtime = os.stat(dirpath).st_mtime_ns
+            entries = {}
+            with os.scandir(dirpath) as it:
+                for entry in it:
+                    try:
+                        is_dir = entry.is_dir(follow_symlinks=False)
+                        st = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    entries[entry.name] = (is_dir, st.st_mtime_ns, st.st_size)
+        except OSError:
+            return None
+        self._dir_mtimes[dirpath] = dir_mtime
+        self._entries[dirpath] = entries
+        return entries
+
+    def _forget_tree(self, dirpath: str) -> None:
+        prefix = dirpath + os.sep
+        for known in [d for d in self._dir_mtimes if d == dirpath or d.startswith(prefix)]:
+            del self._dir_mtimes[known]
+            del self._entries[known]
+
+    def poll(self, timeout: float) -> List[WatchEvent]:
+        time.sleep(self.interval)
+        self._polls += 1
+        check_files = self.file_check_every > 0 and self._polls % self.file_check_every == 0
+
+        events: List[WatchEvent] = []
+        for dirpath, old_mtime in list(self._dir_mtimes.items()):
+            if dirpath not in self._dir_mtimes:
+                continue
+            try:
+                changed = os.stat(dirpath).st_mtime_ns != old_mtime
+            except OSError:
+                self._forget_tree(dirpath)
+                events.append(("deleted", dirpath))
+                continue
+            if not changed and not check_files:
+                continue
+
+            old_entries = self._entries[dirpath]
+            new_entries = self._snapshot(dirpath) or {}
+            for name, (is_dir, mtime, size) in new_entries.items():
+                path = os.path.join(dirpath, name)
+                previous = old_entries.get(name)
+                if previous is None:
+                    if is_dir:
+                        self.add_tree(path)
+                    events.append(("created", path))
+                elif not is_dir and previous[1:] != (mtime, size):
+                    events.append(("modified", path))
+            for name, (is_dir, _, _) in old_entries.items():
+                if name not in new_entries:
+                    path = os.path.join(dirpath, name)
+                    if is_dir:
+                        self._forget_tree(path)
+                    events.append(("deleted", path))
+        return events
+
+    def close(self) -> None:
+        self._dir_mtimes.clear()
+        self._entries.clear()
+
+
+def create_watcher(roots: List[str], use_polling: bool = False, interval: float = 2.0):
+    """Return an inotify watcher on Linux, falling back to polling when unavailable."""
+    if not use_polling and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(roots)
+        except (OSError, AttributeError) as e:
+            logger.warning(f"inotify unavailable, falling back to polling: {e}")
+    return PollingWatcher(roots, interval=interval)
+
+
+class EventCoalescer:
+    """Collapse a stream of events into dirty paths, released after a quiet period."""
+
+    def __init__(self, debounce: float = 0.5, max_delay: float = 10.0):
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self._dirty: Set[str] = set()
+        self._first_event = 0.0
+        self._last_event = 0.0
+
+    def add(self, events: Iterable[WatchEvent]) -> None:
+        now = time.monotonic()
+        for _, path in events:
+            if not self._dirty:
+                self._first_event = now
+            self._dirty.add(path)
+            self._last_event = now
+
+    def ready(self) -> bool:
+        if not self._dirty:
+            return False
+        now = time.monotonic()
+        return now - self._last_event >= self.debounce or now - self._first_event >= self.max_delay
+
+    def drain(self) -> Set[str]:
+        dirty, self._dirty = self._dirty, set()
+        return dirty
+
+
+def saved_files(filepath: str) -> Set[str]:
+    """Absolute paths of every file ``LiveIndex.save`` writes for ``filepath``, temporary ones included."""
+    from .membership import membership_path
+    from .pathindex import path_index_path
+    written = {filepath, path_index_path(filepath), membership_path(filepath)}
+    return {os.path.abspath(p) for path in written for p in (path, f"{path}.tmp")}
+
+
+class LiveIndex:
+    """
+    An in-memory index keyed by path that can be updated path by path.
+    Paths in ``ignore`` (absolute, e.g. the index's own files) are never
+    indexed.
+    """
+
+    def __init__(self, roots: List[str], files: Iterable[FileMetadata] = (), ignore: Iterable[str] = ()):
+        self.roots = roots
+        self.ignore = set(ignore)
+        self.records: Dict[str, FileMetadata] = {f.path: f for f in files if not self._ignored(f.path)}
+
+    @classmethod
+    def scan(cls, roots: List[str], metrics: Optional[IndexMetrics] = None, ignore: Iterable[str] = ()) -> "LiveIndex":
+        live = cls(roots, ignore=ignore)
+        for root in roots:
+            records = index_directory(root)
+            if metrics is not None:
+                records = metrics.observe(records)
+            for metadata in records:
+                if not live._ignored(metadata.path):
+                    live.records[metadata.path] = metadata
+        return live
+
+    def _ignored(self, path: str) -> bool:
+        return bool(self.ignore) and os.path.abspath(path) in self.ignore
+
+    def _remove_tree(self, path: str) -> int:
+        prefix = path + os.sep
+        stale = [p for p in self.records if p.startswith(prefix)]
+        for p in stale:
+            del self.records[p]
+        return len(stale)
+
+    def refresh(self, path: str) -> int:
+        """Bring one path (file or directory) in line with the disk; return records changed."""
+        if self._ignored(path):
+            return 0
+        if os.path.isdir(path):
+            changed = self._remove_tree(path)
+            for metadata in index_directory(path):
+                if not self._ignored(metadata.path):
+                    self.records[metadata.path] = metadata
+                changed += 1
+            return changed
+
+        metadata = extract_metadata_safe(path) if os.path.isfile(path) else None
+        if metadata is not None:
+            self.records[path] = metadata
+            return 1
+        changed = self._remove_tree(path)
+        if self.records.pop(path, None) is not None:
+            changed += 1
+        return changed
+
+    def apply(self, dirty: Iterable[str]) -> int:
+        # Parents first, so refreshing a new directory makes its children redundant.
+        changed = 0
+        done: List[str] = []
+        for path in sorted(dirty):
+            if any(path.startswith(d + os.sep) for d in done):
+                continue
+            changed += self.refresh(path)
+            if os.path.isdir(path):
+                done.append(path)
+        return changed
+
+    def to_result(self) -> IndexResult:
+        return create_index_result(list(self.records.values()), self.roots)
+
+    def save(self, filepath: str, indent: int = 2) -> None:
+        """
+        Atomically replace ``filepath`` with the current index, then its
+        path-prefix offset table and membership file. Until they are
+        replaced the old ones no longer match the index and are ignored.
+        """
+        from .membership import replace_membership
+        from .pathindex import PathIndexBuilder
+        os.makedirs(os.path.dirname(filepath) or ".", exist_ok=True)
+        tmp_path = f"{filepath}.tmp"
+        path_index = PathIndexBuilder()
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            write_json(self.to_result(), f, indent=indent, sort_by="path", path_index=path_index)
+        os.replace(tmp_path, filepath)
+        path_index.save(filepath, "json")
+        replace_membership(self.records, filepath)
+
+
+def watch(
+    roots: List[str],
+    output_path: str,
+    debounce: float = 0.5,
+    use_polling: bool = False,
+    poll_interval: float = 2.0,
+    should_stop: Optional[Callable[[], bool]] = None,
+    on_update: Optional[Callable[[int, LiveIndex], None]] = None,
+    metrics: Optional[IndexMetrics] = None,
+) -> LiveIndex:
+    """
+    Scan ``roots``, save the index to ``output_path`` and keep it current
+    until ``should_stop`` returns True or the process is interrupted.
+    ``metrics``, if given, counts scanned records and applied updates.
+    """
+    # Start watching before the initial scan so changes made during it are not lost.
+    watcher = create_watcher([r for r in roots if os.path.isdir(r)], use_polling, poll_interval)
+    # The index and its sidecars may sit inside a watched root; saving them must not count as a change.
+    own_files = saved_files(output_path)
+    live = LiveIndex.scan(roots, metrics, ignore=own_files)
+    live.save(output_path)
+    if metrics is not None:
+        metrics.record_update(0, len(live.records))
+    logger.info(f"Initial scan indexed {len(live.records):,} files; watching for changes")
+
+    coalescer = EventCoalescer(debounce=debounce)
+    try:
+        while should_stop is None or not should_stop():
+            events = watcher.poll(timeout=debounce)
+            coalescer.add(e for e in events if os.path.abspath(e[1]) not in own_files)
+
+            if watcher.overflowed:
+                logger.warning("Event queue overflowed; rescanning all roots")
+                watcher.overflowed = False
+                coalescer.drain()
+                live = LiveIndex.scan(roots, metrics, ignore=own_files)
+                live.save(output_path)
+                if metrics is not None:
+                    metrics.record_update(0, len(live.records))
+                continue
+
+            if coalescer.ready():
+                changed = live.apply(coalescer.drain())
+                if changed:
+                    live.save(output_path)
+                    if metrics is not None:
+                        metrics.record_update(changed, len(live.records))
+                    if on_update is not None:
+                        on_update(changed, live)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+    return live
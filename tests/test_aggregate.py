@@ -0,0 +1,27 @@
+"""du over a saved index: hard links and on-disk sizes."""
+import os
+
+import pytest
+
+from src.aggregate import disk_usage
+from src.indexer import index_directory
+from src.models import WalkHealth
+
+
+@pytest.mark.skipif(not hasattr(os, "link"), reason="needs hard links")
+def test_link_aware_walk_counts_hard_links_once_on_disk(tmp_path):
+    tree = tmp_path / "tree"
+    tree.mkdir()
+    (tree / "a.bin").write_bytes(b"x" * 65536)
+    os.link(tree / "a.bin", tree / "b.bin")
+
+    plain = list(index_directory(str(tree)))
+    deduped = list(index_directory(str(tree), health=WalkHealth(), dedupe_links=True))
+    allocated = next(f.allocated_size for f in plain)
+    if allocated is None:
+        pytest.skip("no block counts on this platform")
+
+    assert disk_usage([f.to_dict() for f in plain], [str(tree)]).directories[str(tree)].allocated_size == 2 * allocated
+    stats = disk_usage([f.to_dict() for f in deduped], [str(tree)]).directories[str(tree)]
+    assert stats.allocated_size == allocated
+    assert stats.total_size == 2 * 65536
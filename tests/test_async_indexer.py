@@ -0,0 +1,31 @@
+"""Async indexing of a root that stops responding."""
+import os
+import subprocess
+import sys
+import textwrap
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_HUNG_ROOT = textwrap.dedent("""
+    import asyncio, sys, threading
+    from src import async_indexer
+
+    def hung(*args):
+        threading.Event().wait()
+
+    async def main(root):
+        async_indexer._scan_dir = hung
+        async for _ in async_indexer.aindex_directory(root, root_timeout=0.2):
+            pass
+
+    asyncio.run(main(sys.argv[1]))
+    print("done")
+""")
+
+
+def test_process_exits_despite_hung_listing(tmp_path):
+    run = subprocess.run([sys.executable, "-c", _HUNG_ROOT, str(tmp_path)], cwd=REPO,
+                         capture_output=True, text=True, timeout=10)
+    assert run.returncode == 0, run.stderr
+    assert run.stdout.strip() == "done"
+    assert "Timed out" in run.stderr
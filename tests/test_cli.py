@@ -0,0 +1,115 @@
+"""Subcommands on every saved index format."""
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from src.indexer import index_directory
+from src.output import create_index_result, save_index
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _main(*args):
+    return subprocess.run([sys.executable, os.path.join(REPO, "main.py"), *args],
+                          capture_output=True, text=True, cwd=REPO, timeout=60)
+
+
+def _save(tmp_path, name, output_format, **kwargs):
+    tree = tmp_path / "tree"
+    if not tree.exists():
+        (tree / "sub").mkdir(parents=True)
+        (tree / "a.txt").write_bytes(b"a" * 5)
+        (tree / "sub" / "b.py").write_bytes(b"b" * 7)
+        (tree / "sub" / "c.py").write_bytes(b"c" * 11)
+    result = create_index_result(list(index_directory(str(tree))), [str(tree)])
+    return save_index(result, str(tmp_path / name), output_format, **kwargs)["index_file"]
+
+
+@pytest.fixture
+def sharded(tmp_path):
+    return _save(tmp_path, "sharded.json", "json", shard_records=2)
+
+
+def test_validate_manifest(sharded):
+    run = _main("validate", sharded)
+    assert run.returncode == 0, run.stdout + run.stderr
+    assert "valid - 3 records" in run.stdout
+
+
+def test_report_manifest(sharded):
+    run = _main("report", sharded, "--json")
+    assert run.returncode == 0, run.stderr
+    report = json.loads(run.stdout)
+    assert (report["total_files"], report["total_size"]) == (3, 23)
+
+
+def test_diff_manifest(tmp_path, sharded):
+    plain = _save(tmp_path, "plain.json", "json")
+    run = _main("diff", plain, sharded, "--summary", "--json")
+    assert run.returncode == 0, run.stderr
+    assert json.loads(run.stdout.splitlines()[-1])["summary"]["unchanged"] == 3
+
+
+@pytest.fixture
+def ndjson(tmp_path):
+    return _save(tmp_path, "lines.ndjson", "ndjson")
+
+
+def test_validate_ndjson(ndjson):
+    run = _main("validate", ndjson)
+    assert run.returncode == 0, run.stdout + run.stderr
+    assert "valid - 3 records" in run.stdout
+
+
+def test_report_ndjson(ndjson):
+    run = _main("report", ndjson, "--json")
+    assert run.returncode == 0, run.stderr
+    report = json.loads(run.stdout)
+    assert (report["total_files"], report["total_size"]) == (3, 23)
+
+
+def test_diff_ndjson(tmp_path, ndjson):
+    plain = _save(tmp_path, "plain.json", "json")
+    run = _main("diff", plain, ndjson, "--summary", "--json")
+    assert run.returncode == 0, run.stderr
+    assert json.loads(run.stdout.splitlines()[-1])["summary"]["unchanged"] == 3
+
+
+@pytest.fixture
+def parquet(tmp_path):
+    pytest.importorskip("pyarrow")
+    return _save(tmp_path, "columns.parquet", "parquet")
+
+
+def test_parquet_reads_back(tmp_path, parquet):
+    from src.reader import iter_record_dicts, read_summary
+    plain = _save(tmp_path, "plain.json", "json")
+    assert list(iter_record_dicts(parquet)) == list(iter_record_dicts(plain))
+    assert read_summary(parquet)["total_files"] == 3
+
+
+def test_report_and_validate_parquet(parquet):
+    run = _main("report", parquet, "--json")
+    assert run.returncode == 0, run.stderr
+    assert json.loads(run.stdout)["total_files"] == 3
+    run = _main("validate", parquet)
+    assert run.returncode == 0, run.stdout + run.stderr
+
+
+@pytest.mark.parametrize("extra", [
+    ["--format", "parquet"],
+    ["--dir-timeout", "5"],
+    ["--follow-symlinks"],
+    ["--one-file-system"],
+    ["--dedupe-links"],
+])
+def test_watch_rejects_unsupported_options(tmp_path, extra):
+    from cli import parse_args
+    with pytest.raises(SystemExit) as exited:
+        parse_args(["--path", str(tmp_path), "--output", str(tmp_path / "x.json"), "--watch", *extra])
+    assert exited.value.code == 2
+    with pytest.raises(SystemExit):
+        parse_args(["--path", str(tmp_path), "--output", str(tmp_path / "x.parquet"), "--watch"])
@@ -0,0 +1,104 @@
+"""Index daemon: error replies and the index cache."""
+import json
+import socket
+import threading
+import time
+
+from src import daemon
+from src.daemon import DaemonClient, IndexCache, serve
+from src.indexer import index_directory
+from src.output import create_index_result, save_index
+
+
+def _save_index(tmp_path, name):
+    tree = tmp_path / f"{name}_tree"
+    tree.mkdir()
+    (tree / "a.txt").write_bytes(b"a" * 5)
+    (tree / "b.txt").write_bytes(b"b" * 7)
+    result = create_index_result(list(index_directory(str(tree))), [str(tree)])
+    return save_index(result, str(tmp_path / f"{name}.json"))["index_file"]
+
+
+def _start_daemon():
+    ready = threading.Event()
+    address = {}
+
+    def on_ready(where):
+        address["port"] = int(where.rsplit(":", 1)[1])
+        ready.set()
+
+    thread = threading.Thread(target=serve, kwargs={"port": 0, "on_ready": on_ready}, daemon=True)
+    thread.start()
+    assert ready.wait(5)
+    return address["port"], thread
+
+
+def test_malformed_requests_get_error_replies(tmp_path):
+    index = _save_index(tmp_path, "one")
+    port, thread = _start_daemon()
+    try:
+        with socket.create_connection(("127.0.0.1", port), timeout=5) as sock:
+            reader = sock.makefile("rb")
+            requests = [
+                json.dumps({"id": 1, "op": "top", "index": index, "n": "ten"}),  # TypeError
+                json.dumps([1, 2]),  # not an object
+                json.dumps({"id": 3, "op": "stat", "index": index, "path": 5}),
+                json.dumps({"id": 4, "op": "ping"}),
+            ]
+            sock.sendall(("\n".join(requests) + "\n").encode("utf-8"))
+            replies = [json.loads(reader.readline()) for _ in requests]
+        assert [r["ok"] for r in replies] == [False, False, False, True]
+        assert replies[0]["id"] == 1 and replies[1]["id"] is None
+        assert replies[3]["result"] == "pong"
+    finally:
+        with DaemonClient(port=port) as client:
+            client.request("shutdown")
+        thread.join(5)
+
+
+def test_slow_load_does_not_block_cached_indexes(tmp_path, monkeypatch):
+    fast = _save_index(tmp_path, "fast")
+    slow = _save_index(tmp_path, "slow")
+    cache = IndexCache()
+    cache.get(fast)
+
+    real_load = daemon.CompactIndex.load
+    release = threading.Event()
+    loads = []
+
+    def load(path):
+        loads.append(path)
+        if path.endswith("slow.json"):
+            release.wait(5)
+        return real_load(path)
+
+    monkeypatch.setattr(daemon.CompactIndex, "load", staticmethod(load))
+    waiters = [threading.Thread(target=cache.get, args=(slow,)) for _ in range(3)]
+    for waiter in waiters:
+        waiter.start()
+    time.sleep(0.1)
+
+    started = time.monotonic()
+    assert len(cache.get(fast)) == 2
+    assert time.monotonic() - started < 0.5
+
+    release.set()
+    for waiter in waiters:
+        waiter.join(5)
+    assert loads.count(str(tmp_path / "slow.json")) == 1
+    assert {entry["index"] for entry in cache.loaded()} == {fast, slow}
+
+
+def test_long_pipeline_does_not_deadlock(tmp_path):
+    index = _save_index(tmp_path, "one")
+    port, thread = _start_daemon()
+    try:
+        # Far more requests and replies than the socket buffers hold.
+        requests = [{"op": "top", "index": index, "n": 2, "pad": "x" * 1000}] * 20000
+        with DaemonClient(port=port, timeout=10) as client:
+            replies = client.pipeline(requests)
+        assert len(replies) == len(requests)
+    finally:
+        with DaemonClient(port=port) as client:
+            client.request("shutdown")
+        thread.join(5)
@@ -0,0 +1,31 @@
+"""Directory timeouts on a link-aware walk."""
+import os
+import threading
+import time
+
+from src import indexer
+from src.indexer import index_directory
+from src.models import WalkHealth
+
+
+def test_hung_root_stat_is_quarantined(tmp_path, monkeypatch):
+    (tmp_path / "a.txt").write_bytes(b"a")
+    release = threading.Event()
+    stat = indexer._stat
+
+    def hung(path, *args, **kwargs):
+        if os.fspath(path) == str(tmp_path):
+            release.wait(5)
+        return stat(path, *args, **kwargs)
+
+    monkeypatch.setattr(indexer, "_stat", hung)
+    health = WalkHealth()
+    started = time.monotonic()
+    try:
+        files = list(index_directory(str(tmp_path), dir_timeout=0.2, health=health, dedupe_links=True))
+    finally:
+        release.set()
+    assert time.monotonic() - started < 1.0
+    assert files == []
+    assert health.roots[str(tmp_path)].quarantined
+    assert health.skipped_paths == [str(tmp_path)]
@@ -0,0 +1,27 @@
+"""Scheduling behaviour of run_jobs."""
+import time
+
+from src import jobs
+from src.jobs import Job, JobFile, JobResult, run_jobs
+
+
+def test_retry_wait_does_not_spin(monkeypatch):
+    calls = []
+
+    def flaky_run_job(job, timestamp, last_attempt):
+        calls.append(time.monotonic())
+        if len(calls) == 1:
+            raise OSError("drive not ready")
+        return JobResult(job, 0, files=1), False
+
+    monkeypatch.setattr(jobs, "run_job", flaky_run_job)
+    job_file = JobFile([Job("only", "/nonexistent", "out.json", retries=1)], concurrency=1, retry_delay=0.5)
+
+    cpu_started = time.process_time()
+    results = run_jobs(job_file)
+    cpu_used = time.process_time() - cpu_started
+
+    assert results[0].ok and results[0].attempts == 2
+    assert calls[1] - calls[0] >= 0.5
+    # Busy-waiting burns the whole delay in CPU time.
+    assert cpu_used < 0.25
@@ -0,0 +1,81 @@
+"""Scrape the metrics endpoint and textfile after a small index run."""
+import re
+import urllib.error
+import urllib.request
+
+import pytest
+
+from src.indexer import index_directory
+from src.metrics import CONTENT_TYPE, IndexMetrics, MetricsServer
+from src.models import WalkHealth
+
+
+def _make_tree(root):
+    (root / "a").mkdir()
+    (root / "a" / "b").mkdir()
+    (root / "one.txt").write_bytes(b"x" * 10)
+    (root / "a" / "two.txt").write_bytes(b"y" * 20)
+    (root / "a" / "b" / "three.txt").write_bytes(b"z" * 30)
+
+
+def _run_index(root):
+    health = WalkHealth()
+    metrics = IndexMetrics(health)
+    with metrics.phase("walk"):
+        files = list(metrics.observe(index_directory(str(root), health=health, on_directory=metrics.on_directory)))
+    return metrics, files
+
+
+def _samples(text):
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            samples[name] = float(value)
+    return samples
+
+
+def test_metrics_endpoint_after_index_run(tmp_path):
+    _make_tree(tmp_path)
+    metrics, files = _run_index(tmp_path)
+    server = MetricsServer(metrics, port=0)
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{server.port}/metrics", timeout=5) as response:
+            assert response.status == 200
+            assert response.headers["Content-Type"] == CONTENT_TYPE
+            samples = _samples(response.read().decode("utf-8"))
+    finally:
+        server.close()
+
+    assert len(files) == 3
+    assert samples["file_indexer_files_indexed_total"] == 3
+    assert samples["file_indexer_bytes_indexed_total"] == 60
+    assert samples["file_indexer_directories_queued"] == 0
+    assert samples[f'file_indexer_directories_scanned_total{{root="{tmp_path}"}}'] == 3
+    assert samples[f'file_indexer_errors_total{{root="{tmp_path}"}}'] == 0
+    assert samples['file_indexer_phase_duration_seconds{phase="walk"}'] >= 0
+
+
+def test_metrics_unknown_path_is_404():
+    server = MetricsServer(IndexMetrics(), port=0)
+    try:
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(f"http://127.0.0.1:{server.port}/other", timeout=5)
+        assert error.value.code == 404
+    finally:
+        server.close()
+
+
+def test_metrics_textfile_written_on_close(tmp_path):
+    tree = tmp_path / "tree"
+    tree.mkdir()
+    _make_tree(tree)
+    metrics, _ = _run_index(tree)
+    textfile = tmp_path / "indexer.prom"
+    server = MetricsServer(metrics, textfile=str(textfile), interval=3600)
+    server.close()
+
+    text = textfile.read_text(encoding="utf-8")
+    assert re.search(r"^# TYPE file_indexer_files_indexed_total counter$", text, re.MULTILINE)
+    assert _samples(text)["file_indexer_files_indexed_total"] == 3
+    assert not list(tmp_path.glob("indexer.prom.*"))
@@ -0,0 +1,49 @@
+"""Tree sampling: the time budget and hung listings."""
+import threading
+import time
+
+from src import progress
+from src.progress import sample_tree
+
+
+def _wide_tree(tmp_path, folders=40):
+    root = tmp_path / "root"
+    for i in range(folders):
+        (root / f"d{i:02d}" / "leaf").mkdir(parents=True)
+        (root / f"d{i:02d}" / "leaf" / "f.txt").write_bytes(b"x")
+    return root
+
+
+def test_sample_stops_at_budget_within_a_pass(tmp_path, monkeypatch):
+    root = _wide_tree(tmp_path)
+    list_for_sample = progress._list_for_sample
+
+    def slow(path):
+        time.sleep(0.02)
+        return list_for_sample(path)
+
+    monkeypatch.setattr(progress, "_list_for_sample", slow)
+    started = time.monotonic()
+    estimate = sample_tree(str(root), exact_dirs=1, time_budget=0.2)
+    assert time.monotonic() - started < 0.4
+    # Every frontier folder is still counted, probed or not.
+    assert estimate.dirs >= 41
+
+
+def test_sample_abandons_hung_listing(tmp_path, monkeypatch):
+    root = _wide_tree(tmp_path, folders=3)
+    hang = threading.Event()
+    list_for_sample = progress._list_for_sample
+
+    def hung(path):
+        if path.endswith("d01"):
+            hang.wait(5)
+        return list_for_sample(path)
+
+    monkeypatch.setattr(progress, "_list_for_sample", hung)
+    started = time.monotonic()
+    try:
+        sample_tree(str(root), time_budget=10.0, dir_timeout=0.2)
+    finally:
+        hang.set()
+    assert time.monotonic() - started < 1.0
@@ -0,0 +1,96 @@
+"""Sidecars saved next to an index: kept in step with it, ignored once it changes."""
+import os
+
+from src.indexer import index_directory
+from src.membership import Membership, build_membership, open_membership
+from src.pathindex import list_directory, load_path_index
+from src.watcher import LiveIndex
+
+
+def _tree(tmp_path):
+    tree = tmp_path / "tree"
+    (tree / "sub").mkdir(parents=True)
+    (tree / "a.txt").write_bytes(b"a" * 5)
+    (tree / "sub" / "b.txt").write_bytes(b"b" * 7)
+    return tree
+
+
+def test_path_index_ignored_after_same_size_rewrite(tmp_path):
+    tree = _tree(tmp_path)
+    index = str(tmp_path / "live.json")
+    live = LiveIndex([str(tree)], index_directory(str(tree)))
+    live.save(index)
+    assert load_path_index(index) is not None
+
+    with open(index, "r+b") as f:
+        data = f.read()
+        f.seek(0)
+        f.write(data.replace(b"a.txt", b"z.txt"))
+    stat_result = os.stat(index)
+    os.utime(index, ns=(stat_result.st_atime_ns, stat_result.st_mtime_ns + 1_000_000_000))
+    assert load_path_index(index) is None
+
+
+def test_live_index_save_rebuilds_path_index(tmp_path):
+    tree = _tree(tmp_path)
+    index = str(tmp_path / "live.json")
+    live = LiveIndex([str(tree)], index_directory(str(tree)))
+    live.save(index)
+
+    (tree / "sub" / "c.txt").write_bytes(b"c" * 11)
+    live.refresh(str(tree / "sub" / "c.txt"))
+    live.save(index)
+    assert load_path_index(index)["records"] == 3
+    listing = list_directory(index, str(tree / "sub"))
+    assert sorted(os.path.basename(f["path"]) for f in listing["files"]) == ["b.txt", "c.txt"]
+
+
+def test_membership_ignored_after_same_size_rewrite(tmp_path):
+    tree = _tree(tmp_path)
+    index = str(tmp_path / "live.json")
+    LiveIndex([str(tree)], index_directory(str(tree))).save(index)
+    with open_membership(index) as members:
+        assert str(tree / "a.txt") in members
+
+    stat_result = os.stat(index)
+    os.utime(index, ns=(stat_result.st_atime_ns, stat_result.st_mtime_ns + 1_000_000_000))
+    assert open_membership(index) is None
+    with Membership(build_membership(index)) as members:
+        assert str(tree / "sub" / "b.txt") in members
+
+
+def test_live_index_save_rebuilds_membership(tmp_path):
+    tree = _tree(tmp_path)
+    index = str(tmp_path / "live.json")
+    live = LiveIndex([str(tree)], index_directory(str(tree)))
+    live.save(index)
+
+    (tree / "sub" / "c.txt").write_bytes(b"c" * 11)
+    live.refresh(str(tree / "sub" / "c.txt"))
+    live.save(index)
+    with open_membership(index) as members:
+        assert len(members) == 3
+        assert str(tree / "sub" / "c.txt") in members
+
+
+def test_path_index_per_format(tmp_path):
+    from src.ndjson import save_ndjson
+    from src.output import create_index_result, write_indexed_json
+    tree = _tree(tmp_path)
+    result = create_index_result(list(index_directory(str(tree))), [str(tree)])
+    write_indexed_json(result, str(tmp_path / "out.json"))
+    save_ndjson(result, str(tmp_path / "out.ndjson"))
+    assert load_path_index(str(tmp_path / "out.json"))["format"] == "json"
+    assert load_path_index(str(tmp_path / "out.ndjson"))["format"] == "ndjson"
+
+
+def test_same_stem_in_two_formats(tmp_path):
+    from src.output import create_index_result, save_index
+    tree = _tree(tmp_path)
+    result = create_index_result(list(index_directory(str(tree))), [str(tree)])
+    as_json = save_index(result, str(tmp_path / "out.json"), "json")
+    as_ndjson = save_index(result, str(tmp_path / "out.ndjson"), "ndjson")
+    assert as_json["membership_file"] != as_ndjson["membership_file"]
+    for index in (as_json["index_file"], as_ndjson["index_file"]):
+        with open_membership(index) as members:
+            assert str(tree / "a.txt") in members
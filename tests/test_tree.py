@@ -0,0 +1,35 @@
+"""Reading one folder's own files from a path-sorted index."""
+import os
+
+import pytest
+
+from src import pathindex
+from src.indexer import index_directory
+from src.output import create_index_result, save_index
+from src.pathindex import iter_directory_files
+
+
+@pytest.mark.parametrize("output_format, name", [("json", "i.json"), ("ndjson", "i.ndjson")])
+def test_direct_files_skip_subfolders(tmp_path, monkeypatch, output_format, name):
+    root = tmp_path / "root"
+    for i in range(4):
+        (root / f"d{i}").mkdir(parents=True)
+        (root / f"d{i}.txt").write_bytes(b"x")
+        for j in range(600):
+            (root / f"d{i}" / f"f{j:03d}").write_bytes(b"")
+    result = create_index_result(list(index_directory(str(root))), [str(root)])
+    index = save_index(result, str(tmp_path / name), output_format)["index_file"]
+
+    decoded = []
+    iter_from = pathindex._iter_from
+
+    def counting(*args):
+        for record in iter_from(*args):
+            decoded.append(record)
+            yield record
+
+    monkeypatch.setattr(pathindex, "_iter_from", counting)
+    files = list(iter_directory_files(index, str(root)))
+    assert sorted(os.path.basename(f["path"]) for f in files) == [f"d{i}.txt" for i in range(4)]
+    # Each 600-record subfolder is mostly skipped, not decoded.
+    assert len(decoded) < len(result.files) // 2
@@ -0,0 +1,30 @@
+"""Watch mode with the index saved inside the watched tree."""
+import os
+import time
+
+import pytest
+
+from src.watcher import watch
+
+
+def _watch_for(seconds, root, output, use_polling):
+    updates = []
+    deadline = time.monotonic() + seconds
+    live = watch([str(root)], str(output), debounce=0.1, use_polling=use_polling, poll_interval=0.1,
+                 should_stop=lambda: time.monotonic() >= deadline,
+                 on_update=lambda changed, live: updates.append(changed))
+    return updates, live
+
+
+@pytest.mark.parametrize("use_polling", [False, True])
+def test_own_files_do_not_trigger_updates(tmp_path, use_polling):
+    root = tmp_path / "tree"
+    root.mkdir()
+    (root / "a.txt").write_bytes(b"a")
+    output = root / "index.json"
+
+    for seconds in (1.5, 1.0):
+        # The second run finds the files of the first already there.
+        updates, live = _watch_for(seconds, root, output, use_polling)
+        assert updates == []
+        assert sorted(os.path.basename(p) for p in live.records) == ["a.txt"]